@@ -1,32 +1,92 @@
 import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
-import pickle
+import sys
+import os
 from pathlib import Path
 import numpy as np
 
+# Make the tesla_analysis package importable when started via `streamlit run`
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from tesla_analysis.result_store import ResultStore, MANIFEST_FILE
+from tesla_analysis.incremental import file_prefix_digest
+from tesla_analysis.main import TeslaStockAnalysis, DEFAULT_CACHE_DIR
+from tesla_analysis.downsampling import downsample_series, DEFAULT_MAX_POINTS
+
+# Analysis groups rendered by the dashboard tabs
+DASHBOARD_GROUPS = ['price_trend', 'volume_analysis', 'technical_analysis',
+                    'sentiment_analysis', 'correlation_analysis']
+
+# Project paths, resolved once so reruns from any working directory agree
+PROJECT_ROOT = Path(__file__).parent.parent
+RESULTS_PATH = PROJECT_ROOT / 'tesla_analysis_results'
+DATA_PATH = PROJECT_ROOT / 'input_folder' / 'Tesla_stock_data.csv'
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def file_digest(path, mtime_ns, size):
+    """Hash a file; cached per modification time and size so reruns skip the read"""
+    return file_prefix_digest(path, size)
+
+def file_version(path):
+    """Identify the current contents of a file by modification time and hash"""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{file_digest(str(path), stat.st_mtime_ns, stat.st_size)}"
+
+@st.cache_resource(max_entries=2, show_spinner="Loading analysis results...")
+def load_stored_results(results_path, version):
+    """Load the stored results once per version and share them across sessions"""
+    store = ResultStore(results_path)
+    
+    # Validate results structure
+    required_keys = ['price_trend', 'volume_analysis', 'technical_analysis',
+                   'sentiment_analysis', 'seasonal_analysis', 'correlation_analysis']
+    stored_groups = {key.split('/')[0] for key in store.keys()}
+    missing_keys = [key for key in required_keys if key not in stored_groups]
+    if missing_keys:
+        raise ValueError(f"Missing required analysis results: {missing_keys}")
+    
+    # Only the rendered groups are mapped; arrays are paged in on access
+    return store.load(groups=DASHBOARD_GROUPS)
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_lazy_results(data_path, version):
+    """Set up on-demand results once per input version and share them across sessions"""
+    analysis = TeslaStockAnalysis(data_path, cache_dir=str(PROJECT_ROOT / DEFAULT_CACHE_DIR))
+    # Indicators are computed as the charts read them
+    return analysis.lazy_results(DASHBOARD_GROUPS)
+
 def load_analysis_results():
-    """Load the analysis results from pickle file via UI"""
-    try:
-        # Get absolute path to results file
-        results_path = Path(__file__).parent.parent / 'tesla_analysis_results.pkl'
-        with open(results_path, 'rb') as f:
-            results = pickle.load(f)
-            
-            # Validate results structure
-            required_keys = ['price_trend', 'volume_analysis', 'technical_analysis',
-                           'sentiment_analysis', 'seasonal_analysis', 'correlation_analysis']
-            missing_keys = [key for key in required_keys if key not in results]
-            if missing_keys:
-                raise ValueError(f"Missing required analysis results: {missing_keys}")
-                
-            return results
-    except FileNotFoundError:
+    """
+    Load the analysis results needed by the dashboard
+    
+    Results are held in a process-wide cache keyed by the version of the
+    files they come from, so every session and rerun shares one copy until
+    the analysis is run again.
+    
+    Returns:
+        Tuple of the results and their version, or (None, None) on failure
+    """
+    manifest_path = RESULTS_PATH / MANIFEST_FILE
+    if manifest_path.exists():
+        try:
+            version = 'results-' + file_version(manifest_path)
+            return load_stored_results(str(RESULTS_PATH), version), version
+        except Exception as e:
+            st.error(f"Error loading analysis results: {str(e)}")
+            return None, None
+    
+    # No stored results: compute only what the dashboard renders
+    if not DATA_PATH.exists():
         st.error("Analysis results not found. Please run the analysis first.")
-        return None
+        return None, None
+    try:
+        version = 'input-' + file_version(DATA_PATH)
+        results = load_lazy_results(str(DATA_PATH), version)
+        st.info("No saved analysis results found; computing the displayed indicators on demand.")
+        return results, version
     except Exception as e:
-        st.error(f"Error loading analysis results: {str(e)}")
-        return None
+        st.error(f"Error loading stock data: {str(e)}")
+        return None, None
 
 def format_currency(value):
     """Format currency values with appropriate units"""
@@ -43,25 +103,54 @@ def format_currency(value):
     else:
         return f'${value:.2f}'
 
-def create_price_trend_chart(results):
+def select_view(results):
+    """Sidebar controls for the visible date range and the points drawn per trace"""
+    index = results['price_trend']['moving_averages']['sma_20'].index
+    first, last = index[0].to_pydatetime(), index[-1].to_pydatetime()
+    start, end = st.sidebar.slider(
+        "Date range",
+        min_value=first,
+        max_value=last,
+        value=(first, last),
+        format="YYYY-MM-DD"
+    )
+    max_points = st.sidebar.number_input(
+        "Points per trace", min_value=100, max_value=20000, value=DEFAULT_MAX_POINTS, step=100
+    )
+    return {'start': start, 'end': end, 'max_points': int(max_points)}
+
+def downsample(series, view=None, method='lttb'):
+    """Reduce a series to the visible date range at about the chart's pixel width"""
+    view = view or {}
+    return downsample_series(
+        series,
+        max_points=view.get('max_points', DEFAULT_MAX_POINTS),
+        start=view.get('start'),
+        end=view.get('end'),
+        method=method
+    )
+
+def create_price_trend_chart(results, view=None):
     """Create price trend chart with moving averages"""
     fig = go.Figure()
     
     # Get the latest price for reference
     latest_price = results['price_trend']['moving_averages']['sma_20'].iloc[-1]
+    sma_20 = downsample(results['price_trend']['moving_averages']['sma_20'], view)
+    sma_50 = downsample(results['price_trend']['moving_averages']['sma_50'], view)
     
     # Add price data with hover text showing formatted values
     fig.add_trace(go.Scatter(
-        x=results['price_trend']['moving_averages']['sma_20'].index,
-        y=results['price_trend']['moving_averages']['sma_20'],
+        x=sma_20.index,
+        y=sma_20,
         name='SMA 20',
         line=dict(color='blue', width=2),
         hovertemplate='Date: %{x}<br>Price: %{y:$.2f}<extra></extra>'
     ))
     
     fig.add_trace(go.Scatter(
-        x=results['price_trend']['moving_averages']['sma_50'].index,
-        y=results['price_trend']['moving_averages']['sma_50'],
+        x=sma_50.index,
+        y=sma_50,
         name='SMA 50',
         line=dict(color='orange', width=2),
         hovertemplate='Date: %{x}<br>Price: %{y:$.2f}<extra></extra>'
@@ -92,14 +181,17 @@ def create_price_trend_chart(results):
     )
     return fig
 
-def create_volume_chart(results):
+def create_volume_chart(results, view=None):
     """Create volume analysis chart"""
     fig = go.Figure()
     
+    # Bars keep each bucket's extremes so volume spikes stay visible
+    volume_ma_20 = downsample(results['volume_analysis']['volume_averages']['volume_ma_20'], view, method='minmax')
+    
     # Add volume data
     fig.add_trace(go.Bar(
-        x=results['volume_analysis']['volume_averages']['volume_ma_20'].index,
-        y=results['volume_analysis']['volume_averages']['volume_ma_20'],
+        x=volume_ma_20.index,
+        y=volume_ma_20,
         name='Volume MA 20',
         marker_color='blue'
     ))
@@ -112,14 +204,15 @@ def create_volume_chart(results):
     )
     return fig
 
-def create_technical_indicators_chart(results):
+def create_technical_indicators_chart(results, view=None):
     """Create technical indicators chart"""
     fig = go.Figure()
+    rsi = downsample(results['technical_analysis']['rsi'], view)
     
     # Add RSI
     fig.add_trace(go.Scatter(
-        x=results['technical_analysis']['rsi'].index,
-        y=results['technical_analysis']['rsi'],
+        x=rsi.index,
+        y=rsi,
         name='RSI',
         line=dict(color='green', width=2)
     ))
@@ -136,22 +229,24 @@ def create_technical_indicators_chart(results):
     )
     return fig
 
-def create_sentiment_chart(results):
+def create_sentiment_chart(results, view=None):
     """Create sentiment analysis chart"""
     fig = go.Figure()
+    returns = downsample(results['sentiment_analysis']['returns'], view, method='minmax')
+    volatility = downsample(results['sentiment_analysis']['volatility'], view)
     
     # Add returns
     fig.add_trace(go.Scatter(
-        x=results['sentiment_analysis']['returns'].index,
-        y=results['sentiment_analysis']['returns'],
+        x=returns.index,
+        y=returns,
         name='Returns',
         line=dict(color='purple', width=2)
     ))
     
     # Add volatility
     fig.add_trace(go.Scatter(
-        x=results['sentiment_analysis']['volatility'].index,
-        y=results['sentiment_analysis']['volatility'],
+        x=volatility.index,
+        y=volatility,
         name='Volatility',
         line=dict(color='orange', width=2)
     ))
@@ -164,27 +259,79 @@ def create_sentiment_chart(results):
     )
     return fig
 
-def create_correlation_heatmap(results):
-    """Create correlation heatmap"""
-    corr_matrix = results['correlation_analysis']['correlation_matrix']
+def create_correlation_heatmap(results, view=None):
+    """Create correlation heatmap, for one rolling window when the view picks a date"""
+    view = view or {}
+    correlation = results['correlation_analysis']
+    as_of = view.get('as_of')
+    if as_of is not None and 'rolling_correlation' in correlation:
+        # Matrices are stored one per date; only the picked one is read
+        rolling = correlation['rolling_correlation']
+        index = results['price_trend']['moving_averages']['sma_20'].index
+        position = index.get_indexer([pd.Timestamp(as_of)])[0]
+        labels = rolling['features'].split(',')
+        z = np.asarray(rolling['matrices'][position], dtype=float)
+        x = y = labels
+        title = f"Rolling Correlation (window ending {pd.Timestamp(as_of):%Y-%m-%d})"
+    else:
+        corr_matrix = correlation['correlation_matrix']
+        z, x, y = corr_matrix.values, corr_matrix.columns, corr_matrix.index
+        title = 'Correlation Matrix'
     
     fig = go.Figure(data=go.Heatmap(
-        z=corr_matrix.values,
-        x=corr_matrix.columns,
-        y=corr_matrix.index,
+        z=z,
+        x=x,
+        y=y,
         colorscale='RdBu',
         zmin=-1,
         zmax=1
     ))
     
     fig.update_layout(
-        title='Correlation Matrix',
+        title=title,
         xaxis_title='Features',
         yaxis_title='Features',
         template='plotly_dark'
     )
     return fig
 
+def select_correlation_date(results, view):
+    """Slider scrubbing the rolling correlation through the visible date range"""
+    index = results['price_trend']['moving_averages']['sma_20'].index
+    visible = index[(index >= pd.Timestamp(view['start'])) & (index <= pd.Timestamp(view['end']))]
+    if len(visible) == 0:
+        return None
+    if len(visible) == 1:
+        return visible[0].to_pydatetime()
+    # Only the bounds and the step go to the browser, not one option per bar;
+    # the picked time snaps back to the last bar at or before it
+    step = pd.Timedelta(np.median(np.diff(visible.values))).to_pytimedelta()
+    picked = st.slider(
+        "Window ending",
+        min_value=visible[0].to_pydatetime(),
+        max_value=visible[-1].to_pydatetime(),
+        value=visible[-1].to_pydatetime(),
+        step=step,
+        format="YYYY-MM-DD" if step >= pd.Timedelta(days=1) else "YYYY-MM-DD HH:mm"
+    )
+    position = max(visible.searchsorted(pd.Timestamp(picked), side='right') - 1, 0)
+    return visible[position].to_pydatetime()
+
+# Dashboard tabs and the chart builders rendering them
+CHARTS = {
+    "Price Trend": create_price_trend_chart,
+    "Volume": create_volume_chart,
+    "Technical": create_technical_indicators_chart,
+    "Sentiment": create_sentiment_chart,
+    "Correlation": create_correlation_heatmap
+}
+
+@st.cache_resource(max_entries=64, show_spinner="Building chart...")
+def build_chart(tab, version, start, end, max_points, _results, as_of=None):
+    """Build a tab's figure once per results version and view, shared across sessions"""
+    view = {'start': start, 'end': end, 'max_points': max_points, 'as_of': as_of}
+    return CHARTS[tab](_results, view)
+
 def main():
     st.set_page_config(
         page_title="Tesla Stock Analysis Dashboard",
@@ -200,27 +347,22 @@ def main():
     """)
     
     # Load analysis results
-    results = load_analysis_results()
+    results, version = load_analysis_results()
     if results is None:
         return
     
-    # Create tabs for different analysis types
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Price Trend", "Volume", "Technical", "Sentiment", "Correlation"])
-    
-    with tab1:
-        st.plotly_chart(create_price_trend_chart(results), use_container_width=True)
-    
-    with tab2:
-        st.plotly_chart(create_volume_chart(results), use_container_width=True)
-    
-    with tab3:
-        st.plotly_chart(create_technical_indicators_chart(results), use_container_width=True)
-    
-    with tab4:
-        st.plotly_chart(create_sentiment_chart(results), use_container_width=True)
+    # Charts draw about one point per pixel of the selected date range;
+    # narrowing the range re-samples it at finer resolution
+    view = select_view(results)
     
-    with tab5:
-        st.plotly_chart(create_correlation_heatmap(results), use_container_width=True)
+    # Only the selected tab's figure is built and sent to the browser
+    tab = st.radio("View", list(CHARTS), horizontal=True, label_visibility="collapsed")
+    as_of = None
+    if (tab == "Correlation" and 'rolling_correlation' in results['correlation_analysis']
+            and st.checkbox("Rolling window")):
+        as_of = select_correlation_date(results, view)
+    fig = build_chart(tab, version, view['start'], view['end'], view['max_points'], results, as_of)
+    st.plotly_chart(fig, use_container_width=True)
 
 if __name__ == "__main__":
     main()
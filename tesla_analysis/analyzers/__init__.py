@@ -10,18 +10,31 @@ This package contains various analysis modules for Tesla stock data:
 - CorrelationAnalyzer: Correlation analysis
 """
 
-from .price_analyzer import PriceAnalyzer
-from .volume_analyzer import VolumeAnalyzer
-from .technical_analyzer import TechnicalAnalyzer
-from .sentiment_analyzer import SentimentAnalyzer
-from .seasonal_analyzer import SeasonalAnalyzer
-from .correlation_analyzer import CorrelationAnalyzer
-
-__all__ = [
-    'PriceAnalyzer',
-    'VolumeAnalyzer',
-    'TechnicalAnalyzer',
-    'SentimentAnalyzer',
-    'SeasonalAnalyzer',
-    'CorrelationAnalyzer'
-]
+import importlib
+
+# Analyzer classes and the modules defining them. Modules are imported on
+# first access, so importing the package does not load every analyzer's
+# dependencies.
+_ANALYZER_MODULES = {
+    'PriceAnalyzer': 'price_analyzer',
+    'VolumeAnalyzer': 'volume_analyzer',
+    'TechnicalAnalyzer': 'technical_analyzer',
+    'SentimentAnalyzer': 'sentiment_analyzer',
+    'SeasonalAnalyzer': 'seasonal_analyzer',
+    'CorrelationAnalyzer': 'correlation_analyzer'
+}
+
+__all__ = list(_ANALYZER_MODULES)
+
+
+def __getattr__(name):
+    """Import an analyzer class the first time it is accessed"""
+    if name not in _ANALYZER_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_ANALYZER_MODULES[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
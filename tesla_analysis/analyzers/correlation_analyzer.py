@@ -1,21 +1,90 @@
+import threading
+
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from typing import Dict, Any
+from typing import Any, Dict, Iterator, Optional, Tuple
+from ..covariance import CovarianceAccumulator, rolling_correlation
+from ..indicators import ema, rsi
+from ..rolling import RollingStatistics
 
 class CorrelationAnalyzer:
     """Class for performing correlation analysis"""
     
-    def __init__(self, data: pd.DataFrame):
+    # Parameters that determine the results (part of the result cache key)
+    PARAMETERS = {
+        'columns': ['Open', 'High', 'Low', 'Close', 'Volume'],
+        'indicator_window': 20,
+        'rsi_window': 14,
+        'n_components': 2,
+        'rolling_window': 60,
+        'rolling_features': ['returns', 'volume_change', 'volatility_20']
+    }
+    
+    # Results mapped to the methods computing them
+    OUTPUTS = {
+        'correlation_matrix': 'calculate_correlation_matrix',
+        'pca_components': 'perform_pca',
+        'rolling_correlation': 'calculate_rolling_correlation'
+    }
+    
+    # Shared inputs computed before the analyzer runs
+    DEPENDENCIES = ['returns', 'volume_change', 'close_rolling', 'volume_rolling', 'returns_rolling']
+    
+    # Rows folded into the running statistics at a time; bounds the stacked
+    # copy of the feature matrix, while the feature columns stay in memory
+    CHUNK_ROWS = 65_536
+    
+    def __init__(self, data: pd.DataFrame, rolling: Optional[RollingStatistics] = None):
         """
         Initialize the correlation analyzer
         
         Args:
             data: DataFrame containing stock data
+            rolling: Shared rolling statistics engine (created if not given)
         """
         self.data = data
+        self.rolling = rolling if rolling is not None else RollingStatistics(data)
+        self.features = self.rolling.features
+        window = self.PARAMETERS['indicator_window']
+        self.rolling.add_series('returns', lambda: self.features.pct_change('Close'))
+        self.rolling.request('Close', [window], ['mean'])
+        self.rolling.request('Volume', [window], ['mean'])
+        self.rolling.request('returns', [window], ['std'])
+        self._features = None
+        self._features_lock = threading.Lock()
+    
+    def feature_columns(self) -> Dict[str, pd.Series]:
+        """
+        Collect the price columns and the derived indicators to correlate
+        
+        The indicators are computed on first use and shared by every output
+        of the analyzer; callers must treat the series as read-only.
         
+        Returns:
+            Dictionary of feature series keyed by name
+        """
+        with self._features_lock:
+            if self._features is None:
+                self._features = self._compute_features()
+            return self._features
+    
+    def _compute_features(self) -> Dict[str, pd.Series]:
+        """Private method to compute the feature series"""
+        window = self.PARAMETERS['indicator_window']
+        rsi_window = self.PARAMETERS['rsi_window']
+        close = self.data['Close'].to_numpy(dtype=float)
+        features = {column: self.data[column] for column in self.PARAMETERS['columns']}
+        features.update({
+            'returns': self.features.pct_change('Close'),
+            'volume_change': self.features.pct_change('Volume'),
+            f'sma_{window}': self.rolling.mean('Close', window),
+            f'ema_{window}': pd.Series(ema(close, [window])[0], index=self.data.index),
+            f'rsi_{rsi_window}': pd.Series(rsi(close, [rsi_window])[0], index=self.data.index),
+            f'volatility_{window}': self.rolling.std('returns', window),
+            f'volume_ma_{window}': self.rolling.mean('Volume', window)
+        })
+        return features
+    
     def calculate_correlation_matrix(self) -> pd.DataFrame:
         """
         Calculate correlation matrix between key indicators
@@ -23,17 +92,66 @@ class CorrelationAnalyzer:
         Returns:
             DataFrame containing correlation matrix
         """
-        return self.data[['Close', 'Volume']].corr()
+        features = self.feature_columns()
+        accumulator = CovarianceAccumulator(list(features))
+        for _, chunk in self._feature_chunks(features):
+            accumulator.update(chunk)
+        return accumulator.correlation()
     
-    def perform_pca(self) -> np.ndarray:
+    def perform_pca(self) -> Dict[str, pd.Series]:
         """
         Perform Principal Component Analysis
         
+        Only rows where every feature is available are projected (the
+        warm-up rows of the indicators are skipped).
+        
         Returns:
-            Array containing principal components
+            Dictionary mapping 'pc_1', 'pc_2', ... to the projection on each
+            principal component, indexed by the dates of the projected rows
+        """
+        features = self.feature_columns()
+        accumulator = CovarianceAccumulator(list(features))
+        for _, chunk in self._feature_chunks(features, complete_rows=True):
+            accumulator.update(chunk)
+        n_components = self.PARAMETERS['n_components']
+        components = accumulator.principal_components(n_components)
+        positions, projected = [np.empty(0, dtype=np.int64)], [np.empty((0, n_components))]
+        for rows, chunk in self._feature_chunks(features, complete_rows=True):
+            positions.append(rows)
+            projected.append(components.transform(chunk))
+        index = self.data.index[np.concatenate(positions)]
+        projected = np.concatenate(projected)
+        return {
+            f'pc_{i + 1}': pd.Series(projected[:, i], index=index, name=f'pc_{i + 1}')
+            for i in range(projected.shape[1])
+        }
+    
+    def calculate_rolling_correlation(self) -> Dict[str, Any]:
         """
-        features = self.data[['Close', 'Volume']].dropna()
-        scaler = StandardScaler()
-        scaled_features = scaler.fit_transform(features)
-        pca = PCA(n_components=2)
-        return pca.fit_transform(scaled_features)
+        Calculate correlation matrices over a sliding window
+        
+        Returns:
+            Dictionary with 'matrices', a float32 array of shape
+            (time, feature, feature) whose row t covers the window ending at
+            row t, and 'features', the comma-separated feature names
+        """
+        features = self.feature_columns()
+        names = self.PARAMETERS['rolling_features']
+        values = np.column_stack([features[name].to_numpy(dtype=float) for name in names])
+        return {
+            'matrices': rolling_correlation(values, self.PARAMETERS['rolling_window']),
+            'features': ','.join(names)
+        }
+    
+    def _feature_chunks(self, features: Dict[str, pd.Series],
+                        complete_rows: bool = False) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Private method to stack the in-memory feature columns in row chunks with their row positions"""
+        columns = [series.to_numpy(dtype=float) for series in features.values()]
+        for start in range(0, len(self.data), self.CHUNK_ROWS):
+            chunk = np.column_stack([values[start:start + self.CHUNK_ROWS] for values in columns])
+            rows = np.arange(start, start + len(chunk))
+            if complete_rows:
+                complete = np.isfinite(chunk).all(axis=1)
+                chunk, rows = chunk[complete], rows[complete]
+            if len(chunk):
+                yield rows, chunk
@@ -1,36 +1,75 @@
 import pandas as pd
-from ta.trend import SMAIndicator, EMAIndicator
-from typing import Dict
+from functools import partial
+from typing import Mapping, Optional
+from ..rolling import RollingStatistics
+from ..indicators import ema
+from ..lazy_results import LazyResults
 
 class PriceAnalyzer:
     """Class for performing price trend analysis"""
     
-    def __init__(self, data: pd.DataFrame):
+    # Parameters that determine the results (part of the result cache key)
+    PARAMETERS = {'sma_windows': [20, 50], 'ema_windows': [20, 50]}
+    
+    # Results mapped to the methods computing them
+    OUTPUTS = {'moving_averages': 'calculate_moving_averages', 'price_change': 'calculate_price_change'}
+    
+    # Shared inputs computed before the analyzer runs
+    DEPENDENCIES = ['returns', 'close_rolling']
+    
+    def __init__(self, data: pd.DataFrame, rolling: Optional[RollingStatistics] = None):
         """
         Initialize the price analyzer
         
         Args:
             data: DataFrame containing stock data
+            rolling: Shared rolling statistics engine (created if not given)
         """
         self.data = data
+        self.rolling = rolling if rolling is not None else RollingStatistics(data)
+        self.features = self.rolling.features
+        self.rolling.request('Close', self.PARAMETERS['sma_windows'], ['mean'])
         
-    def calculate_moving_averages(self) -> Dict[str, pd.Series]:
+    def calculate_moving_averages(self) -> Mapping[str, pd.Series]:
         """
         Calculate simple and exponential moving averages
         
         Returns:
-            Dictionary containing SMA and EMA series
-        """
-        sma_20 = SMAIndicator(close=self.data['Close'], window=20).sma_indicator()
-        sma_50 = SMAIndicator(close=self.data['Close'], window=50).sma_indicator()
-        ema_20 = EMAIndicator(close=self.data['Close'], window=20).ema_indicator()
-        ema_50 = EMAIndicator(close=self.data['Close'], window=50).ema_indicator()
-        return {
-            'sma_20': sma_20,
-            'sma_50': sma_50,
-            'ema_20': ema_20,
-            'ema_50': ema_50
-        }
+            Mapping containing SMA and EMA series, each computed on first access
+        """
+        averages = {}
+        for window in self.PARAMETERS['sma_windows']:
+            averages[f'sma_{window}'] = partial(self.calculate_sma, window)
+        for window in self.PARAMETERS['ema_windows']:
+            averages[f'ema_{window}'] = partial(self.calculate_ema, window)
+        return LazyResults(averages)
+    
+    def calculate_sma(self, window: int) -> pd.Series:
+        """
+        Calculate a simple moving average of the close price
+        
+        Args:
+            window: Window length in rows
+        
+        Returns:
+            Series containing the SMA
+        """
+        sma = self.rolling.mean('Close', window)
+        sma.name = f'sma_{window}'
+        return sma
+    
+    def calculate_ema(self, window: int) -> pd.Series:
+        """
+        Calculate an exponential moving average of the close price
+        
+        Args:
+            window: Span of the average in rows
+        
+        Returns:
+            Series containing the EMA
+        """
+        values = ema(self.data['Close'].to_numpy(dtype=float), [window])[0]
+        return pd.Series(values, index=self.data.index, name=f'ema_{window}')
     
     def calculate_price_change(self) -> pd.Series:
         """
@@ -39,4 +78,4 @@ class PriceAnalyzer:
         Returns:
             Series containing daily price changes
         """
-        return self.data['Close'].pct_change()
+        return self.features.pct_change('Close')
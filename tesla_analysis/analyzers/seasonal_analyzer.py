@@ -1,18 +1,43 @@
+import numpy as np
 import pandas as pd
-from statsmodels.tsa.seasonal import seasonal_decompose
-from typing import Dict
+from typing import Dict, List, Optional
+
+from ..decomposition import SeasonalDecomposer
+from ..resampling import infer_timeframe, scale_period
 
 class SeasonalAnalyzer:
     """Class for performing seasonal pattern analysis"""
     
-    def __init__(self, data: pd.DataFrame):
+    # Parameters that determine the results (part of the result cache key)
+    # 'classical' decomposes with a single period; 'multi_period' fits one
+    # seasonal component per entry of 'periods'. Periods are in trading days
+    # and converted to bars of the data's timeframe (252 days = 50 weekly bars)
+    PARAMETERS = {'model': 'additive', 'period': 252, 'method': 'classical', 'periods': [5, 21, 252]}
+    
+    # Decomposition methods; only 'multi_period' fits can be extended with new rows
+    METHODS = ('classical', 'multi_period')
+    
+    # Results mapped to the methods computing them; a single method name
+    # computes the whole result group
+    OUTPUTS = 'decompose_time_series'
+    
+    # Shared inputs computed before the analyzer runs
+    DEPENDENCIES = []
+    
+    def __init__(self, data: pd.DataFrame, method: Optional[str] = None):
         """
         Initialize the seasonal analyzer
         
         Args:
             data: DataFrame containing stock data
+            method: Decomposition method, one of ``METHODS`` (defaults to
+                ``PARAMETERS['method']``)
         """
+        self.method = method or self.PARAMETERS['method']
+        if self.method not in self.METHODS:
+            raise ValueError(f"Unknown decomposition method: {self.method}. Expected one of {list(self.METHODS)}")
         self.data = data
+        self.timeframe = infer_timeframe(data.index)
         
     def decompose_time_series(self) -> Dict[str, pd.Series]:
         """
@@ -21,13 +46,97 @@ class SeasonalAnalyzer:
         Returns:
             Dictionary containing decomposed components
         """
+        if self.method == 'multi_period':
+            return self.decompose_multi_period()
+        
+        # Imported on first use: statsmodels pulls in scipy.signal, which
+        # dominates the package's import time
+        from statsmodels.tsa.seasonal import seasonal_decompose
+        
         decomposition = seasonal_decompose(
             self.data['Close'], 
-            model='additive', 
-            period=252
+            model=self.PARAMETERS['model'], 
+            period=self.bar_periods([self.PARAMETERS['period']])[0]
         )
         return {
             'trend': decomposition.trend,
             'seasonal': decomposition.seasonal,
             'residual': decomposition.resid
         }
+    
+    def decompose_multi_period(self) -> Dict[str, pd.Series]:
+        """
+        Decompose the close price into a trend and one seasonal component per period
+        
+        Returns:
+            Dictionary containing the trend, the combined seasonal component,
+            the residual and a 'seasonal_<period>' component per period
+        """
+        decomposer = self.decomposer()
+        components = decomposer.fit(self.data['Close'].to_numpy(dtype=float))
+        return self._component_series(decomposer, components)
+    
+    def decomposer(self) -> SeasonalDecomposer:
+        """
+        Create the unfitted decomposer used by the multi-period method
+        
+        Returns:
+            Decomposer with the periods converted to bars of the data
+        """
+        return SeasonalDecomposer(
+            periods=self.bar_periods(self.PARAMETERS['periods']),
+            model=self.PARAMETERS['model']
+        )
+    
+    def extend_multi_period(self, decomposer: SeasonalDecomposer, trend: np.ndarray) -> Dict[str, pd.Series]:
+        """
+        Extend a multi-period decomposition with the rows after the fitted ones
+        
+        The new rows are folded into the decomposer's statistics instead of
+        refitting the history. Settled trend values are kept; the seasonal
+        components of every row are read from the refitted profiles.
+        
+        Args:
+            decomposer: Decomposer fitted on the leading rows of the data,
+                updated in place
+            trend: Trend of the rows the decomposer was fitted on
+        
+        Returns:
+            Dictionary of the components over all rows, as
+            ``decompose_multi_period`` returns them
+        """
+        close = self.data['Close'].to_numpy(dtype=float)
+        start, latest = decomposer.update(close[decomposer.rows:])
+        components = decomposer.seasonal_components()
+        components = {name: values[:, 0] for name, values in components.items()}
+        components['trend'] = np.concatenate([trend[:start], latest['trend']])
+        if decomposer.model == 'multiplicative':
+            components['residual'] = close / (components['trend'] * components['seasonal'])
+        else:
+            components['residual'] = close - components['trend'] - components['seasonal']
+        return self._component_series(decomposer, components)
+    
+    def _component_series(self, decomposer: SeasonalDecomposer,
+                          components: Dict[str, np.ndarray]) -> Dict[str, pd.Series]:
+        """Private method to index the components by the dates of the data"""
+        return {
+            name: pd.Series(components[name], index=self.data.index, name=name)
+            for name in decomposer.component_names
+        }
+    
+    def bar_periods(self, days: List[int]) -> List[int]:
+        """
+        Convert periods in trading days to bars of the data's timeframe
+        
+        Args:
+            days: Period lengths in trading days
+        
+        Returns:
+            Distinct period lengths in bars, dropping periods shorter than
+            two bars (such as a weekly cycle in weekly bars)
+        """
+        periods = sorted(set(scale_period(period, self.timeframe) for period in days))
+        periods = [period for period in periods if period >= 2]
+        if not periods:
+            raise ValueError(f"No seasonal period of {days} trading days spans two {self.timeframe} bars")
+        return periods
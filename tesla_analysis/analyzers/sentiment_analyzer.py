@@ -1,17 +1,36 @@
 import pandas as pd
-from typing import Dict
+from typing import Dict, Optional
+from ..rolling import RollingStatistics
 
 class SentimentAnalyzer:
     """Class for performing market sentiment analysis"""
     
-    def __init__(self, data: pd.DataFrame):
+    # Parameters that determine the results (part of the result cache key)
+    PARAMETERS = {'volatility_window': 20}
+    
+    # Results mapped to the methods computing them
+    OUTPUTS = {
+        'returns': 'calculate_returns',
+        'volatility': 'calculate_volatility',
+        'volume_sentiment': 'analyze_volume_sentiment'
+    }
+    
+    # Shared inputs computed before the analyzer runs
+    DEPENDENCIES = ['returns', 'returns_rolling']
+    
+    def __init__(self, data: pd.DataFrame, rolling: Optional[RollingStatistics] = None):
         """
         Initialize the sentiment analyzer
         
         Args:
             data: DataFrame containing stock data
+            rolling: Shared rolling statistics engine (created if not given)
         """
         self.data = data
+        self.rolling = rolling if rolling is not None else RollingStatistics(data)
+        self.features = self.rolling.features
+        self.rolling.add_series('returns', lambda: self.features.pct_change('Close'))
+        self.rolling.request('returns', [self.PARAMETERS['volatility_window']], ['std'])
         
     def calculate_returns(self) -> pd.Series:
         """
@@ -20,7 +39,7 @@ class SentimentAnalyzer:
         Returns:
             Series containing daily returns
         """
-        return self.data['Close'].pct_change()
+        return self.features.pct_change('Close')
     
     def calculate_volatility(self) -> pd.Series:
         """
@@ -29,8 +48,7 @@ class SentimentAnalyzer:
         Returns:
             Series containing rolling volatility
         """
-        returns = self.data['Close'].pct_change()
-        return returns.rolling(window=20).std()
+        return self.rolling.std('returns', self.PARAMETERS['volatility_window'])
     
     def analyze_volume_sentiment(self) -> Dict[str, pd.Series]:
         """
@@ -39,8 +57,9 @@ class SentimentAnalyzer:
         Returns:
             Dictionary containing positive and negative volume series
         """
-        positive_volume = self.data[self.data['Close'].pct_change() > 0]['Volume']
-        negative_volume = self.data[self.data['Close'].pct_change() < 0]['Volume']
+        returns = self.features.pct_change('Close')
+        positive_volume = self.data['Volume'][returns > 0]
+        negative_volume = self.data['Volume'][returns < 0]
         return {
             'positive_volume': positive_volume,
             'negative_volume': negative_volume
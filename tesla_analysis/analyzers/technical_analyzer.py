@@ -1,18 +1,31 @@
 import pandas as pd
-from ta.momentum import RSIIndicator
-from typing import Dict
+from typing import Dict, Optional
+from ..rolling import RollingStatistics
+from ..indicators import rsi
 
 class TechnicalAnalyzer:
     """Class for performing technical analysis"""
     
-    def __init__(self, data: pd.DataFrame):
+    # Parameters that determine the results (part of the result cache key)
+    PARAMETERS = {'rsi_window': 14, 'bollinger_window': 20, 'bollinger_std': 2}
+    
+    # Results mapped to the methods computing them
+    OUTPUTS = {'rsi': 'calculate_rsi', 'bollinger_bands': 'calculate_bollinger_bands'}
+    
+    # Shared inputs computed before the analyzer runs
+    DEPENDENCIES = ['close_rolling']
+    
+    def __init__(self, data: pd.DataFrame, rolling: Optional[RollingStatistics] = None):
         """
         Initialize the technical analyzer
         
         Args:
             data: DataFrame containing stock data
+            rolling: Shared rolling statistics engine (created if not given)
         """
         self.data = data
+        self.rolling = rolling if rolling is not None else RollingStatistics(data)
+        self.rolling.request('Close', [self.PARAMETERS['bollinger_window']], ['mean', 'std'])
         
     def calculate_rsi(self) -> pd.Series:
         """
@@ -21,7 +34,8 @@ class TechnicalAnalyzer:
         Returns:
             Series containing RSI values
         """
-        return RSIIndicator(close=self.data['Close'], window=14).rsi()
+        values = rsi(self.data['Close'].to_numpy(dtype=float), [self.PARAMETERS['rsi_window']])[0]
+        return pd.Series(values, index=self.data.index, name='rsi')
     
     def calculate_bollinger_bands(self) -> Dict[str, pd.Series]:
         """
@@ -30,9 +44,12 @@ class TechnicalAnalyzer:
         Returns:
             Dictionary containing Bollinger Bands
         """
-        rolling_std = self.data['Close'].rolling(window=20).std()
-        upper_band = self.data['Close'].rolling(window=20).mean() + (rolling_std * 2)
-        lower_band = self.data['Close'].rolling(window=20).mean() - (rolling_std * 2)
+        window = self.PARAMETERS['bollinger_window']
+        num_std = self.PARAMETERS['bollinger_std']
+        rolling_mean = self.rolling.mean('Close', window)
+        rolling_std = self.rolling.std('Close', window)
+        upper_band = rolling_mean + (rolling_std * num_std)
+        lower_band = rolling_mean - (rolling_std * num_std)
         return {
             'upper': upper_band,
             'lower': lower_band
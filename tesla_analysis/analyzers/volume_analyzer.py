@@ -1,31 +1,45 @@
 import pandas as pd
-from typing import Dict
+from functools import partial
+from typing import Mapping, Optional
+from ..rolling import RollingStatistics
+from ..lazy_results import LazyResults
 
 class VolumeAnalyzer:
     """Class for performing volume analysis"""
     
-    def __init__(self, data: pd.DataFrame):
+    # Parameters that determine the results (part of the result cache key)
+    PARAMETERS = {'windows': [20, 50]}
+    
+    # Results mapped to the methods computing them
+    OUTPUTS = {'volume_averages': 'calculate_volume_averages', 'volume_change': 'calculate_volume_change'}
+    
+    # Shared inputs computed before the analyzer runs
+    DEPENDENCIES = ['volume_change', 'volume_rolling']
+    
+    def __init__(self, data: pd.DataFrame, rolling: Optional[RollingStatistics] = None):
         """
         Initialize the volume analyzer
         
         Args:
             data: DataFrame containing stock data
+            rolling: Shared rolling statistics engine (created if not given)
         """
         self.data = data
+        self.rolling = rolling if rolling is not None else RollingStatistics(data)
+        self.features = self.rolling.features
+        self.rolling.request('Volume', self.PARAMETERS['windows'], ['mean'])
         
-    def calculate_volume_averages(self) -> Dict[str, pd.Series]:
+    def calculate_volume_averages(self) -> Mapping[str, pd.Series]:
         """
         Calculate volume moving averages.
         
         Returns:
-            Dictionary containing volume moving averages.
+            Mapping containing volume moving averages, each computed on first access.
         """
-        volume_ma_20 = self.data['Volume'].rolling(window=20).mean()
-        volume_ma_50 = self.data['Volume'].rolling(window=50).mean()
-        return {
-            'volume_ma_20': volume_ma_20,
-            'volume_ma_50': volume_ma_50
-        }
+        return LazyResults({
+            f'volume_ma_{window}': partial(self.rolling.mean, 'Volume', window)
+            for window in self.PARAMETERS['windows']
+        })
     
     def calculate_volume_change(self) -> pd.Series:
         """
@@ -34,4 +48,4 @@ class VolumeAnalyzer:
         Returns:
             Series containing daily volume changes
         """
-        return self.data['Volume'].pct_change()
+        return self.features.pct_change('Volume')
@@ -0,0 +1,450 @@
+import argparse
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from . import indicators
+from .batch import BatchAnalysis
+from .data_loader import StockDataLoader
+from .rolling import rolling_window_stats
+from .resampling import TRADING_DAYS_PER_BAR, infer_timeframe
+
+# Working memory a sweep may use for the position and return arrays of one chunk
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Temporary float64 arrays per configuration, row and ticker while evaluating a chunk
+CHUNK_TEMPORARIES = 5
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Parameter grids swept by default (the analyzers' settings are included)
+DEFAULT_GRIDS = {
+    'crossover': {'fast_windows': range(5, 55, 5), 'slow_windows': range(20, 210, 10)},
+    'rsi': {'windows': [7, 14, 21, 28], 'lower': range(10, 45, 5), 'upper': range(55, 95, 5)},
+    'bollinger': {'windows': range(10, 60, 5), 'num_stds': [1.0, 1.5, 2.0, 2.5, 3.0]}
+}
+
+METRICS = ['total_return', 'annual_return', 'sharpe', 'max_drawdown', 'trades', 'exposure']
+
+
+class Backtester:
+    """
+    Vectorized backtests of indicator strategies over parameter grids
+
+    Prices are held as one (time x ticker) array like ``IndicatorPanel``.
+    Each sweep computes its indicators once per distinct window with the
+    multi-window kernels, turns every parameter combination into positions
+    and evaluates them all together: positions, returns, equity curves and
+    drawdowns are (configuration, time, ticker) arrays, processed in chunks
+    of configurations sized to ``max_bytes`` and optionally spread over a
+    thread pool.
+
+    A position decided from the close of one bar earns the return of the
+    next bar, so signals never see the bar they trade on. Changing the
+    position costs ``cost`` (a fraction of the traded notional) on the bar
+    it is decided. Rows where a ticker has no price earn nothing.
+    """
+
+    def __init__(self, prices: Union[pd.DataFrame, np.ndarray], cost: float = 0.0,
+                 allow_short: bool = False, periods_per_year: Optional[float] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES, max_workers: Optional[int] = None):
+        """
+        Initialize the backtester
+
+        Args:
+            prices: Close prices indexed by date with one column per ticker,
+                or a (time x ticker) array; missing values are NaN
+            cost: Cost per unit of position change, as a fraction of notional
+            allow_short: Take short positions on sell signals instead of
+                going flat
+            periods_per_year: Bars per year used to annualize returns and
+                Sharpe ratios (inferred from a date index, 252 otherwise)
+            max_bytes: Working memory budget of one chunk of configurations
+            max_workers: Threads evaluating chunks concurrently (None or 1
+                evaluates them one by one)
+        """
+        if isinstance(prices, pd.Series):
+            prices = prices.to_frame()
+        if isinstance(prices, pd.DataFrame):
+            self.index = prices.index
+            self.columns = prices.columns
+            values = prices.to_numpy(dtype=np.float64)
+        else:
+            values = np.asarray(prices, dtype=np.float64)
+            if values.ndim == 1:
+                values = values[:, None]
+            if values.ndim != 2:
+                raise ValueError(f"Prices must be 2-D (time x ticker), got shape {values.shape}")
+            self.index = pd.RangeIndex(values.shape[0])
+            self.columns = pd.RangeIndex(values.shape[1])
+        if periods_per_year is None:
+            periods_per_year = TRADING_DAYS_PER_YEAR
+            if isinstance(self.index, pd.DatetimeIndex) and len(self.index) > 1:
+                periods_per_year /= TRADING_DAYS_PER_BAR[infer_timeframe(self.index)]
+        self.values = values
+        self.cost = cost
+        self.allow_short = allow_short
+        self.periods_per_year = periods_per_year
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.returns = np.full(values.shape, np.nan)
+        np.divide(values[1:], values[:-1], out=self.returns[1:])
+        self.returns -= 1
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], column: str = 'Close', **kwargs) -> 'Backtester':
+        """
+        Build a backtester from per-ticker data
+
+        Args:
+            frames: Preprocessed stock data keyed by ticker
+            column: Data column to trade on
+            **kwargs: Passed on to the constructor
+
+        Returns:
+            Backtester over the union of the dates, NaN where a ticker has no row
+        """
+        prices = pd.DataFrame({ticker: data[column] for ticker, data in frames.items()}).sort_index()
+        return cls(prices, **kwargs)
+
+    def moving_average_crossover(self, fast_windows: Iterable[int], slow_windows: Iterable[int],
+                                 kind: str = 'sma') -> pd.DataFrame:
+        """
+        Sweep moving average crossovers: long while the fast average is above the slow one
+
+        Args:
+            fast_windows: Fast average windows
+            slow_windows: Slow average windows; only pairs with fast < slow are run
+            kind: 'sma' or 'ema'
+
+        Returns:
+            One row per (fast, slow, ticker) with the ``METRICS`` columns
+        """
+        if kind not in ('sma', 'ema'):
+            raise ValueError(f"Unknown moving average kind: {kind}")
+        pairs = [(fast, slow) for fast in sorted(set(fast_windows)) for slow in sorted(set(slow_windows))
+                 if fast < slow]
+        windows = sorted({window for pair in pairs for window in pair})
+        if kind == 'sma':
+            averages = indicators.sma(self.values, windows)
+        else:
+            averages = indicators.ema(self.values, windows)
+        position = {window: i for i, window in enumerate(windows)}
+        fast = np.array([position[fast] for fast, _ in pairs], dtype=np.intp)
+        slow = np.array([position[slow] for _, slow in pairs], dtype=np.intp)
+
+        def positions(chunk: slice) -> np.ndarray:
+            spread = averages[fast[chunk]] - averages[slow[chunk]]
+            signal = (spread > 0).astype(np.float64)
+            if self.allow_short:
+                signal -= spread < 0
+            return signal
+
+        return self._sweep(pd.DataFrame(pairs, columns=['fast', 'slow']), positions)
+
+    def rsi_threshold(self, windows: Iterable[int], lower: Iterable[float],
+                      upper: Iterable[float]) -> pd.DataFrame:
+        """
+        Sweep RSI mean reversion: buy when RSI falls below ``lower``, exit above ``upper``
+
+        With short selling, crossing above ``upper`` opens a short that is
+        held until RSI falls below ``lower`` again. The position follows
+        whichever threshold was crossed last, so the bars of the last
+        crossing are found once per (window, threshold) and every
+        (window, lower, upper) combination is a comparison of the two.
+
+        Args:
+            windows: RSI windows
+            lower: Oversold thresholds
+            upper: Overbought thresholds; only combinations with lower < upper are run
+
+        Returns:
+            One row per (window, lower, upper, ticker) with the ``METRICS`` columns
+        """
+        configs = [(window, low, high) for window in sorted(set(windows))
+                   for low in sorted(set(lower)) for high in sorted(set(upper)) if low < high]
+        rsi_windows = sorted({window for window, _, _ in configs})
+        values = indicators.rsi(self.values, rsi_windows)
+        table = pd.DataFrame(configs, columns=['window', 'lower', 'upper'])
+        index = table['window'].map({window: i for i, window in enumerate(rsi_windows)}).to_numpy()
+        thresholds = table[['lower', 'upper']].to_numpy(dtype=np.float64)
+
+        def positions(chunk: slice) -> np.ndarray:
+            bought = last_crossing(values, index[chunk], thresholds[chunk, 0], below=True)
+            sold = last_crossing(values, index[chunk], thresholds[chunk, 1], below=False)
+            signal = (bought > sold).astype(np.float64)
+            if self.allow_short:
+                signal -= sold > bought
+            return signal
+
+        return self._sweep(table, positions)
+
+    def bollinger_reversion(self, windows: Iterable[int], num_stds: Iterable[float]) -> pd.DataFrame:
+        """
+        Sweep Bollinger Band mean reversion
+
+        Buys when the close falls below the lower band and exits when it
+        crosses the middle band (the moving average). With short selling,
+        closes above the upper band open a short, also exited at the middle.
+        A band touch on the bar the middle is crossed still opens a position.
+
+        Args:
+            windows: Band windows
+            num_stds: Band widths in standard deviations
+
+        Returns:
+            One row per (window, num_std, ticker) with the ``METRICS`` columns
+        """
+        configs = list(itertools.product(sorted(set(windows)), sorted(set(num_stds))))
+        band_windows = sorted({window for window, _ in configs})
+        stats = rolling_window_stats(self.values, {'mean': band_windows, 'std': band_windows})
+        mean = np.stack([stats[('mean', window)] for window in band_windows])
+        std = np.stack([stats[('std', window)] for window in band_windows])
+        del stats
+        table = pd.DataFrame(configs, columns=['window', 'num_std'])
+        index = table['window'].map({window: i for i, window in enumerate(band_windows)}).to_numpy()
+        width = table['num_std'].to_numpy(dtype=np.float64)
+        # Closes relative to the middle band, in standard deviations
+        with np.errstate(divide='ignore', invalid='ignore'):
+            score = (self.values - mean) / std
+        del mean, std
+        side = np.sign(score)
+        crossed = np.zeros(side.shape, dtype=bool)
+        crossed[:, 1:] = side[:, 1:] != side[:, :-1]
+        middle = last_event(crossed)
+        del side, crossed
+
+        def positions(chunk: slice) -> np.ndarray:
+            exit_bar = middle[index[chunk]]
+            bought = last_crossing(score, index[chunk], -width[chunk], below=True)
+            signal = ((bought >= exit_bar) & (bought >= 0)).astype(np.float64)
+            if self.allow_short:
+                sold = last_crossing(score, index[chunk], width[chunk], below=False)
+                signal[bought < sold] = 0.0
+                signal -= (sold >= exit_bar) & (sold > bought)
+            return signal
+
+        return self._sweep(table, positions)
+
+    def evaluate(self, positions: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Evaluate positions held over the price panel
+
+        Args:
+            positions: Array of shape (configuration, time, ticker) or
+                (time, ticker) holding the position decided at each bar's
+                close (1 long, -1 short, 0 flat; fractions scale exposure)
+
+        Returns:
+            Dictionary of ``METRICS`` arrays of shape (configuration, ticker),
+            or (ticker,) for 2-D positions. Returns and drawdowns are
+            fractions, Sharpe ratios are annualized
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        if positions.ndim == 2:
+            return {name: values[0] for name, values in self.evaluate(positions[None]).items()}
+        if positions.shape[1:] != self.values.shape:
+            raise ValueError(f"Positions must have shape (configurations,) + {self.values.shape}, "
+                             f"got {positions.shape}")
+        return self._evaluate(np.nan_to_num(positions, nan=0.0))
+
+    def _evaluate(self, positions: np.ndarray) -> Dict[str, np.ndarray]:
+        """Private method to evaluate a chunk of finite positions, reusing two work arrays"""
+        valid = np.isfinite(self.returns)
+        returns = np.where(valid, self.returns, 0.0)
+        n_periods = valid.sum(axis=0)
+
+        turnover = np.empty(positions.shape)
+        np.abs(positions[:, 0], out=turnover[:, 0])
+        np.subtract(positions[:, 1:], positions[:, :-1], out=turnover[:, 1:])
+        np.abs(turnover, out=turnover)
+        trades = np.count_nonzero(turnover, axis=1)
+        exposure = ((positions[:, :-1] != 0) & valid[1:]).sum(axis=1) / np.maximum(n_periods, 1)
+        strategy = np.empty(positions.shape)
+        strategy[:, 0] = 0.0
+        np.multiply(positions[:, :-1], returns[1:], out=strategy[:, 1:])
+        if self.cost:
+            turnover *= self.cost
+            strategy -= turnover
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = strategy.sum(axis=1) / n_periods
+            squares = np.einsum('ctn,ctn->cn', strategy, strategy)
+            variance = (squares - n_periods * mean ** 2) / (n_periods - 1)
+            sharpe = mean / np.sqrt(np.maximum(variance, 0.0)) * np.sqrt(self.periods_per_year)
+            # Equity starts at 1; a loss of 100% or more wipes it out
+            equity = np.maximum(strategy, -1.0, out=turnover)
+            equity += 1.0
+            np.cumprod(equity, axis=1, out=equity)
+            final = equity[:, -1].copy()
+            peak = np.maximum.accumulate(equity, axis=1, out=strategy)
+            np.maximum(peak, 1.0, out=peak)
+            drawdown = np.divide(equity, peak, out=peak).min(axis=1) - 1.0
+            annual = np.power(final, self.periods_per_year / n_periods) - 1.0
+        return {
+            'total_return': final - 1.0,
+            'annual_return': annual,
+            'sharpe': np.where(np.isfinite(sharpe), sharpe, np.nan),
+            'max_drawdown': drawdown,
+            'trades': trades.astype(np.int64),
+            'exposure': exposure
+        }
+
+    def _sweep(self, configs: pd.DataFrame,
+               positions: Callable[[slice], np.ndarray]) -> pd.DataFrame:
+        """Private method to evaluate every configuration, chunk by chunk"""
+        n_configs = len(configs)
+        per_config = max(self.values.size, 1) * 8 * CHUNK_TEMPORARIES
+        size = max(1, min(n_configs, self.max_bytes // per_config))
+        chunks = [slice(start, min(start + size, n_configs)) for start in range(0, n_configs, size)]
+
+        def run(chunk: slice) -> Dict[str, np.ndarray]:
+            return self._evaluate(positions(chunk))
+
+        if self.max_workers and self.max_workers > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(run, chunks))
+        else:
+            results = [run(chunk) for chunk in chunks]
+
+        n_tickers = self.values.shape[1]
+        table = configs.loc[configs.index.repeat(n_tickers)].reset_index(drop=True)
+        table['ticker'] = np.tile(np.asarray(self.columns), n_configs)
+        for name in METRICS:
+            if results:
+                table[name] = np.concatenate([result[name] for result in results]).ravel()
+            else:
+                table[name] = pd.Series(dtype=np.float64)
+        return table
+
+
+def last_event(events: np.ndarray) -> np.ndarray:
+    """
+    Row of the latest event at or before every row
+
+    Args:
+        events: Boolean array of shape (..., time, ticker)
+
+    Returns:
+        int32 array of the same shape; -1 before the first event
+    """
+    time_axis = events.ndim - 2
+    shape = [1] * events.ndim
+    shape[time_axis] = events.shape[time_axis]
+    rows = np.arange(events.shape[time_axis], dtype=np.int32).reshape(shape)
+    last = np.where(events, rows, np.int32(-1))
+    return np.maximum.accumulate(last, axis=time_axis, out=last)
+
+
+def last_crossing(values: np.ndarray, index: np.ndarray, thresholds: np.ndarray,
+                  below: bool) -> np.ndarray:
+    """
+    Latest row at which indicator grids were beyond thresholds
+
+    Each distinct (grid, threshold) pair is scanned once and shared by the
+    configurations using it.
+
+    Args:
+        values: Indicator grids of shape (window, time, ticker)
+        index: Grid of each configuration
+        thresholds: Threshold of each configuration
+        below: Look for values below the threshold instead of above
+
+    Returns:
+        int32 array of shape (configuration, time, ticker); -1 before the
+        first crossing
+    """
+    pairs, inverse = np.unique(np.column_stack([index, thresholds]), axis=0, return_inverse=True)
+    grids = values[pairs[:, 0].astype(np.intp)]
+    limits = pairs[:, 1][:, None, None]
+    with np.errstate(invalid='ignore'):
+        beyond = grids < limits if below else grids > limits
+    return last_event(beyond)[inverse.reshape(-1)]
+
+
+def run_sweep(backtester: Backtester, strategy: str,
+              grid: Optional[Dict[str, Iterable]] = None) -> pd.DataFrame:
+    """
+    Run one strategy over its parameter grid
+
+    Args:
+        backtester: Backtester over the prices to trade
+        strategy: 'crossover', 'rsi' or 'bollinger'
+        grid: Keyword arguments of the sweep (defaults to ``DEFAULT_GRIDS``)
+
+    Returns:
+        Metrics per configuration and ticker
+    """
+    sweeps = {
+        'crossover': backtester.moving_average_crossover,
+        'rsi': backtester.rsi_threshold,
+        'bollinger': backtester.bollinger_reversion
+    }
+    if strategy not in sweeps:
+        raise ValueError(f"Unknown strategy: {strategy}. Expected one of {list(sweeps)}")
+    return sweeps[strategy](**(grid or DEFAULT_GRIDS[strategy]))
+
+
+def _parse_range(text: str) -> List[float]:
+    """Private helper parsing 'a,b,c' or 'start:stop:step' (stop included) into values"""
+    if ':' in text:
+        start, stop, *step = [float(part) for part in text.split(':')]
+        step = step[0] if step else 1.0
+        values = np.arange(start, stop + step / 2, step)
+    else:
+        values = np.array([float(part) for part in text.split(',')])
+    return [int(value) if float(value).is_integer() else float(value) for value in values]
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point for parameter sweeps"""
+    parser = argparse.ArgumentParser(description='Backtest indicator strategies over parameter grids')
+    parser.add_argument('input_path', help='Stock data CSV file, directory of CSV files or glob pattern')
+    parser.add_argument('--strategy', choices=list(DEFAULT_GRIDS), default='crossover',
+                        help='Strategy to sweep')
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUES',
+                        help="Override a grid parameter, e.g. slow_windows=20:200:5 or lower=20,25,30")
+    parser.add_argument('--kind', choices=['sma', 'ema'], default='sma',
+                        help='Moving average used by the crossover strategy')
+    parser.add_argument('--cost', type=float, default=0.0,
+                        help='Cost per unit of position change as a fraction (0.001 = 10 bp)')
+    parser.add_argument('--allow-short', action='store_true', help='Go short on sell signals')
+    parser.add_argument('--workers', type=int, default=None, help='Threads evaluating chunks')
+    parser.add_argument('--top', type=int, default=10, help='Configurations to print, by Sharpe ratio')
+    parser.add_argument('--output', default=None, help='Save every configuration\'s metrics to this CSV')
+    args = parser.parse_args(argv)
+
+    if args.input_path.endswith('.csv') and '*' not in args.input_path:
+        files = {Path(args.input_path).stem: args.input_path}
+    else:
+        files = BatchAnalysis(args.input_path).discover_symbols()
+    frames = {symbol: StockDataLoader(path).load_data() for symbol, path in files.items()}
+    backtester = Backtester.from_frames(frames, cost=args.cost, allow_short=args.allow_short,
+                                        max_workers=args.workers)
+    grid = dict(DEFAULT_GRIDS[args.strategy])
+    for item in args.param:
+        name, separator, values = item.partition('=')
+        if not separator or name not in grid:
+            parser.error(f"Expected NAME=VALUES with NAME one of {list(grid)}: {item}")
+        grid[name] = _parse_range(values)
+    if args.strategy == 'crossover':
+        grid['kind'] = args.kind
+
+    start = time.perf_counter()
+    report = run_sweep(backtester, args.strategy, grid)
+    elapsed = time.perf_counter() - start
+    n_configs = len(report) // max(len(frames), 1)
+    print(f"Backtested {n_configs} configurations x {len(frames)} tickers in {elapsed:.2f}s")
+    print(report.sort_values('sharpe', ascending=False).head(args.top).to_string(index=False))
+    if args.output:
+        report.to_csv(args.output, index=False)
+        print(f"Metrics saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+from .main import TeslaStockAnalysis
+from .covariance import cross_asset_statistics
+
+
+def analyze_symbol(data_path: str, output_dir: str, incremental: bool = False,
+                   cache_dir: Optional[str] = None, symbol: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run the full analysis pipeline for a single stock data file
+
+    Only a small summary row is returned so that worker processes do not
+    ship whole result sets back to the parent.
+
+    Args:
+        data_path: Path to the stock data CSV file
+        output_dir: Directory the per-symbol results are saved to
+        incremental: Only process rows appended since the previous run
+        cache_dir: Directory the symbol's result cache is kept in under its
+            own subdirectory (None disables the result cache)
+        symbol: Name the results are saved under (defaults to the file name
+            without extension)
+
+    Returns:
+        Dictionary summarizing the run for this symbol
+    """
+    symbol = symbol or Path(data_path).stem
+    results_path = os.path.join(output_dir, symbol)
+    start = time.perf_counter()
+    try:
+        # Symbols already run in parallel processes, so analyzers run serially.
+        # Each symbol gets its own cache so workers never share one LRU
+        symbol_cache = os.path.join(cache_dir, symbol) if cache_dir else None
+        analysis = TeslaStockAnalysis(data_path, results_path=results_path,
+                                      incremental=incremental, max_workers=1,
+                                      cache_dir=symbol_cache)
+        results = analysis.run_analysis()
+        failed = [
+            analysis_type for analysis_type, result in results.items()
+            if isinstance(result, dict) and 'error' in result
+        ]
+        status = 'partial' if failed else 'ok'
+        error = '; '.join(results[analysis_type]['error'] for analysis_type in failed)
+        rows = len(analysis.data)
+    except Exception as e:
+        failed = []
+        status = 'failed'
+        error = str(e)
+        rows = 0
+        results_path = ''
+    return {
+        'symbol': symbol,
+        'data_path': data_path,
+        'status': status,
+        'rows': rows,
+        'failed_analyses': ','.join(failed),
+        'error': error,
+        'results_path': results_path,
+        'elapsed_seconds': time.perf_counter() - start
+    }
+
+
+class BatchAnalysis:
+    """Class that runs the analysis pipeline over many stock data files"""
+
+    def __init__(self, input_path: str, output_dir: str = 'batch_results',
+                 max_workers: Optional[int] = None, incremental: bool = False,
+                 cache_dir: Optional[str] = None):
+        """
+        Initialize the batch analysis
+
+        Args:
+            input_path: Directory containing CSV files, or a glob pattern
+            output_dir: Directory per-symbol results and the summary are saved to
+            max_workers: Number of worker processes (defaults to the CPU count)
+            incremental: Only process rows appended since the previous run
+            cache_dir: Directory holding one result cache per symbol (None,
+                the default, disables the result cache)
+        """
+        self.input_path = input_path
+        self.output_dir = output_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.incremental = incremental
+        self.cache_dir = cache_dir
+        self.summary = None
+        self.correlation_errors = {}
+
+    def discover_files(self) -> List[str]:
+        """
+        Find the stock data files to analyze
+
+        Returns:
+            Sorted list of CSV file paths
+        """
+        if os.path.isdir(self.input_path):
+            pattern = os.path.join(self.input_path, '*.csv')
+        else:
+            pattern = self.input_path
+        return sorted(glob.glob(pattern))
+
+    def discover_symbols(self) -> Dict[str, str]:
+        """
+        Find the stock data files to analyze and name their symbols
+
+        A file is named after its file name without extension. Files sharing
+        a name in different directories of a glob are named after their path
+        relative to the common directory instead (``us/AAPL.csv`` becomes
+        ``us_AAPL``), so their results never overwrite each other.
+
+        Returns:
+            Data file paths keyed by symbol, in file order
+        """
+        files = self.discover_files()
+        stems = [Path(path).stem for path in files]
+        repeated = {stem for stem in stems if stems.count(stem) > 1}
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files]) if files else ''
+        symbols = {}
+        for path, stem in zip(files, stems):
+            symbol = stem
+            if stem in repeated:
+                relative = os.path.relpath(os.path.splitext(os.path.abspath(path))[0], root)
+                symbol = relative.replace(os.sep, '_')
+            if symbol in symbols:
+                raise ValueError(f"Files {symbols[symbol]} and {path} both map to symbol {symbol}")
+            symbols[symbol] = path
+        return symbols
+
+    def run(self) -> pd.DataFrame:
+        """
+        Run the analysis for every discovered file
+
+        Returns:
+            DataFrame with one summary row per symbol
+        """
+        symbols = self.discover_symbols()
+        if not symbols:
+            raise FileNotFoundError(f"No CSV files found for: {self.input_path}")
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        files = list(symbols.values())
+        if self.max_workers == 1:
+            rows = [analyze_symbol(path, self.output_dir, self.incremental, self.cache_dir, symbol)
+                    for symbol, path in symbols.items()]
+        else:
+            # Hand out files in chunks to keep scheduling overhead low on
+            # large universes while still balancing work across workers
+            chunksize = max(1, len(files) // (self.max_workers * 4))
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                rows = list(executor.map(
+                    analyze_symbol, files, repeat(self.output_dir), repeat(self.incremental),
+                    repeat(self.cache_dir), list(symbols), chunksize=chunksize
+                ))
+
+        self.summary = pd.DataFrame(rows).set_index('symbol')
+        self._save_summary()
+        return self.summary
+
+    def cross_asset_correlation(self, column: str = 'Close', returns: bool = True,
+                                chunksize: Optional[int] = None) -> pd.DataFrame:
+        """
+        Correlate every discovered symbol with every other one
+
+        The files are streamed side by side in chunks and aligned by date, so
+        memory stays fixed however long the histories are. The matrix is
+        saved as ``cross_asset_correlation.csv`` in the output directory.
+        Files that fail to load are left out of the matrix and their errors
+        kept in ``correlation_errors``.
+
+        Args:
+            column: Data column to correlate
+            returns: Correlate period returns instead of levels
+            chunksize: Rows read per file and chunk
+
+        Returns:
+            Correlation matrix indexed and labelled by symbol
+        """
+        paths = self.discover_symbols()
+        if not paths:
+            raise FileNotFoundError(f"No CSV files found for: {self.input_path}")
+        self.correlation_errors = {}
+        correlation = cross_asset_statistics(paths, column=column, returns=returns, chunksize=chunksize,
+                                             errors=self.correlation_errors).correlation()
+        failed = list(self.correlation_errors)
+        correlation = correlation.drop(index=failed, columns=failed)
+        os.makedirs(self.output_dir, exist_ok=True)
+        correlation.to_csv(os.path.join(self.output_dir, 'cross_asset_correlation.csv'))
+        return correlation
+
+    def _save_summary(self):
+        """Save the batch summary to file"""
+        self.summary.to_csv(os.path.join(self.output_dir, 'batch_summary.csv'))
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point for batch analysis"""
+    parser = argparse.ArgumentParser(description='Run the stock analysis over many CSV files')
+    parser.add_argument('input_path', help='Directory containing CSV files, or a glob pattern')
+    parser.add_argument('--output-dir', default='batch_results',
+                        help='Directory results and the summary are saved to')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (defaults to the CPU count)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only process rows appended since the previous run')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Keep a result cache per symbol under this directory (off by default)')
+    parser.add_argument('--correlation', action='store_true',
+                        help='Also correlate the daily returns of all symbols, streaming the files')
+    args = parser.parse_args(argv)
+
+    batch = BatchAnalysis(args.input_path, args.output_dir, args.workers, args.incremental,
+                          cache_dir=args.cache_dir)
+    summary = batch.run()
+    counts = summary['status'].value_counts().to_dict()
+    print(f"Batch complete: {len(summary)} symbols {counts}. "
+          f"Summary saved to {os.path.join(args.output_dir, 'batch_summary.csv')}")
+    if args.correlation:
+        batch.cross_asset_correlation()
+        for symbol, error in batch.correlation_errors.items():
+            print(f"Left {symbol} out of the correlation: {error}")
+        print(f"Cross-asset correlation saved to "
+              f"{os.path.join(args.output_dir, 'cross_asset_correlation.csv')}")
+
+
+if __name__ == "__main__":
+    main()
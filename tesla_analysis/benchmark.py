@@ -0,0 +1,444 @@
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .data_loader import StockDataLoader
+from .main import TeslaStockAnalysis, ANALYZERS
+from .batch import BatchAnalysis
+from .lazy_results import LazyResults
+from . import indicators
+from .import_profile import profile_imports
+from .result_store import ResultStore
+
+BASELINE_FORMAT_VERSION = 1
+
+# Rows generated and written per chunk, bounding memory for large files
+GENERATOR_CHUNKSIZE = 1_000_000
+
+# Dashboard chart builders timed by the frontend stages
+FRONTEND_CHARTS = [
+    'create_price_trend_chart',
+    'create_volume_chart',
+    'create_technical_indicators_chart',
+    'create_sentiment_chart',
+    'create_correlation_heatmap'
+]
+
+FRONTEND_APP = Path(__file__).parent.parent / 'frontend' / 'app.py'
+
+# Windows the native EMA/RSI kernels are timed and validated for
+INDICATOR_WINDOWS = [5, 14, 20, 50, 200]
+
+# Largest relative difference allowed between the native kernels and `ta`
+INDICATOR_TOLERANCE = 1e-10
+
+
+def generate_ohlcv(rows: int, seed: int = 0, start: str = '1990-01-01',
+                   freq: str = 'min', start_price: float = 100.0) -> pd.DataFrame:
+    """
+    Generate deterministic synthetic OHLCV data
+
+    Closes follow a geometric random walk; opens, highs and lows are drawn
+    around it so every bar is internally consistent (low <= open, close <=
+    high), and volumes are positive integers.
+
+    Args:
+        rows: Number of bars
+        seed: Random seed; the same seed always gives the same data
+        start: Timestamp of the first bar
+        freq: Bar frequency (minute bars keep 50M rows within pandas' date range)
+        start_price: Close of the bar before the first one
+
+    Returns:
+        DataFrame indexed by date with the columns of the bundled CSV
+    """
+    return pd.concat(list(_iter_ohlcv(rows, seed, start, freq, start_price)))
+
+
+def write_ohlcv_csv(path: str, rows: int, seed: int = 0, start: str = '1990-01-01',
+                    freq: str = 'min') -> str:
+    """
+    Write synthetic OHLCV data to a CSV file in the bundled CSV's layout
+
+    The data is generated and written chunk by chunk, so memory use does not
+    grow with the number of rows.
+
+    Args:
+        path: Output CSV path
+        rows: Number of bars
+        seed: Random seed
+        start: Timestamp of the first bar
+        freq: Bar frequency
+
+    Returns:
+        The output path
+    """
+    header = True
+    for chunk in _iter_ohlcv(rows, seed, start, freq, 100.0):
+        chunk.to_csv(path, mode='w' if header else 'a', header=header)
+        header = False
+    return path
+
+
+def _iter_ohlcv(rows: int, seed: int, start: str, freq: str, start_price: float):
+    """Private generator yielding synthetic OHLCV data in chunks"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=rows, freq=freq, name='Date')
+    last_close = np.log(start_price)
+    for offset in range(0, rows, GENERATOR_CHUNKSIZE):
+        n = min(GENERATOR_CHUNKSIZE, rows - offset)
+        log_close = last_close + np.cumsum(rng.normal(0.0, 1e-3, n))
+        last_close = log_close[-1]
+        close = np.exp(log_close)
+        open_ = close * np.exp(rng.normal(0.0, 5e-4, n))
+        spread = np.abs(rng.normal(0.0, 1e-3, n))
+        high = np.maximum(open_, close) * (1 + spread)
+        low = np.minimum(open_, close) * (1 - spread)
+        volume = rng.integers(100_000, 10_000_000, n)
+        yield pd.DataFrame(
+            {'Close': close, 'High': high, 'Low': low, 'Open': open_, 'Volume': volume},
+            index=dates[offset:offset + n]
+        )
+
+
+def load_frontend_charts() -> Optional[Dict[str, Callable]]:
+    """
+    Import the dashboard's chart builders
+
+    Returns:
+        Chart builders keyed by name, or None if the dashboard dependencies
+        (streamlit, plotly) are not installed
+    """
+    try:
+        spec = importlib.util.spec_from_file_location('dashboard_app', str(FRONTEND_APP))
+        app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(app)
+    except ImportError:
+        return None
+    return {name: getattr(app, name) for name in FRONTEND_CHARTS}
+
+
+def load_ta_reference() -> Optional[Dict[str, Callable[[pd.Series, int], pd.Series]]]:
+    """
+    Import the `ta` indicators the native kernels are validated against
+
+    Returns:
+        EMA and RSI functions of (close, window) keyed by indicator name,
+        or None if `ta` is not installed
+    """
+    try:
+        from ta.trend import EMAIndicator
+        from ta.momentum import RSIIndicator
+    except ImportError:
+        return None
+    return {
+        'ema': lambda close, window: EMAIndicator(close=close, window=window).ema_indicator(),
+        'rsi': lambda close, window: RSIIndicator(close=close, window=window).rsi()
+    }
+
+
+def relative_error(values: np.ndarray, reference: np.ndarray) -> float:
+    """
+    Largest difference between two series relative to the reference's magnitude
+
+    Args:
+        values: Computed values
+        reference: Reference values
+
+    Returns:
+        Maximum absolute difference divided by the maximum absolute reference
+        value, or infinity if the series are NaN at different rows
+    """
+    values = np.asarray(values, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    missing = np.isnan(reference)
+    if not np.array_equal(np.isnan(values), missing):
+        return float('inf')
+    if missing.all():
+        return 0.0
+    scale = max(np.abs(reference[~missing]).max(), np.finfo(np.float64).tiny)
+    return float(np.abs(values[~missing] - reference[~missing]).max() / scale)
+
+
+def _materialize(value: Any) -> Any:
+    """Private helper resolving lazily computed results"""
+    return value.materialize() if isinstance(value, LazyResults) else value
+
+
+class BenchmarkSuite:
+    """
+    Class that times every stage of the pipeline on synthetic data
+
+    Each stage (cold import of the package, load, every analyzer method, the native indicator kernels,
+    the full pipeline, saving, dashboard figure construction and optionally
+    a multi-ticker batch) is timed on its own. When `ta` is installed, the
+    kernels are also timed against it and their largest relative error is
+    recorded in ``accuracy``. When memory tracking is on, the stage is run a second
+    time under ``tracemalloc`` to record its peak allocation, so traced runs
+    never inflate the timings. An analyzer method that fails (such as a seasonal
+    decomposition on too few bars) is recorded in ``errors``, as the pipeline
+    records it in its results, and the remaining stages still run.
+    """
+
+    def __init__(self, rows: List[int], seed: int = 0, tickers: int = 1,
+                 work_dir: Optional[str] = None, track_memory: bool = True,
+                 max_workers: Optional[int] = None):
+        """
+        Initialize the benchmark suite
+
+        Args:
+            rows: Dataset sizes to benchmark
+            seed: Random seed of the synthetic data
+            tickers: Number of tickers for the batch stage (1 skips it)
+            work_dir: Directory for generated files (a temporary directory if not given)
+            track_memory: Record the peak memory of every stage
+            max_workers: Worker count for the pipeline and batch stages
+        """
+        self.rows = rows
+        self.seed = seed
+        self.tickers = tickers
+        self.work_dir = work_dir
+        self.track_memory = track_memory
+        self.max_workers = max_workers
+        self.records = []
+        self.accuracy = []
+        self.errors = []
+
+    def run(self) -> pd.DataFrame:
+        """
+        Run every stage for every dataset size
+
+        Returns:
+            DataFrame with one row per (rows, stage) holding seconds and peak MB
+        """
+        self.records = []
+        self.accuracy = []
+        self.errors = []
+        if self.work_dir is not None:
+            os.makedirs(self.work_dir, exist_ok=True)
+            self._run_all(self.work_dir)
+        else:
+            with tempfile.TemporaryDirectory() as work_dir:
+                self._run_all(work_dir)
+        return pd.DataFrame(self.records, columns=['rows', 'stage', 'seconds', 'peak_mb'])
+
+    def _run_all(self, work_dir: str):
+        """Private method to run the stages for each dataset size"""
+        charts = load_frontend_charts()
+        if charts is None:
+            print("Dashboard dependencies not installed; skipping frontend stages")
+        reference = load_ta_reference()
+        if reference is None:
+            print("ta not installed; skipping indicator validation")
+        for rows in self.rows:
+            self._run_size(rows, os.path.join(work_dir, str(rows)), charts, reference)
+
+    def _run_size(self, rows: int, work_dir: str, charts: Optional[Dict[str, Callable]],
+                  reference: Optional[Dict[str, Callable]] = None):
+        """Private method to run every stage for one dataset size"""
+        os.makedirs(work_dir, exist_ok=True)
+        data_path = write_ohlcv_csv(os.path.join(work_dir, 'SYNTH.csv'), rows, self.seed)
+
+        # Cold start of the CLI in a fresh interpreter, independent of the data
+        self._measure(rows, 'startup', lambda: profile_imports('tesla_analysis.main'), trace=False)
+        data = self._measure(rows, 'load', lambda: StockDataLoader(data_path).load_data())
+        self._measure(rows, 'load_compact',
+                      lambda: StockDataLoader(data_path, compact=True).load_data())
+
+        for analysis_type, analyzer_class in ANALYZERS:
+            outputs = analyzer_class.OUTPUTS
+            methods = [outputs] if isinstance(outputs, str) else list(outputs.values())
+            for method in methods:
+                stage = f'{analysis_type}.{method}'
+                try:
+                    self._measure(rows, stage,
+                                  lambda: _materialize(getattr(analyzer_class(data), method)()))
+                except Exception as e:
+                    self.errors.append({'rows': rows, 'stage': stage, 'error': str(e)})
+                    print(f"{rows:>10} {stage:<55} error: {e}")
+
+        close = data['Close']
+        for name in ('ema', 'rsi'):
+            kernel = getattr(indicators, name)
+            values = self._measure(rows, f'indicators.{name}',
+                                   lambda: kernel(close.to_numpy(dtype=np.float64), INDICATOR_WINDOWS))
+            if reference is not None:
+                expected = self._measure(rows, f'ta.{name}', lambda: [
+                    reference[name](close, window) for window in INDICATOR_WINDOWS
+                ])
+                for window, computed, series in zip(INDICATOR_WINDOWS, values, expected):
+                    self.accuracy.append({'rows': rows, 'indicator': f'{name}_{window}',
+                                          'relative_error': relative_error(computed, series.to_numpy())})
+
+        results_path = os.path.join(work_dir, 'results')
+        results = self._measure(rows, 'pipeline', lambda: TeslaStockAnalysis(
+            data_path, results_path=results_path, cache_dir=None, max_workers=self.max_workers
+        ).run_analysis())
+        store_path = os.path.join(work_dir, 'store')
+        self._measure(rows, 'save', lambda: ResultStore(store_path).save(results, data.index))
+
+        if charts is not None:
+            for name, build_chart in charts.items():
+                self._measure(rows, f'frontend.{name}', lambda: build_chart(results))
+
+        if self.tickers > 1:
+            input_dir = os.path.join(work_dir, 'universe')
+            os.makedirs(input_dir, exist_ok=True)
+            for ticker in range(self.tickers):
+                write_ohlcv_csv(os.path.join(input_dir, f'T{ticker:04d}.csv'), rows, self.seed + ticker)
+            output_dir = os.path.join(work_dir, 'batch_results')
+            # Worker processes are not visible to tracemalloc, so no peak is recorded
+            self._measure(rows, f'batch.{self.tickers}_tickers', lambda: BatchAnalysis(
+                input_dir, output_dir, max_workers=self.max_workers
+            ).run(), trace=False)
+
+    def _measure(self, rows: int, stage: str, func: Callable[[], Any], trace: bool = True) -> Any:
+        """Private method to time one stage and record its peak memory"""
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        peak_mb = float('nan')
+        if self.track_memory and trace:
+            gc.collect()
+            tracemalloc.start()
+            try:
+                func()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            peak_mb = peak / 2**20
+        self.records.append({'rows': rows, 'stage': stage, 'seconds': seconds, 'peak_mb': peak_mb})
+        print(f"{rows:>10} {stage:<55} {seconds:9.4f} s {peak_mb:10.1f} MB")
+        return result
+
+
+def save_baseline(report: pd.DataFrame, path: str):
+    """
+    Save a benchmark report as the baseline for later runs
+
+    Args:
+        report: DataFrame returned by ``BenchmarkSuite.run``
+        path: Baseline JSON path
+    """
+    payload = {
+        'format_version': BASELINE_FORMAT_VERSION,
+        'records': json.loads(report.to_json(orient='records'))
+    }
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=1)
+
+
+def check_regressions(report: pd.DataFrame, baseline_path: str, tolerance: float = 0.25,
+                      min_seconds: float = 0.005, min_mb: float = 1.0) -> List[str]:
+    """
+    Compare a benchmark report against a stored baseline
+
+    A stage regresses when it is slower, or its peak memory is higher, than
+    the baseline by more than ``tolerance``. Tiny absolute differences are
+    ignored so timer noise on fast stages does not fail the check.
+
+    Args:
+        report: DataFrame returned by ``BenchmarkSuite.run``
+        baseline_path: Baseline JSON path
+        tolerance: Allowed relative slowdown or memory growth
+        min_seconds: Smallest absolute slowdown reported
+        min_mb: Smallest absolute memory growth reported
+
+    Returns:
+        One message per regressed stage (empty when nothing regressed)
+    """
+    with open(baseline_path) as f:
+        payload = json.load(f)
+    if payload.get('format_version') != BASELINE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported baseline format: {payload.get('format_version')}")
+    baseline = {(record['rows'], record['stage']): record for record in payload['records']}
+
+    regressions = []
+    for record in report.to_dict(orient='records'):
+        base = baseline.get((record['rows'], record['stage']))
+        if base is None:
+            continue
+        label = f"{record['stage']} ({record['rows']} rows)"
+        if (record['seconds'] > base['seconds'] * (1 + tolerance)
+                and record['seconds'] - base['seconds'] > min_seconds):
+            regressions.append(
+                f"{label}: {record['seconds']:.4f} s vs baseline {base['seconds']:.4f} s"
+            )
+        base_mb = base.get('peak_mb')
+        if (base_mb is not None and not np.isnan(record['peak_mb'])
+                and record['peak_mb'] > base_mb * (1 + tolerance)
+                and record['peak_mb'] - base_mb > min_mb):
+            regressions.append(
+                f"{label}: peak {record['peak_mb']:.1f} MB vs baseline {base_mb:.1f} MB"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point for the benchmark suite"""
+    parser = argparse.ArgumentParser(description='Benchmark the analysis pipeline on synthetic data')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000],
+                        help='Dataset sizes to benchmark (up to 50M rows)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the synthetic data')
+    parser.add_argument('--tickers', type=int, default=1,
+                        help='Tickers in the batch stage (1 skips it)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker count for the pipeline and batch stages')
+    parser.add_argument('--work-dir', default=None,
+                        help='Keep generated files here instead of a temporary directory')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Skip the traced runs that record peak memory')
+    parser.add_argument('--output', default=None, help='Write the report to this CSV file')
+    parser.add_argument('--baseline', default=None,
+                        help='Fail if any stage regressed against this baseline JSON')
+    parser.add_argument('--save-baseline', default=None,
+                        help='Save this run as the baseline JSON')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative regression against the baseline')
+    args = parser.parse_args(argv)
+
+    suite = BenchmarkSuite(args.rows, seed=args.seed, tickers=args.tickers, work_dir=args.work_dir,
+                           track_memory=not args.no_memory, max_workers=args.workers)
+    report = suite.run()
+    if args.output:
+        report.to_csv(args.output, index=False)
+    for record in suite.errors:
+        print(f"Skipped {record['stage']} ({record['rows']} rows): {record['error']}")
+    if suite.accuracy:
+        mismatches = [record for record in suite.accuracy
+                      if not record['relative_error'] <= INDICATOR_TOLERANCE]
+        worst = max(record['relative_error'] for record in suite.accuracy)
+        print(f"Native indicators vs ta: max relative error {worst:.2e}")
+        if mismatches:
+            for record in mismatches:
+                print(f"  {record['indicator']} ({record['rows']} rows): "
+                      f"relative error {record['relative_error']:.2e}")
+            return 1
+    if args.save_baseline:
+        save_baseline(report, args.save_baseline)
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.baseline:
+        regressions = check_regressions(report, args.baseline, tolerance=args.tolerance)
+        if regressions:
+            print("Performance regressions against the baseline:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,356 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .data_loader import StockDataLoader
+
+# Working memory of the blocked rolling correlation besides its output
+ROLLING_BLOCK_BYTES = 64 * 1024 * 1024
+
+# Most rows one running total of the rolling correlation spans; shorter
+# totals lose less precision when windows are taken as their differences
+ROLLING_BLOCK_ROWS = 4096
+
+
+class CovarianceAccumulator:
+    """
+    Running sufficient statistics for covariance, correlation and PCA
+
+    Chunks of rows are folded into per-pair counts, sums, sums of squares
+    and cross-products, so memory depends only on the number of columns.
+    Statistics are pairwise complete like ``DataFrame.corr()``: each pair
+    of columns uses the rows where both are present. Values are shifted by
+    the first value seen in each column before they are summed, which keeps
+    the sums small relative to the spread of prices.
+    """
+
+    def __init__(self, columns: Sequence[str]):
+        """
+        Initialize the accumulator
+
+        Args:
+            columns: Column names, in the order of the statistics
+        """
+        self.columns = list(columns)
+        size = len(self.columns)
+        self.reference = np.full(size, np.nan)
+        self.counts = np.zeros((size, size))
+        # sums[i, j] sums column i over the rows where columns i and j are present
+        self.sums = np.zeros((size, size))
+        self.squares = np.zeros((size, size))
+        self.products = np.zeros((size, size))
+
+    def update(self, chunk: Union[pd.DataFrame, np.ndarray]):
+        """
+        Fold a chunk of rows into the statistics
+
+        Args:
+            chunk: DataFrame holding the accumulator's columns, or an array
+                of shape (rows, columns) in column order; NaN (or an
+                infinite value) marks a missing value
+        """
+        if isinstance(chunk, pd.DataFrame):
+            chunk = chunk[self.columns]
+        values = np.asarray(chunk, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} columns, got shape {values.shape}")
+        present = np.isfinite(values)
+        unset = np.isnan(self.reference) & present.any(axis=0)
+        if unset.any():
+            first = present.argmax(axis=0)
+            self.reference[unset] = values[first[unset], np.flatnonzero(unset)]
+        shifted = np.where(present, values - self.reference, 0.0)
+        mask = present.astype(np.float64)
+        self.counts += mask.T @ mask
+        self.sums += shifted.T @ mask
+        self.squares += (shifted * shifted).T @ mask
+        self.products += shifted.T @ shifted
+
+    def merge(self, other: 'CovarianceAccumulator'):
+        """
+        Add the statistics of another accumulator over the same columns
+
+        Args:
+            other: Accumulator fed with other rows
+        """
+        if other.columns != self.columns:
+            raise ValueError("Accumulators must have the same columns")
+        self.reference = np.where(np.isnan(self.reference), other.reference, self.reference)
+        # Re-express the other statistics relative to this reference
+        shift = np.nan_to_num(other.reference - self.reference)[:, None]
+        counts, sums = other.counts, other.sums
+        self.products += other.products + shift * sums.T + shift.T * sums + shift * shift.T * counts
+        self.squares += other.squares + 2 * shift * sums + shift * shift * counts
+        self.sums += sums + shift * counts
+        self.counts += counts
+
+    @property
+    def count(self) -> pd.Series:
+        """Number of values seen per column"""
+        return pd.Series(np.diag(self.counts), index=self.columns)
+
+    def mean(self) -> pd.Series:
+        """
+        Mean of each column
+
+        Returns:
+            Series indexed by column, NaN for columns without values
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = np.diag(self.sums) / np.diag(self.counts) + self.reference
+        return pd.Series(means, index=self.columns)
+
+    def covariance(self, ddof: int = 1) -> pd.DataFrame:
+        """
+        Pairwise covariance matrix
+
+        Args:
+            ddof: Delta degrees of freedom
+
+        Returns:
+            DataFrame indexed and labelled by column
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            centered = self.products - self.sums * self.sums.T / self.counts
+            covariance = centered / (self.counts - ddof)
+        covariance[self.counts - ddof <= 0] = np.nan
+        return pd.DataFrame(covariance, index=self.columns, columns=self.columns)
+
+    def correlation(self) -> pd.DataFrame:
+        """
+        Pairwise Pearson correlation matrix, as ``DataFrame.corr()`` computes it
+
+        Returns:
+            DataFrame indexed and labelled by column
+        """
+        correlation = _pair_correlation(self.counts, self.sums, self.squares, self.products, 2)
+        return pd.DataFrame(correlation, index=self.columns, columns=self.columns)
+
+    def principal_components(self, n_components: int) -> 'PrincipalComponents':
+        """
+        Principal components of the standardized columns
+
+        Equivalent to fitting ``PCA`` on ``StandardScaler``-transformed data,
+        so the accumulator must only have been fed complete rows.
+
+        Args:
+            n_components: Number of components to keep
+
+        Returns:
+            Fitted components that project chunks of rows
+        """
+        counts = np.diag(self.counts)
+        if not np.allclose(self.counts, counts[0]):
+            raise ValueError("Principal components need rows without missing values")
+        correlation = self.correlation().to_numpy()
+        if np.isnan(correlation).any():
+            raise ValueError("Principal components need at least two rows and non-constant columns")
+        eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+        order = np.argsort(eigenvalues)[::-1][:n_components]
+        components = eigenvectors[:, order].T
+        # Deterministic signs: the largest loading of each component is positive
+        largest = np.abs(components).argmax(axis=1)
+        components *= np.sign(components[np.arange(len(order)), largest])[:, None]
+        spread = np.diag(self.squares) - np.diag(self.sums) ** 2 / counts
+        return PrincipalComponents(
+            columns=self.columns,
+            mean=self.mean().to_numpy(),
+            scale=np.sqrt(spread / counts),
+            components=components,
+            explained_variance_ratio=eigenvalues[order] / eigenvalues.sum()
+        )
+
+
+class PrincipalComponents:
+    """Principal components fitted from a ``CovarianceAccumulator``"""
+
+    def __init__(self, columns: List[str], mean: np.ndarray, scale: np.ndarray,
+                 components: np.ndarray, explained_variance_ratio: np.ndarray):
+        """
+        Initialize the fitted components
+
+        Args:
+            columns: Column names
+            mean: Mean of each column
+            scale: Population standard deviation of each column
+            components: Array of shape (n_components, columns)
+            explained_variance_ratio: Share of the total variance per component
+        """
+        self.columns = columns
+        self.mean = mean
+        self.scale = scale
+        self.components = components
+        self.explained_variance_ratio = explained_variance_ratio
+
+    def transform(self, chunk: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """
+        Project rows onto the components
+
+        Args:
+            chunk: Rows holding the fitted columns
+
+        Returns:
+            Array of shape (rows, n_components)
+        """
+        if isinstance(chunk, pd.DataFrame):
+            chunk = chunk[self.columns]
+        standardized = (np.asarray(chunk, dtype=np.float64) - self.mean) / self.scale
+        return standardized @ self.components.T
+
+
+def rolling_correlation(values: Union[pd.DataFrame, np.ndarray], window: int,
+                        min_periods: Optional[int] = None, dtype: Union[str, np.dtype] = np.float32) -> np.ndarray:
+    """
+    Correlation matrices over a sliding window of rows
+
+    Each row's contribution to the pair statistics (counts, sums, squares
+    and cross-products) enters the window once and leaves it once: window
+    totals are differences of running totals, so the cost per row does not
+    depend on the window. Running totals restart every block of rows,
+    relative to the block's own means, so rounding does not build up over
+    long series. Pairs are complete within each window like
+    ``DataFrame.rolling(window).corr()``.
+
+    Args:
+        values: Rows of shape (time, columns); NaN marks a missing value
+        window: Rows per window
+        min_periods: Rows with both values present needed for a
+            correlation (the window by default)
+        dtype: Data type of the result (float32 halves its size)
+
+    Returns:
+        Array of shape (time, columns, columns); row ``t`` holds the
+        correlation of the window ending at row ``t``
+    """
+    x = np.asarray(values, dtype=np.float64)
+    if x.ndim != 2:
+        raise ValueError(f"Rolling correlation needs 2-D (time x column) values, got shape {x.shape}")
+    min_periods = window if min_periods is None else min_periods
+    if not 1 <= min_periods <= window:
+        raise ValueError(f"min_periods must be between 1 and the window ({window}): {min_periods}")
+    n_rows, n_columns = x.shape
+    out = np.empty((n_rows, n_columns, n_columns), dtype=dtype)
+    # Four running totals of (rows, columns, columns) are held per block
+    span = max(2 * window, min(ROLLING_BLOCK_ROWS, ROLLING_BLOCK_BYTES // (4 * 8 * n_columns * n_columns)))
+    block = span - window + 1
+    for start in range(0, n_rows, block):
+        stop = min(start + block, n_rows)
+        first = max(start - window + 1, 0)
+        chunk = x[first:stop]
+        present = np.isfinite(chunk)
+        with np.errstate(invalid='ignore'):
+            reference = np.nan_to_num(np.nanmean(np.where(present, chunk, np.nan), axis=0))
+        shifted = np.where(present, chunk - reference, 0.0)
+        mask = present.astype(np.float64)
+        totals = []
+        for left, right in ((mask, mask), (shifted, mask), (shifted * shifted, mask), (shifted, shifted)):
+            running = np.zeros((len(chunk) + 1, n_columns, n_columns))
+            np.cumsum(left[:, :, None] * right[:, None, :], axis=0, out=running[1:])
+            totals.append(running)
+        rows = np.arange(start, stop)
+        upper = rows + 1 - first
+        lower = np.maximum(rows - window + 1, 0) - first
+        counts, sums, squares, products = (running[upper] - running[lower] for running in totals)
+        out[start:stop] = _pair_correlation(counts, sums, squares, products, min_periods)
+    return out
+
+
+def _pair_correlation(counts: np.ndarray, sums: np.ndarray, squares: np.ndarray,
+                      products: np.ndarray, min_periods: int) -> np.ndarray:
+    """Private function to turn pair statistics into correlations, over the last two axes"""
+    sums_t = np.swapaxes(sums, -1, -2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        centered = products - sums * sums_t / counts
+        spread = squares - sums * sums / counts
+        correlation = centered / np.sqrt(spread * np.swapaxes(spread, -1, -2))
+    correlation = np.clip(correlation, -1.0, 1.0)
+    diagonal = np.arange(correlation.shape[-1])
+    defined = ~np.isnan(correlation[..., diagonal, diagonal])
+    correlation[..., diagonal, diagonal] = np.where(defined, 1.0, np.nan)
+    correlation[counts < min_periods] = np.nan
+    return correlation
+
+
+def cross_asset_statistics(paths: Dict[str, str], column: str = 'Close', returns: bool = True,
+                           chunksize: Optional[int] = None,
+                           errors: Optional[Dict[str, str]] = None) -> CovarianceAccumulator:
+    """
+    Stream several stock data files into one accumulator, aligned by date
+
+    Files are read chunk by chunk side by side. Rows up to the earliest last
+    date among the files still being read are aligned on their dates and
+    folded in; later rows wait for the next chunks. Memory is bounded by
+    one chunk per file, however long the histories are.
+
+    Statistics are pairwise, so a file that fails to load only leaves its
+    own column and pairs incomplete; with ``errors`` given, its error is
+    recorded there and the other files are still read to the end.
+
+    Args:
+        paths: Data file paths keyed by ticker
+        column: Data column to correlate
+        returns: Correlate each ticker's period returns instead of levels
+        chunksize: Rows read per file and chunk
+        errors: Collects the error of every file that failed, keyed by
+            ticker (failures raise if not given)
+
+    Returns:
+        Accumulator with one column per ticker
+    """
+    tickers = list(paths)
+    accumulator = CovarianceAccumulator(tickers)
+    streams = {
+        ticker: _column_stream(StockDataLoader(path, chunksize=chunksize).iter_chunks(), column, returns)
+        for ticker, path in paths.items()
+    }
+    pending = {ticker: pd.Series(dtype=np.float64) for ticker in tickers}
+    while True:
+        for ticker in list(streams):
+            if len(pending[ticker]) == 0:
+                try:
+                    chunk = next(streams[ticker], None)
+                except Exception as e:
+                    if errors is None:
+                        raise
+                    errors[ticker] = str(e)
+                    chunk = None
+                if chunk is None:
+                    del streams[ticker]
+                else:
+                    pending[ticker] = chunk
+        if streams:
+            cutoff = min(pending[ticker].index[-1] for ticker in streams)
+        elif any(len(series) for series in pending.values()):
+            cutoff = max(series.index[-1] for series in pending.values() if len(series))
+        else:
+            break
+        ready = {}
+        for ticker, series in pending.items():
+            split = series.index.searchsorted(cutoff, side='right')
+            ready[ticker], pending[ticker] = series.iloc[:split], series.iloc[split:]
+        accumulator.update(pd.concat(ready, axis=1).reindex(columns=tickers))
+    return accumulator
+
+
+def _column_stream(chunks: Iterable[pd.DataFrame], column: str, returns: bool) -> Iterator[pd.Series]:
+    """Private function to stream one column, as returns if asked, across chunks"""
+    previous = np.nan
+    last = None
+    for chunk in chunks:
+        series = chunk[column].astype(np.float64)
+        # Alignment needs increasing dates: chunks are sorted, the last row of
+        # a repeated date is kept and rows not after the previous chunk dropped
+        series = series.sort_index(kind='stable')
+        series = series[~series.index.duplicated(keep='last')]
+        if last is not None:
+            series = series[series.index > last]
+        if len(series):
+            last = series.index[-1]
+        if returns:
+            values = series.to_numpy()
+            lagged = np.concatenate([[previous], values[:-1]])
+            previous = values[-1] if len(values) else previous
+            series = pd.Series(values / lagged - 1, index=series.index)
+        if len(series):
+            yield series
@@ -1,62 +1,242 @@
 import pandas as pd
 import numpy as np
-from typing import Optional
+import os
+import time
+from typing import Optional, Iterator
+from .metrics import PipelineMetrics
+from .incremental import file_prefix_digest
+from .result_cache import ResultCache
+from .quality import DataQualityChecker
+from .resampling import TIMEFRAMES, infer_timeframe, resample_ohlcv
+
+# Compact column dtypes used for low-memory ingestion. Columns are parsed
+# leniently and downcast once the quality checks have set aside rows with
+# missing or non-numeric values, which these dtypes cannot hold
+COMPACT_DTYPES = {
+    'Close': 'float32',
+    'High': 'float32',
+    'Low': 'float32',
+    'Open': 'float32',
+    'Volume': 'int64'
+}
+
+# Rows parsed per chunk when streaming without an explicit chunk size
+DEFAULT_CHUNKSIZE = 1_000_000
+
+# Bump when the bar aggregation changes, so cached bars from older code are never served
+RESAMPLE_VERSION = 1
 
 class StockDataLoader:
     """Class responsible for loading and preprocessing stock data."""
     
-    def __init__(self, data_path: str):
+    def __init__(self, data_path: str, compact: bool = False, chunksize: Optional[int] = None,
+                 metrics: Optional[PipelineMetrics] = None, cache_dir: Optional[str] = None,
+                 quality: str = 'raise'):
         """
         Initialize the data loader
         
         Args:
             data_path: Path to the stock data CSV file
+            compact: Parse prices as float32 and dates straight into the index
+            chunksize: Stream the file in chunks of this many rows
+            metrics: Stage metrics reading and validation are recorded in
+                (created if not given)
+            cache_dir: Directory resampled bars are cached in, keyed by input
+                content and timeframe (None keeps them in memory only)
+            quality: How rows failing validation are handled: 'raise' rejects
+                files with missing or non-numeric values or non-positive
+                volumes and only reports other issues, 'quarantine' drops
+                invalid rows into ``quality.quarantine()`` and 'repair' fixes
+                inverted ranges and unsorted dates first (see ``quality.MODES``)
         """
         self.data_path = data_path
+        self.compact = compact
+        self.chunksize = chunksize
+        self.metrics = metrics if metrics is not None else PipelineMetrics()
+        self.cache_dir = cache_dir
+        self.quality = DataQualityChecker(quality)
         self.data = None
+        self.bars = {}
+        self.ingest_stats = {}
         
     def load_data(self) -> pd.DataFrame:
         """
         Load and preprocess stock data from CSV file
         
+        With compact dtypes or a chunk size, the file is streamed through
+        ``iter_chunks`` and the chunks are assembled column by column, so peak
+        memory is about the loaded frame plus one column (not the frame
+        twice). Only consumers of ``iter_chunks`` itself are bounded by the
+        chunk size.
+        
         Returns:
             DataFrame containing preprocessed stock data
         """
         try:
-            self.data = pd.read_csv(self.data_path)
-            self._preprocess_data()
+            start = time.perf_counter()
+            self.quality = DataQualityChecker(self.quality.mode, self.quality.max_missing_sessions)
+            if self.compact or self.chunksize:
+                self.data = self._assemble_chunks(self.iter_chunks())
+            else:
+                with self.metrics.stage('load.read') as stage:
+                    self.data = pd.read_csv(self.data_path)
+                    stage['rows'] = len(self.data)
+                self._preprocess_data()
+            self._record_ingest(len(self.data), time.perf_counter() - start)
             return self.data
         except FileNotFoundError:
             raise FileNotFoundError(f"Data file not found at: {self.data_path}")
         except Exception as e:
             raise Exception(f"Error loading data: {str(e)}")
     
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        Stream the data file in bounded, typed and validated chunks
+        
+        Dates are parsed directly into the index and every chunk is validated
+        as soon as it is read, so peak memory depends on the chunk size rather
+        than on the size of the file. Checks continue across chunk boundaries.
+        With compact dtypes, the kept rows are downcast after validation.
+        
+        Yields:
+            DataFrame chunks indexed by date, without the rows set aside by
+            the quality checks
+        """
+        reader = pd.read_csv(
+            self.data_path,
+            parse_dates=['Date'],
+            index_col='Date',
+            chunksize=self.chunksize or DEFAULT_CHUNKSIZE
+        )
+        with reader:
+            for chunk in reader:
+                chunk = self._validate_data(chunk)
+                if self.compact:
+                    chunk = self._downcast(chunk)
+                yield chunk
+    
+    def resample(self, timeframe: str) -> pd.DataFrame:
+        """
+        Aggregate the loaded bars into a coarser timeframe
+        
+        Loads the data if needed. Aggregated bars are kept per timeframe and,
+        with a cache directory, stored on disk under the digest of the input
+        file, so later runs over the same input skip the aggregation.
+        
+        Args:
+            timeframe: Target timeframe, such as 'weekly' or '1h' (see
+                ``resampling.TIMEFRAMES``)
+        
+        Returns:
+            DataFrame of OHLCV bars indexed by bar start
+        """
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"Unknown timeframe: {timeframe}. Expected one of {TIMEFRAMES}")
+        if timeframe in self.bars:
+            return self.bars[timeframe]
+        if self.data is None:
+            self.load_data()
+        
+        cache = ResultCache(self.cache_dir) if self.cache_dir else None
+        key = None
+        if cache is not None:
+            key = ResultCache.make_key(
+                kind='resample',
+                timeframe=timeframe,
+                input_digest=file_prefix_digest(self.data_path, os.path.getsize(self.data_path)),
+                compact=self.compact,
+                quality=self.quality.mode,
+                resample_version=RESAMPLE_VERSION
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                self.bars[timeframe] = pd.DataFrame(cached['ohlcv'])
+                return self.bars[timeframe]
+        
+        with self.metrics.stage('load.resample', len(self.data)):
+            bars = resample_ohlcv(self.data, timeframe, base=infer_timeframe(self.data.index))
+        if cache is not None:
+            cache.put(key, {'ohlcv': dict(bars.items())}, bars.index)
+        self.bars[timeframe] = bars
+        return bars
+    
+    @staticmethod
+    def _assemble_chunks(chunks: Iterator[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Private helper to concatenate streamed chunks with a low peak
+        
+        Each chunk's columns are copied out so the chunk is freed as soon as
+        it is consumed, and the columns are concatenated one at a time.
+        """
+        columns = {}
+        index_parts = []
+        empty = None
+        for chunk in chunks:
+            empty = chunk.iloc[:0]
+            index_parts.append(chunk.index)
+            for name in chunk.columns:
+                columns.setdefault(name, []).append(chunk[name].to_numpy(copy=True))
+            del chunk
+        if not index_parts:
+            raise ValueError("Data file contains no rows")
+        index = index_parts[0].append(index_parts[1:])
+        del index_parts
+        data = {}
+        for name in list(columns):
+            data[name] = np.concatenate(columns.pop(name))
+        return pd.DataFrame(data, index=index, columns=empty.columns, copy=False)
+    
+    @staticmethod
+    def _downcast(chunk: pd.DataFrame) -> pd.DataFrame:
+        """Private helper to convert a validated chunk to the compact dtypes"""
+        return chunk.assign(**{
+            column: pd.to_numeric(chunk[column], errors='coerce').astype(dtype)
+            for column, dtype in COMPACT_DTYPES.items()
+        })
+    
+    def _record_ingest(self, rows: int, seconds: float):
+        """Private method to record ingest throughput"""
+        self.ingest_stats = {
+            'rows': rows,
+            'seconds': seconds,
+            'rows_per_sec': rows / seconds if seconds > 0 else float('inf')
+        }
+    
     def _preprocess_data(self):
         """Private method to preprocess the data"""
         if self.data is not None:
-            self.data['Date'] = pd.to_datetime(self.data['Date'])
-            self.data.set_index('Date', inplace=True)
-            self._validate_data()
+            with self.metrics.stage('load.preprocess', len(self.data)):
+                self.data['Date'] = pd.to_datetime(self.data['Date'])
+                self.data.set_index('Date', inplace=True)
+            self.data = self._validate_data()
+    
+    def _validate_data(self, data: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Validate the data structure and the rows
+        
+        Every row is checked in one pass for missing or non-numeric values,
+        non-positive prices and volumes, inconsistent OHLC ranges, duplicate
+        or unsorted dates, calendar gaps and probable splits; the issues of
+        every row are kept as a bitmask in ``quality.issues``.
+        
+        Args:
+            data: Frame or chunk to validate (defaults to the loaded data)
+        
+        Returns:
+            The rows kept by the quality checks
+        """
+        if data is None:
+            data = self.data
+        with self.metrics.stage('load.validate', len(data)):
+            self._check_data(data)
+            return self.quality.process(data)
     
-    def _validate_data(self):
-        """Validate the data structure"""
+    def _check_data(self, data: pd.DataFrame):
+        """Private method to check a frame or chunk has the required columns"""
         required_columns = ['Close', 'High', 'Low', 'Open', 'Volume']
-        missing_cols = [col for col in required_columns if col not in self.data.columns]
+        missing_cols = [col for col in required_columns if col not in data.columns]
         if missing_cols:
             raise ValueError(f"Missing required columns: {missing_cols}")
-            
-        # Check for missing or invalid data points
-        if self.data.isna().any().any():
-            raise ValueError("Data contains missing values")
-            
-        # Check for non-numeric values
-        for col in required_columns:
-            if not pd.api.types.is_numeric_dtype(self.data[col]):
-                raise ValueError(f"Column {col} contains non-numeric values")
-            
-        # Check for zero or negative volumes
-        if (self.data['Volume'] <= 0).any():
-            raise ValueError("Volume data contains zero or negative values")
     
     def get_data(self) -> Optional[pd.DataFrame]:
         """Get the preprocessed data"""
@@ -0,0 +1,367 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Seasonalities of daily bars: weekly, monthly and annual trading cycles
+DEFAULT_PERIODS = [5, 21, 252]
+
+# Backfitting sweeps over the periods; each sweep only touches the per-phase
+# statistics, so its cost does not depend on the length of the series
+BACKFIT_ITERATIONS = 20
+
+MODELS = ('additive', 'multiplicative')
+
+
+def centered_trend(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Centered moving average with windows clipped at the edges
+
+    Rows closer than half a window to either end average the rows that
+    exist, so the trend has no NaN edges. Missing values are skipped.
+
+    Args:
+        values: Array of shape (rows, series)
+        window: Odd window length
+
+    Returns:
+        Array of the same shape; NaN only where a window holds no value
+    """
+    n_rows = values.shape[0]
+    half = window // 2
+    finite = ~np.isnan(values)
+    # Cumulative sums relative to each series' first value keep the
+    # differences of large sums accurate
+    reference = values[finite.argmax(axis=0), np.arange(values.shape[1])]
+    reference = np.where(np.isnan(reference), 0.0, reference)
+    sums = np.zeros((n_rows + 1,) + values.shape[1:])
+    np.cumsum(np.where(finite, values - reference, 0.0), axis=0, out=sums[1:])
+    counts = np.zeros(sums.shape)
+    np.cumsum(finite, axis=0, out=counts[1:])
+    rows = np.arange(n_rows)
+    lower = np.maximum(rows - half, 0)
+    upper = np.minimum(rows + half + 1, n_rows)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trend = (sums[upper] - sums[lower]) / (counts[upper] - counts[lower])
+    return trend + reference
+
+
+def phase_sums(values: np.ndarray, start: int, period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum and count the finite values at each phase of a period
+
+    Args:
+        values: Array of shape (rows, series)
+        start: Position of the first row in the full series
+        period: Period length
+
+    Returns:
+        Tuple of the sums and counts, each of shape (period, series)
+    """
+    n_rows, n_columns = values.shape
+    lead = start % period
+    n_cycles = -(-(lead + n_rows) // period)
+    padded = np.full((n_cycles * period, n_columns), np.nan)
+    padded[lead:lead + n_rows] = values
+    cycles = padded.reshape(n_cycles, period, n_columns)
+    finite = ~np.isnan(cycles)
+    return np.where(finite, cycles, 0.0).sum(axis=0), finite.sum(axis=0).astype(np.float64)
+
+
+def cross_counts(finite: np.ndarray, start: int, period: int, other: int) -> np.ndarray:
+    """
+    Count the finite rows at each pair of phases of two periods
+
+    Args:
+        finite: Boolean array of shape (rows, series)
+        start: Position of the first row in the full series
+        period: First period
+        other: Second period
+
+    Returns:
+        Array of shape (period, other, series)
+    """
+    n_rows, n_columns = finite.shape
+    positions = np.arange(start, start + n_rows)
+    cells = (positions % period) * other + positions % other
+    index = cells[:, None] * n_columns + np.arange(n_columns)
+    counts = np.bincount(index[finite], minlength=period * other * n_columns)
+    return counts.reshape(period, other, n_columns).astype(np.float64)
+
+
+def fit_profiles(sums: Dict[int, np.ndarray], counts: Dict[int, np.ndarray],
+                 cross: Dict[Tuple[int, int], np.ndarray],
+                 iterations: int = BACKFIT_ITERATIONS) -> Dict[int, np.ndarray]:
+    """
+    Fit one seasonal profile per period from per-phase statistics
+
+    Each profile is the mean detrended value at each phase after removing
+    the other periods' profiles (backfitting), centered to zero mean. The
+    other profiles' contribution to a phase is read from the phase pair
+    counts, so no pass over the rows is needed.
+
+    Args:
+        sums: Detrended sums per phase, keyed by period
+        counts: Observations per phase, keyed by period
+        cross: Phase pair counts keyed by (period, other) for period < other
+        iterations: Backfitting sweeps
+
+    Returns:
+        Profiles of shape (period, series), keyed by period
+    """
+    periods = sorted(sums)
+    profiles = {period: np.zeros_like(sums[period]) for period in periods}
+    sweeps = iterations if len(periods) > 1 else 1
+    for _ in range(sweeps):
+        for period in periods:
+            residual = sums[period].copy()
+            for other in periods:
+                if other == period:
+                    continue
+                if period < other:
+                    pairs = cross[(period, other)]
+                    residual -= np.einsum('ijk,jk->ik', pairs, profiles[other])
+                else:
+                    pairs = cross[(other, period)]
+                    residual -= np.einsum('jik,jk->ik', pairs, profiles[other])
+            observed = counts[period] > 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                profile = np.where(observed, residual / counts[period], 0.0)
+                total = counts[period].sum(axis=0)
+                mean = np.where(total > 0, (profile * counts[period]).sum(axis=0) / total, 0.0)
+            profiles[period] = np.where(observed, profile - mean, 0.0)
+    return profiles
+
+
+class SeasonalDecomposer:
+    """
+    Decomposition of series into a trend and several seasonal components
+
+    The trend is a centered moving average over ``trend_window`` rows
+    (the longest period by default), clipped at the edges so it has no NaN
+    edges. Each period gets a seasonal profile fitted jointly from the
+    detrended series, and the residual is what neither explains. With the
+    multiplicative model the components are fitted on the log of the series
+    and returned as factors.
+
+    Everything the fit needs is kept as per-phase statistics plus the last
+    ``trend_window`` rows, so ``update`` extends a fit with new rows without
+    revisiting the history, and memory does not grow with the series. Rows
+    less than half a window from the end have a provisional trend until the
+    rows after them arrive; ``update`` returns them again with the revised
+    values. Series are decomposed side by side when given as columns of a
+    2-D array.
+    """
+
+    def __init__(self, periods: Iterable[int] = DEFAULT_PERIODS, model: str = 'additive',
+                 trend_window: Optional[int] = None, iterations: int = BACKFIT_ITERATIONS):
+        """
+        Initialize the decomposer
+
+        Args:
+            periods: Seasonal period lengths in rows
+            model: 'additive' or 'multiplicative'
+            trend_window: Window of the trend moving average; made odd, and
+                the longest period if not given
+            iterations: Backfitting sweeps used to separate the periods
+        """
+        self.periods = sorted(set(int(period) for period in periods))
+        if not self.periods or self.periods[0] < 2:
+            raise ValueError(f"Seasonal periods must be at least 2: {list(periods)}")
+        if model not in MODELS:
+            raise ValueError(f"Unknown decomposition model: {model}")
+        window = int(trend_window or self.periods[-1])
+        self.model = model
+        self.trend_window = window + 1 - window % 2
+        self.iterations = iterations
+        self.rows = 0
+        self.buffer = None
+        self.settled_sums = None
+        self.counts = None
+        self.cross = None
+        self.profiles = None
+
+    def fit(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Decompose a series from scratch
+
+        Args:
+            values: Array of shape (rows,) or (rows, series)
+
+        Returns:
+            Dictionary with 'trend', 'seasonal' (all periods together),
+            'residual' and one 'seasonal_<period>' array per period, each
+            shaped like ``values``
+        """
+        x, is_1d = self._prepare(values)
+        n_columns = x.shape[1]
+        self.rows = 0
+        self.buffer = np.empty((0, n_columns))
+        self.settled_sums = {period: np.zeros((period, n_columns)) for period in self.periods}
+        self.counts = {period: np.zeros((period, n_columns)) for period in self.periods}
+        self.cross = {
+            (period, other): np.zeros((period, other, n_columns))
+            for position, period in enumerate(self.periods) for other in self.periods[position + 1:]
+        }
+        _, components = self._extend(x)
+        return self._finish(components, is_1d)
+
+    def update(self, values: np.ndarray) -> Tuple[int, Dict[str, np.ndarray]]:
+        """
+        Extend the fit with rows appended to the series
+
+        Args:
+            values: New rows, shaped like the rows passed to ``fit``
+
+        Returns:
+            Tuple of the position of the first returned row and the
+            components from that row to the end: the rows whose trend was
+            provisional followed by the new rows
+        """
+        if self.buffer is None:
+            raise ValueError("update() called before fit()")
+        x, is_1d = self._prepare(values)
+        if x.shape[1] != self.buffer.shape[1]:
+            raise ValueError(f"Expected {self.buffer.shape[1]} series, got {x.shape[1]}")
+        start, components = self._extend(x)
+        return start, self._finish(components, is_1d)
+
+    def seasonal_components(self, rows: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Seasonal components under the current profiles
+
+        Every ``update`` refits the profiles, which revises the seasonal
+        components of the whole history; they are read from the profiles
+        without revisiting the rows.
+
+        Args:
+            rows: Number of leading rows to return (defaults to every row fitted)
+
+        Returns:
+            Dictionary with 'seasonal' and one 'seasonal_<period>' array per
+            period, each of shape (rows, series)
+        """
+        if self.profiles is None:
+            raise ValueError("seasonal_components() called before fit()")
+        positions = np.arange(self.rows if rows is None else rows)
+        components = {}
+        seasonal = np.zeros((len(positions), self.buffer.shape[1]))
+        for period in self.periods:
+            component = self.profiles[period][positions % period]
+            components[f'seasonal_{period}'] = component
+            seasonal += component
+        components['seasonal'] = seasonal
+        return self._finish(components, False)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Export the fitted state, for saving with ``np.savez``
+
+        Returns:
+            Dictionary of arrays ``from_arrays`` restores the decomposer from
+        """
+        if self.buffer is None:
+            raise ValueError("to_arrays() called before fit()")
+        arrays = {
+            'periods': np.asarray(self.periods),
+            'model': np.asarray(self.model),
+            'settings': np.asarray([self.trend_window, self.iterations, self.rows]),
+            'buffer': self.buffer
+        }
+        for period in self.periods:
+            arrays[f'settled_sums_{period}'] = self.settled_sums[period]
+            arrays[f'counts_{period}'] = self.counts[period]
+            arrays[f'profiles_{period}'] = self.profiles[period]
+        for (period, other), pairs in self.cross.items():
+            arrays[f'cross_{period}_{other}'] = pairs
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'SeasonalDecomposer':
+        """
+        Restore a decomposer exported with ``to_arrays``
+
+        Args:
+            arrays: Arrays returned by ``to_arrays`` (or the loaded ``.npz``)
+
+        Returns:
+            Decomposer ready for ``update``
+        """
+        trend_window, iterations, rows = (int(value) for value in arrays['settings'])
+        decomposer = cls([int(period) for period in arrays['periods']], str(arrays['model']),
+                         trend_window, iterations)
+        decomposer.rows = rows
+        decomposer.buffer = np.asarray(arrays['buffer'], dtype=np.float64)
+        periods = decomposer.periods
+        decomposer.settled_sums = {period: np.array(arrays[f'settled_sums_{period}']) for period in periods}
+        decomposer.counts = {period: np.array(arrays[f'counts_{period}']) for period in periods}
+        decomposer.profiles = {period: np.array(arrays[f'profiles_{period}']) for period in periods}
+        decomposer.cross = {
+            (period, other): np.array(arrays[f'cross_{period}_{other}'])
+            for position, period in enumerate(periods) for other in periods[position + 1:]
+        }
+        return decomposer
+
+    def _prepare(self, values: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """Private method to convert input rows to a (rows, series) array in model space"""
+        x = np.asarray(values, dtype=np.float64)
+        is_1d = x.ndim == 1
+        x = x[:, None] if is_1d else x
+        if self.model == 'multiplicative':
+            if (x <= 0).any():
+                raise ValueError("Multiplicative decomposition requires positive values")
+            x = np.log(x)
+        return x, is_1d
+
+    def _extend(self, x: np.ndarray) -> Tuple[int, Dict[str, np.ndarray]]:
+        """Private method to fold new rows into the statistics and refit the profiles"""
+        half = self.trend_window // 2
+        old_rows, n_rows = self.rows, self.rows + len(x)
+        offset = old_rows - len(self.buffer)
+        segment = np.concatenate([self.buffer, x])
+
+        # The trend of a row is final once half a window of rows follows it;
+        # earlier rows of the segment are only there to complete the windows
+        first = max(old_rows - half, 0)
+        settled_end = max(n_rows - half, 0)
+        trend = centered_trend(segment, self.trend_window)[first - offset:]
+        detrended = segment[first - offset:] - trend
+        finite = ~np.isnan(x)
+        settled = detrended[:settled_end - first]
+
+        sums = {}
+        for period in self.periods:
+            self.settled_sums[period] += phase_sums(settled, first, period)[0]
+            self.counts[period] += phase_sums(x, old_rows, period)[1]
+            tail_sums = phase_sums(detrended[settled_end - first:], settled_end, period)[0]
+            sums[period] = self.settled_sums[period] + tail_sums
+        for (period, other), pairs in self.cross.items():
+            pairs += cross_counts(finite, old_rows, period, other)
+        self.profiles = fit_profiles(sums, self.counts, self.cross, self.iterations)
+
+        self.rows = n_rows
+        self.buffer = segment[-self.trend_window:].copy()
+
+        observed = segment[first - offset:]
+        positions = np.arange(first, n_rows)
+        components = {'trend': trend}
+        seasonal = np.zeros_like(observed)
+        for period in self.periods:
+            component = self.profiles[period][positions % period]
+            components[f'seasonal_{period}'] = component
+            seasonal += component
+        components['seasonal'] = seasonal
+        components['residual'] = observed - trend - seasonal
+        return first, components
+
+    def _finish(self, components: Dict[str, np.ndarray], is_1d: bool) -> Dict[str, np.ndarray]:
+        """Private method to convert components back from model space"""
+        if self.model == 'multiplicative':
+            components = {name: np.exp(component) for name, component in components.items()}
+        if is_1d:
+            components = {name: component[:, 0] for name, component in components.items()}
+        return components
+
+    @property
+    def component_names(self) -> List[str]:
+        """Names of the returned components"""
+        return ['trend', 'seasonal', 'residual'] + [f'seasonal_{period}' for period in self.periods]
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+from typing import Optional, Union
+
+# Points kept per trace, roughly the pixel width of a wide dashboard chart
+DEFAULT_MAX_POINTS = 2000
+
+# Downsampling methods by name
+METHODS = ('lttb', 'minmax')
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select points with Largest-Triangle-Three-Buckets
+
+    The first and last points are always kept. The points between them are
+    split into ``n_out - 2`` buckets. From each bucket, the point kept is the
+    one forming the largest triangle with the previously kept point and the
+    average of the next bucket, which preserves peaks, troughs and the
+    overall shape of the line.
+
+    Args:
+        x: Increasing x coordinates
+        y: Finite y values
+        n_out: Number of points to keep
+
+    Returns:
+        Sorted positions of the kept points
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    x = x - x[0]
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # Bucket averages from cumulative sums; the last "next bucket" is the final point
+    cum_x = np.concatenate([[0.0], np.cumsum(x)])
+    cum_y = np.concatenate([[0.0], np.cumsum(y)])
+    counts = np.diff(edges)
+    avg_x = np.append((cum_x[edges[1:]] - cum_x[edges[:-1]]) / counts, x[-1])
+    avg_y = np.append((cum_y[edges[1:]] - cum_y[edges[:-1]]) / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        next_x, next_y = avg_x[bucket + 1], avg_y[bucket + 1]
+        area = np.abs(
+            (x[previous] - next_x) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (next_y - y[previous])
+        )
+        previous = lo + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select the minimum and maximum of equal-width buckets
+
+    Keeps every local extreme at bucket resolution, which suits bar charts
+    and noisy series where spikes must stay visible.
+
+    Args:
+        y: Finite y values
+        n_out: Approximate number of points to keep
+
+    Returns:
+        Sorted positions of the kept points
+    """
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    n_buckets = (n_out - 2) // 2
+    size = -(-n // n_buckets)
+    y = np.asarray(y)
+    # Pad with the last value so the data reshapes into whole buckets
+    padded = np.concatenate([y, np.repeat(y[-1:], n_buckets * size - n)]).reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    lows = np.minimum(offsets + padded.argmin(axis=1), n - 1)
+    highs = np.minimum(offsets + padded.argmax(axis=1), n - 1)
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def downsample_series(series: pd.Series, max_points: int = DEFAULT_MAX_POINTS,
+                      start: Optional[Union[str, pd.Timestamp]] = None,
+                      end: Optional[Union[str, pd.Timestamp]] = None,
+                      method: str = 'lttb') -> pd.Series:
+    """
+    Reduce a series to about ``max_points`` points within a date range
+
+    Missing values are dropped first. Series that already fit are returned
+    without resampling, so zooming into a short range shows the raw data.
+
+    Args:
+        series: Series indexed by date
+        max_points: Number of points to keep
+        start: First date of the visible range (defaults to the first row)
+        end: Last date of the visible range (defaults to the last row)
+        method: 'lttb' for lines or 'minmax' for bars and spiky series
+
+    Returns:
+        Downsampled series with the original index labels
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    if start is not None or end is not None:
+        series = series.loc[start:end]
+    series = series.dropna()
+    if len(series) <= max_points:
+        return series
+    values = series.to_numpy()
+    if method == 'lttb':
+        if isinstance(series.index, pd.DatetimeIndex):
+            x = series.index.asi8
+        else:
+            x = np.arange(len(series))
+        positions = lttb_indices(x, values, max_points)
+    else:
+        positions = minmax_indices(values, max_points)
+    return series.iloc[positions]
@@ -0,0 +1,75 @@
+import threading
+
+import pandas as pd
+from typing import Dict, Callable
+
+# Transforms the cache can derive from a data column
+TRANSFORMS: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    'pct_change': lambda series: series.pct_change(),
+    'diff': lambda series: series.diff()
+}
+
+
+class FeatureCache:
+    """
+    Per-dataset cache of series derived from the data columns
+
+    Derived series are keyed by column and transform and built on first
+    use. Later requests return the same Series object, so every analyzer in
+    a run shares one copy. Callers must treat the returned series as
+    read-only. The cache is safe to share between threads.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        """
+        Initialize the feature cache
+
+        Args:
+            data: DataFrame containing stock data
+        """
+        self.data = data
+        self.hits = 0
+        self.misses = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get(self, column: str, transform: str) -> pd.Series:
+        """
+        Get a derived series, building it on first use
+
+        Args:
+            column: Data column the series is derived from
+            transform: Transform name such as 'pct_change'
+
+        Returns:
+            Series aligned with the data
+        """
+        key = (column, transform)
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                return self._cache[key]
+            if transform not in TRANSFORMS:
+                raise ValueError(f"Unknown transform: {transform}")
+            if column not in self.data.columns:
+                raise KeyError(f"Unknown column for derived series: {column}")
+            self.misses += 1
+            series = self._cache[key] = TRANSFORMS[transform](self.data[column])
+            return series
+
+    def pct_change(self, column: str) -> pd.Series:
+        """One-period percentage change of a column"""
+        return self.get(column, 'pct_change')
+
+    def diff(self, column: str) -> pd.Series:
+        """One-period difference of a column"""
+        return self.get(column, 'diff')
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache usage
+
+        Returns:
+            Dictionary with hit, miss and cached series counts
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache)}
@@ -0,0 +1,125 @@
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+# Modules profiled when none are given: the CLI and dashboard entry points
+DEFAULT_MODULES = ['tesla_analysis.main']
+
+# Number of packages and modules listed in the report
+DEFAULT_TOP = 15
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def profile_imports(module: str, python: str = sys.executable) -> pd.DataFrame:
+    """
+    Profile the cold import of a module in a fresh interpreter
+
+    Runs ``python -X importtime -c "import <module>"`` so nothing is already
+    imported, and parses the timings Python writes to stderr.
+
+    Args:
+        module: Dotted name of the module to import
+        python: Interpreter to run
+
+    Returns:
+        DataFrame in import order with the columns 'module', 'package' (the
+        top-level package), 'depth' (nesting below the imports of the module
+        itself), 'self_seconds' and 'cumulative_seconds'
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get('PYTHONPATH')]))
+    completed = subprocess.run(
+        [python, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=env
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr.strip()}")
+
+    records = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # Header line
+            continue
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        records.append({
+            'module': stripped,
+            'package': stripped.split('.')[0],
+            'depth': (len(name) - len(stripped) - 1) // 2,
+            'self_seconds': int(fields[0]) / 1e6,
+            'cumulative_seconds': int(fields[1]) / 1e6
+        })
+    return pd.DataFrame(records, columns=['module', 'package', 'depth', 'self_seconds',
+                                          'cumulative_seconds'])
+
+
+def import_report(profile: pd.DataFrame, top: int = DEFAULT_TOP) -> str:
+    """
+    Format an import profile as a text report
+
+    Args:
+        profile: DataFrame returned by ``profile_imports``
+        top: Number of packages and modules to list
+
+    Returns:
+        Report with the total import time, the packages costing the most
+        (own time of all their modules) and the slowest modules including
+        their imports
+    """
+    total = profile['self_seconds'].sum()
+    lines = [f"Total import time: {total:.3f} s ({len(profile)} modules)", "", "Slowest packages:"]
+    packages = profile.groupby('package')['self_seconds'].agg(['sum', 'count'])
+    for package, row in packages.sort_values('sum', ascending=False).head(top).iterrows():
+        share = row['sum'] / total if total else 0.0
+        lines.append(f"  {package:<40} {row['sum']:8.3f} s {share:6.1%} {int(row['count']):5d} modules")
+    lines.extend(["", "Slowest modules (including their imports):"])
+    for row in profile.nlargest(top, 'cumulative_seconds').itertuples():
+        lines.append(f"  {row.module:<55} {row.cumulative_seconds:8.3f} s")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point for the import-time profile"""
+    parser = argparse.ArgumentParser(description='Profile the cold import time of the package')
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES,
+                        help='Modules to import in a fresh interpreter')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP,
+                        help='Number of packages and modules to list')
+    parser.add_argument('--output', default=None,
+                        help='Write the per-module timings to this CSV file')
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='Fail if importing a module takes longer than this')
+    args = parser.parse_args(argv)
+
+    profiles = []
+    over_budget = []
+    for module in args.modules:
+        profile = profile_imports(module)
+        print(f"== {module}")
+        print(import_report(profile, top=args.top))
+        print()
+        total = profile['self_seconds'].sum()
+        if args.max_seconds is not None and total > args.max_seconds:
+            over_budget.append(f"{module}: {total:.3f} s > {args.max_seconds:.3f} s")
+        profiles.append(profile.assign(target=module))
+    if args.output:
+        pd.concat(profiles, ignore_index=True).to_csv(args.output, index=False)
+    if over_budget:
+        print("Import time over budget:")
+        for message in over_budget:
+            print(f"  {message}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
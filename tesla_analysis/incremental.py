@@ -0,0 +1,621 @@
+import hashlib
+import json
+import math
+import os
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .rolling import rolling_window_stats, block_groups, history_rows
+from .indicators import ewm_mean, ewm_tables, ema_alpha, wilder_alpha
+from .analyzers import PriceAnalyzer, VolumeAnalyzer, TechnicalAnalyzer, SentimentAnalyzer, SeasonalAnalyzer
+from .decomposition import SeasonalDecomposer
+from .quality import INVALID
+
+STATE_FILE = 'incremental_state.json'
+
+# Fitted multi-period seasonal decomposer, saved next to the state as arrays
+SEASONAL_FILE = 'seasonal_state.npz'
+
+# Layout version of the saved state; older states are discarded
+STATE_VERSION = 5
+
+# Rows at the end of a full run that are replayed through the seeded state
+# and compared with the analyzers' results before the state is saved
+VERIFY_ROWS = 512
+
+# Analysis groups whose outputs depend on the whole history and are
+# recomputed in full (centered decomposition, full-sample correlation/PCA);
+# multi-period decompositions are updated through the saved decomposer instead
+GLOBAL_ANALYSES = ['seasonal_analysis', 'correlation_analysis']
+
+
+class OnlineState:
+    """Base class for row-by-row indicator state that can be persisted as JSON"""
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the state to JSON-compatible values"""
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, attrs: Dict[str, Any]) -> 'OnlineState':
+        """Restore a state serialized with ``to_dict``"""
+        state = cls.__new__(cls)
+        state.__dict__.update(attrs)
+        return state
+
+
+class RollingWindowState(OnlineState):
+    """
+    Tail of a series kept for extending fused rolling statistics
+
+    Values from the kernel only depend on the data of their own block and
+    its halo, so rerunning the kernel on the buffered tail plus the new rows
+    reproduces a full recompute exactly.
+    """
+
+    def __init__(self, requests: Dict[str, List[int]]):
+        self.requests = requests
+        self.start = 0
+        self.buffer = []
+
+    def extend(self, values: np.ndarray) -> Dict[Tuple[str, int], np.ndarray]:
+        """Add new observations and return their rolling statistics"""
+        history = np.asarray(self.buffer, dtype=np.float64)
+        combined = np.concatenate([history, np.asarray(values, dtype=np.float64)])
+        outputs = rolling_window_stats(combined, self.requests, start=self.start)
+        # Keep the block the next row falls in together with its halo block
+        total = self.start + len(combined)
+        block = history_rows(self.requests)
+        keep_from = max(0, (total // block - 1) * block)
+        self.buffer = combined[keep_from - self.start:].tolist()
+        self.start = keep_from
+        return {key: output[len(history):] for key, output in outputs.items()}
+
+    def seed(self, values: np.ndarray):
+        """Set the state as if ``values`` had been fed through it from the start"""
+        block = history_rows(self.requests)
+        self.start = max(0, (len(values) // block - 1) * block)
+        self.buffer = np.asarray(values[self.start:], dtype=np.float64).tolist()
+
+
+class StreamingWindowState(OnlineState):
+    """
+    Constant-time-per-row replica of the fused rolling kernel
+
+    Repeats the kernel's arithmetic one row at a time: running sums of each
+    block centred on its first finite value, and, for windows reaching into
+    the previous block, that block's partial sums re-centred with the same
+    operations in the same order. Windows computed with different block
+    sizes (``rolling.block_groups``) keep their own running sums. The
+    results are therefore identical to the kernel's for sums, means and
+    standard deviations, while every row costs O(1) per window.
+    """
+
+    def __init__(self, requests: Dict[str, List[int]]):
+        for stat, windows in requests.items():
+            if stat not in ('sum', 'mean', 'std'):
+                raise ValueError(f"Unsupported streaming statistic: {stat}")
+            if windows and min(windows) < 1:
+                raise ValueError(f"Rolling windows must be at least 1: {windows}")
+        self.requests = requests
+        self.rows = 0
+        self.groups = [
+            {
+                'block': block,
+                'requests': group,
+                'reference': None,
+                'prev_reference': 0.0,
+                'sum_1': [0.0],
+                'sum_2': [0.0],
+                # The block before the first one is padding with zero running sums
+                'prev_sum_1': [0.0] * (block + 1),
+                'prev_sum_2': [0.0] * (block + 1)
+            }
+            for block, group in block_groups(requests).items()
+        ]
+        self.history = history_rows(requests)
+        self.nan_total = 0
+        self.nan_counts = [0]
+
+    def update(self, value: float) -> Dict[Tuple[str, int], float]:
+        """Add the next observation and return its rolling statistics"""
+        is_observation = not math.isnan(value)
+        rows = self.rows
+        self.rows += 1
+        self.nan_total += not is_observation
+        self.nan_counts.append(self.nan_total)
+        if len(self.nan_counts) > self.history + 1:
+            del self.nan_counts[0]
+
+        outputs = {}
+        for group in self.groups:
+            block = group['block']
+            position = rows % block
+            if position == 0 and rows:
+                group['prev_sum_1'], group['sum_1'] = group['sum_1'], [0.0]
+                group['prev_sum_2'], group['sum_2'] = group['sum_2'], [0.0]
+                group['prev_reference'] = 0.0 if group['reference'] is None else group['reference']
+                group['reference'] = None
+            if is_observation and group['reference'] is None:
+                group['reference'] = value
+            centred = value - group['reference'] if is_observation else 0.0
+            group['sum_1'].append(group['sum_1'][-1] + centred)
+            group['sum_2'].append(group['sum_2'][-1] + centred * centred)
+            for stat, windows in group['requests'].items():
+                for window in windows:
+                    outputs[(stat, window)] = self._statistic(group, stat, window, position)
+        return outputs
+
+    def _statistic(self, group: Dict[str, Any], stat: str, window: int, position: int) -> float:
+        """Private method to compute one statistic for the latest row"""
+        if self.rows < window or self.nan_counts[-1] != self.nan_counts[-1 - window]:
+            return math.nan
+        sum_1, sum_2 = group['sum_1'], group['sum_2']
+        reference = group['reference']
+        if position >= window - 1:
+            s1 = sum_1[position + 1] - sum_1[position + 1 - window]
+            if stat == 'std':
+                s2 = sum_2[position + 1] - sum_2[position + 1 - window]
+        else:
+            # The window reaches back into the previous block
+            block = group['block']
+            prev_1, prev_2 = group['prev_sum_1'], group['prev_sum_2']
+            shift = group['prev_reference'] - reference
+            crossing = float(window - 1 - position)
+            tail_1 = prev_1[block] - prev_1[block - window + 1 + position]
+            s1 = sum_1[position + 1] + (tail_1 + crossing * shift)
+            if stat == 'std':
+                tail_2 = prev_2[block] - prev_2[block - window + 1 + position]
+                s2 = sum_2[position + 1] + (tail_2 + 2 * shift * tail_1 + crossing * shift * shift)
+        if stat == 'sum':
+            return reference * window + s1
+        if stat == 'mean':
+            return s1 / window + reference
+        if window == 1:
+            return math.nan
+        variance = max((s2 - s1 * s1 / window) / (window - 1), 0.0)
+        return math.sqrt(variance)
+
+
+class EwmMeanState(OnlineState):
+    """
+    Online exponentially weighted mean
+
+    Repeats the blocked scan of ``indicators.ewm_mean`` one row at a time,
+    carrying the block's running sum and the value carried in from the
+    previous block, so the EMA carry reproduces a full recompute exactly.
+    """
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.rows = 0
+        self.nobs = 0
+        self.running = 0.0
+        self.carried = 0.0
+
+    def update(self, value: float) -> float:
+        """Add the next observation and return the weighted mean"""
+        block, scale, inverse, forward = ewm_tables(self.alpha)
+        position = self.rows % block
+        if position == 0:
+            self.running = 0.0
+        if math.isnan(value):
+            if self.nobs:
+                raise ValueError("Missing values after the first observation are not supported")
+            term = 0.0
+        elif self.nobs == 0:
+            term = value * float(inverse[position])
+        else:
+            term = value * float(scale[position])
+        self.nobs += not math.isnan(value)
+        self.rows += 1
+        self.running += term
+        weighted = (self.running + self.carried) * float(forward[position])
+        if position == block - 1:
+            self.carried = (1.0 - self.alpha) * weighted
+        return weighted if self.nobs >= max(self.min_periods, 1) else math.nan
+
+    def seed(self, values: np.ndarray):
+        """
+        Set the state as if ``values`` had been fed through it from the start
+
+        The carry into the last block is taken from the vectorized scan, so
+        only the rows of the last block are fed through ``update``.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        block = ewm_tables(self.alpha)[0]
+        boundary = len(values) // block * block
+        finite = ~np.isnan(values[:boundary])
+        self.rows = boundary
+        self.nobs = int(finite.sum())
+        self.running = 0.0
+        self.carried = 0.0
+        if self.nobs:
+            if not finite[finite.argmax():].all():
+                raise ValueError("Missing values after the first observation are not supported")
+            scanned = ewm_mean(values[:boundary], [self.alpha], [1])[0]
+            self.carried = float((1.0 - self.alpha) * scanned[-1])
+        for value in values[boundary:].tolist():
+            self.update(value)
+
+
+class PctChangeState(OnlineState):
+    """Online one-period percentage change"""
+
+    def __init__(self):
+        self.prev_value = None
+
+    def update(self, value: float) -> float:
+        """Add the next observation and return its change from the previous one"""
+        prev_value, self.prev_value = self.prev_value, value
+        if prev_value is None:
+            return math.nan
+        return value / prev_value - 1
+
+    def seed(self, values: np.ndarray):
+        """Set the state as if ``values`` had been fed through it from the start"""
+        self.prev_value = float(values[-1]) if len(values) else None
+
+
+class RsiState(OnlineState):
+    """Online Wilder RSI carrying the average gain and loss"""
+
+    def __init__(self, window: int):
+        self.prev_value = None
+        self.avg_gain = EwmMeanState(wilder_alpha(window), window)
+        self.avg_loss = EwmMeanState(wilder_alpha(window), window)
+
+    def update(self, value: float) -> float:
+        """Add the next close and return the RSI"""
+        diff = math.nan if self.prev_value is None else value - self.prev_value
+        self.prev_value = value
+        gain = self.avg_gain.update(diff if diff > 0 else 0.0)
+        loss = self.avg_loss.update(-diff if diff < 0 else 0.0)
+        if loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + gain / loss))
+
+    def seed(self, values: np.ndarray):
+        """Set the state as if ``values`` had been fed through it from the start"""
+        values = np.asarray(values, dtype=np.float64)
+        diff = np.full(len(values), np.nan)
+        diff[1:] = values[1:] - values[:-1]
+        # The first change is undefined and counts as neither gain nor loss
+        self.avg_gain.seed(np.where(diff > 0, diff, 0.0))
+        self.avg_loss.seed(np.where(diff < 0, -diff, 0.0))
+        self.prev_value = float(values[-1]) if len(values) else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'prev_value': self.prev_value,
+            'avg_gain': self.avg_gain.to_dict(),
+            'avg_loss': self.avg_loss.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, attrs: Dict[str, Any]) -> 'RsiState':
+        state = cls.__new__(cls)
+        state.prev_value = attrs['prev_value']
+        state.avg_gain = EwmMeanState.from_dict(attrs['avg_gain'])
+        state.avg_loss = EwmMeanState.from_dict(attrs['avg_loss'])
+        return state
+
+
+def file_prefix_digest(path: str, n_bytes: int) -> str:
+    """
+    Hash the first bytes of a file
+
+    Args:
+        path: Path to the file
+        n_bytes: Number of leading bytes to hash
+
+    Returns:
+        Hex SHA-256 digest of the prefix
+    """
+    digest = hashlib.sha256()
+    remaining = n_bytes
+    with open(path, 'rb') as f:
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+class IncrementalState:
+    """
+    Rolling state for every indicator that can be extended row by row
+
+    Rolling window tails, EMA carries and RSI average gain/loss are kept next to
+    the stored results together with a fingerprint of the input consumed so
+    far. When rows are appended to the input only the new rows are fed
+    through the state, which costs O(new rows) per indicator. A fitted
+    multi-period seasonal decomposer can be kept in ``decomposer`` as well.
+    """
+
+    def __init__(self, quality: str = 'raise', compact: bool = False,
+                 seasonal_method: Optional[str] = None):
+        """
+        Initialize empty state for the analyzers' current parameters
+
+        Args:
+            quality: Data quality mode the input is loaded with
+            compact: Whether the input is loaded with compact dtypes
+            seasonal_method: Seasonal decomposition method of the run
+                (defaults to ``SeasonalAnalyzer.PARAMETERS['method']``)
+        """
+        self.rows = 0
+        self.input_rows = 0
+        self.input_bytes = 0
+        self.input_digest = ''
+        self.parameters = self.analyzer_parameters()
+        self.parameters['loader'] = {'quality': quality, 'compact': compact}
+        if seasonal_method is not None:
+            self.parameters['seasonal']['method'] = seasonal_method
+        self.decomposer = None
+        price = self.parameters['price']
+        technical = self.parameters['technical']
+        close_means = sorted(set(price['sma_windows']) | {technical['bollinger_window']})
+        self.states = {
+            'close_rolling': RollingWindowState({'mean': close_means, 'std': [technical['bollinger_window']]}),
+            'close_pct': PctChangeState(),
+            'close_rsi': RsiState(technical['rsi_window']),
+            'returns_rolling': RollingWindowState({'std': [self.parameters['sentiment']['volatility_window']]}),
+            'volume_rolling': RollingWindowState({'mean': sorted(set(self.parameters['volume']['windows']))}),
+            'volume_pct': PctChangeState()
+        }
+        for window in price['ema_windows']:
+            self.states[f'close_ema_{window}'] = EwmMeanState(ema_alpha(window), window)
+
+    @staticmethod
+    def analyzer_parameters() -> Dict[str, Dict[str, Any]]:
+        """
+        Collect the parameters of the analyzers the state reproduces
+
+        Returns:
+            JSON-compatible copy of each analyzer's ``PARAMETERS``; a saved
+            state is only reused while these are unchanged
+        """
+        return json.loads(json.dumps({
+            'price': PriceAnalyzer.PARAMETERS,
+            'volume': VolumeAnalyzer.PARAMETERS,
+            'technical': TechnicalAnalyzer.PARAMETERS,
+            'sentiment': SentimentAnalyzer.PARAMETERS,
+            'seasonal': SeasonalAnalyzer.PARAMETERS
+        }))
+
+    def extend(self, data: pd.DataFrame) -> Dict[str, pd.Series]:
+        """
+        Feed new rows through the state
+
+        Args:
+            data: DataFrame containing the rows appended since the last update
+
+        Returns:
+            Dictionary mapping result keys to the new values of each series
+        """
+        states = self.states
+        price = self.parameters['price']
+        technical = self.parameters['technical']
+        ema_keys = [f'ema_{window}' for window in price['ema_windows']]
+        rows = {key: [] for key in ema_keys + ['returns', 'rsi', 'volume_change']}
+        closes = data['Close'].to_numpy(dtype=np.float64)
+        volumes = data['Volume'].to_numpy(dtype=np.float64)
+        # Recursive indicators are carried row by row
+        ema_states = [(rows[key], states[f'close_{key}']) for key in ema_keys]
+        for close, volume in zip(closes.tolist(), volumes.tolist()):
+            for values, state in ema_states:
+                values.append(state.update(close))
+            rows['returns'].append(states['close_pct'].update(close))
+            rows['rsi'].append(states['close_rsi'].update(close))
+            rows['volume_change'].append(states['volume_pct'].update(volume))
+        rows = {key: np.asarray(values, dtype=np.float64) for key, values in rows.items()}
+
+        # Windowed indicators are extended in one kernel call per series
+        close_stats = states['close_rolling'].extend(closes)
+        volume_stats = states['volume_rolling'].extend(volumes)
+        returns_stats = states['returns_rolling'].extend(rows['returns'])
+
+        band_window = technical['bollinger_window']
+        band_mean = close_stats[('mean', band_window)]
+        band_std = close_stats[('std', band_window)]
+        outputs = {
+            'price_trend/price_change': rows['returns'],
+            'volume_analysis/volume_change': rows['volume_change'],
+            'technical_analysis/rsi': rows['rsi'],
+            'technical_analysis/bollinger_bands/upper': band_mean + (band_std * technical['bollinger_std']),
+            'technical_analysis/bollinger_bands/lower': band_mean - (band_std * technical['bollinger_std']),
+            'sentiment_analysis/returns': rows['returns'],
+            'sentiment_analysis/volatility': returns_stats[('std', self.parameters['sentiment']['volatility_window'])]
+        }
+        for window in price['sma_windows']:
+            outputs[f'price_trend/moving_averages/sma_{window}'] = close_stats[('mean', window)]
+        for key in ema_keys:
+            outputs[f'price_trend/moving_averages/{key}'] = rows[key]
+        for window in self.parameters['volume']['windows']:
+            outputs[f'volume_analysis/volume_averages/volume_ma_{window}'] = volume_stats[('mean', window)]
+        positive = np.flatnonzero(rows['returns'] > 0)
+        negative = np.flatnonzero(rows['returns'] < 0)
+
+        series = {key: pd.Series(values, index=data.index, dtype=float) for key, values in outputs.items()}
+        series['sentiment_analysis/volume_sentiment/positive_volume'] = data['Volume'].iloc[positive]
+        series['sentiment_analysis/volume_sentiment/negative_volume'] = data['Volume'].iloc[negative]
+        self.rows += len(data)
+        return series
+
+    def seed(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Set the state from the leading rows of the data without replaying them
+
+        Window buffers and previous values are copied from the tail of the
+        rows, and EMA carries from the vectorized scan, so only the last
+        block of each recursive indicator is fed through row by row.
+
+        Args:
+            data: Preprocessed data of a full run
+
+        Returns:
+            The last ``VERIFY_ROWS`` rows, which are left for ``extend`` so
+            its output can be checked against the full run with ``verify``
+        """
+        head = data.iloc[:max(0, len(data) - VERIFY_ROWS)]
+        closes = head['Close'].to_numpy(dtype=np.float64)
+        returns = np.full(len(closes), np.nan)
+        returns[1:] = closes[1:] / closes[:-1] - 1
+        inputs = {'close': closes, 'returns': returns, 'volume': head['Volume'].to_numpy(dtype=np.float64)}
+        # States are named after the series they consume
+        for name, state in self.states.items():
+            state.seed(inputs[name.split('_')[0]])
+        self.rows = len(head)
+        return data.iloc[len(head):]
+
+    def verify(self, series: Dict[str, pd.Series], results: Dict[str, Any]) -> bool:
+        """
+        Check replayed series against the last rows of a full recompute
+
+        Args:
+            series: Series produced by ``extend`` over the last rows of the
+                input
+            results: Nested analysis results from the analyzers
+
+        Returns:
+            True when every series matches the end of its result bit for bit
+        """
+        for key, values in series.items():
+            node = results
+            for part in key.split('/'):
+                if not isinstance(node, dict) or part not in node:
+                    return False
+                node = node[part]
+            if not isinstance(node, pd.Series) or len(node) < len(values):
+                return False
+            node = node.iloc[len(node) - len(values):]
+            if not node.index.equals(values.index):
+                return False
+            if not np.array_equal(node.to_numpy(dtype=float), values.to_numpy(dtype=float), equal_nan=True):
+                return False
+        return True
+
+    def record_input(self, data_path: str, input_rows: int):
+        """
+        Fingerprint the input file the state has consumed
+
+        Args:
+            data_path: Path to the stock data CSV file
+            input_rows: Rows read from the file, including rows the quality
+                checks set aside
+        """
+        self.input_rows = input_rows
+        self.input_bytes = os.path.getsize(data_path)
+        self.input_digest = file_prefix_digest(data_path, self.input_bytes)
+
+    def is_appended(self, data_path: str, data: pd.DataFrame, stored_index: pd.Index,
+                    issues: np.ndarray) -> bool:
+        """
+        Check whether the input only gained rows since the state was saved
+
+        Appended rows that 'quarantine' or 'repair' would drop or move (such
+        as a row dated before the stored ones) can change the loaded rows
+        before the new ones, so they require a full recompute.
+
+        Args:
+            data_path: Path to the stock data CSV file
+            data: Preprocessed data loaded from the file
+            stored_index: Date index of the stored results
+            issues: Quality issue bitmask of every row read from the file
+
+        Returns:
+            True when the previously consumed bytes are unchanged and the
+            loaded data starts with the stored rows
+        """
+        if len(stored_index) != self.rows or len(data) < self.rows:
+            return False
+        if not data.index[:self.rows].equals(stored_index):
+            return False
+        if self.parameters['loader']['quality'] != 'raise' and (issues[self.input_rows:] & INVALID).any():
+            return False
+        if os.path.getsize(data_path) < self.input_bytes:
+            return False
+        return file_prefix_digest(data_path, self.input_bytes) == self.input_digest
+
+    def save(self, results_path: str):
+        """Save the state next to the stored results"""
+        payload = {
+            'version': STATE_VERSION,
+            'rows': self.rows,
+            'input_rows': self.input_rows,
+            'input_bytes': self.input_bytes,
+            'input_digest': self.input_digest,
+            'parameters': self.parameters,
+            'seasonal': self.decomposer is not None,
+            'states': {name: state.to_dict() for name, state in self.states.items()}
+        }
+        seasonal_path = os.path.join(results_path, SEASONAL_FILE)
+        if self.decomposer is not None:
+            tmp_path = seasonal_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **self.decomposer.to_arrays())
+            os.replace(tmp_path, seasonal_path)
+        elif os.path.exists(seasonal_path):
+            os.remove(seasonal_path)
+        # The state file is replaced last, so it never refers to a missing decomposer
+        tmp_path = os.path.join(results_path, STATE_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, os.path.join(results_path, STATE_FILE))
+
+    @classmethod
+    def load(cls, results_path: str, quality: str = 'raise', compact: bool = False,
+             seasonal_method: Optional[str] = None) -> Optional['IncrementalState']:
+        """
+        Load the state saved next to the stored results
+
+        Args:
+            results_path: Directory the results are stored in
+            quality: Data quality mode the input is loaded with
+            compact: Whether the input is loaded with compact dtypes
+            seasonal_method: Seasonal decomposition method of the run
+
+        Returns:
+            The saved state, or None if there is none, it has an older layout
+            or it was built for other analyzer parameters or loader settings
+        """
+        state_path = os.path.join(results_path, STATE_FILE)
+        if not os.path.exists(state_path):
+            return None
+        with open(state_path) as f:
+            payload = json.load(f)
+        if payload.get('version') != STATE_VERSION:
+            return None
+        state = cls(quality, compact, seasonal_method)
+        if payload['parameters'] != state.parameters:
+            return None
+        if payload['seasonal']:
+            seasonal_path = os.path.join(results_path, SEASONAL_FILE)
+            if not os.path.exists(seasonal_path):
+                return None
+            with np.load(seasonal_path) as arrays:
+                state.decomposer = SeasonalDecomposer.from_arrays(arrays)
+        state.rows = payload['rows']
+        state.input_rows = payload['input_rows']
+        state.input_bytes = payload['input_bytes']
+        state.input_digest = payload['input_digest']
+        state.states = {
+            name: type(state.states[name]).from_dict(attrs)
+            for name, attrs in payload['states'].items()
+        }
+        return state
+
+    @staticmethod
+    def clear(results_path: str):
+        """Remove any saved state so stale state is never reused"""
+        for file_name in (STATE_FILE, SEASONAL_FILE):
+            path = os.path.join(results_path, file_name)
+            if os.path.exists(path):
+                os.remove(path)
+
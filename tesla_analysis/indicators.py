@@ -0,0 +1,303 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .rolling import rolling_window_stats
+
+# Longest run of rows covered by one cumulative sum of the EWM scan
+EWM_BLOCK_SIZE = 256
+
+# Largest power of the decay a value is scaled by inside a block; keeps the
+# scan far from overflow for any smoothing factor
+MAX_BLOCK_SCALE_DIGITS = 64
+
+# Below this many series the carry between blocks runs on Python floats
+SCALAR_CARRY_LIMIT = 16
+
+
+def span_to_com(span: int) -> float:
+    """Convert an EWM span to its centre of mass like pandas does"""
+    return (span - 1) / 2.0
+
+
+def alpha_to_com(alpha: float) -> float:
+    """Convert an EWM smoothing factor to its centre of mass like pandas does"""
+    return (1 - alpha) / alpha
+
+
+def ema_alpha(window: int) -> float:
+    """Smoothing factor of an EMA with the given span"""
+    return 1.0 / (1.0 + span_to_com(window))
+
+
+def wilder_alpha(window: int) -> float:
+    """Smoothing factor of Wilder's smoothing over the given window, as used by the RSI"""
+    return 1.0 / (1.0 + alpha_to_com(1 / window))
+
+
+@lru_cache(maxsize=None)
+def ewm_tables(alpha: float) -> Tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Block length and decay powers of the blocked EWM scan
+
+    Args:
+        alpha: Smoothing factor in (0, 1]
+
+    Returns:
+        Tuple of the block length and the arrays ``alpha * decay ** -j``,
+        ``decay ** -j`` and ``decay ** j`` for each row ``j`` of a block
+    """
+    if not 0 < alpha <= 1:
+        raise ValueError(f"Smoothing factor must be in (0, 1]: {alpha}")
+    decay = 1.0 - alpha
+    if decay == 0:
+        block = 1
+    else:
+        block = int(min(EWM_BLOCK_SIZE, 1 + MAX_BLOCK_SCALE_DIGITS / -np.log10(decay)))
+    powers = np.arange(block, dtype=np.float64)
+    inverse = np.power(decay, -powers)
+    tables = (np.multiply(alpha, inverse), inverse, np.power(decay, powers))
+    for table in tables:
+        table.flags.writeable = False
+    return (block,) + tables
+
+
+def ewm_mean(values: np.ndarray, alphas: Sequence[float], min_periods: Sequence[int]) -> np.ndarray:
+    """
+    Exponentially weighted means for several smoothing factors in one pass
+
+    Computes ``ewm(alpha=..., min_periods=..., adjust=False).mean()``
+    without a per-row Python loop. Rows are split into blocks; within a
+    block, each value is scaled by a power of the decay so the recursion
+    becomes one cumulative sum, and only the value at the end of each block
+    is carried to the next. Results agree with pandas to within a few units
+    in the last place.
+
+    Leading NaNs are skipped like pandas does. Series with gaps after their
+    first value are computed with pandas' gap weighting, one row at a time.
+
+    Args:
+        values: Array of shape (rows,) or (rows, series)
+        alphas: Smoothing factors
+        min_periods: Minimum number of observations for each smoothing factor
+
+    Returns:
+        Array of shape (len(alphas),) + values.shape
+    """
+    x = np.asarray(values, dtype=np.float64)
+    is_1d = x.ndim == 1
+    x = x[:, None] if is_1d else x
+    n_rows, n_columns = x.shape
+    alphas = list(alphas)
+
+    finite = ~np.isnan(x)
+    if finite.all():
+        # Common case: every series is complete and starts at the first row
+        output = _ewm_grid(x, np.zeros(n_columns, dtype=np.int64), alphas)
+        for position, periods in enumerate(min_periods):
+            output[position, :max(periods, 1) - 1] = np.nan
+        return output[:, :, 0] if is_1d else output
+
+    output = np.full((len(alphas), n_rows, n_columns), np.nan)
+    first = np.where(finite.any(axis=0), finite.argmax(axis=0), n_rows)
+    rows = np.arange(n_rows)[:, None]
+    has_gaps = ((rows > first) & ~finite).any(axis=0)
+    clean = np.flatnonzero(~has_gaps & (first < n_rows))
+    gapped = np.flatnonzero(has_gaps)
+    if len(clean):
+        first_clean = first[clean]
+        scanned = _ewm_grid(np.where(finite[:, clean], x[:, clean], 0.0), first_clean, alphas)
+        # Rows before the first value, and before min_periods observations, are NaN
+        for position, periods in enumerate(min_periods):
+            valid = rows >= first_clean + max(periods, 1) - 1
+            output[position][:, clean] = np.where(valid, scanned[position], np.nan)
+    if len(gapped):
+        output[:, :, gapped] = _ewm_mean_gaps(x[:, gapped], alphas, min_periods)
+    return output[:, :, 0] if is_1d else output
+
+
+def _ewm_grid(x: np.ndarray, first: np.ndarray, alphas: List[float]) -> np.ndarray:
+    """Private function to scan finite series for every smoothing factor"""
+    # Smoothing factors sharing a block length are scanned together
+    groups = {}
+    for position, alpha in enumerate(alphas):
+        groups.setdefault(ewm_tables(alpha)[0], []).append(position)
+    if len(groups) == 1:
+        return _ewm_scan(x, first, alphas)
+    output = np.empty((len(alphas),) + x.shape)
+    for positions in groups.values():
+        output[positions] = _ewm_scan(x, first, [alphas[p] for p in positions])
+    return output
+
+
+def _ewm_scan(x: np.ndarray, first: np.ndarray, alphas: List[float]) -> np.ndarray:
+    """
+    Private function for the blocked scan of finite series
+
+    Rows are split into blocks along time and every series is scanned
+    side by side. Values before ``first`` must be zero, and the smoothing
+    factors must share a block length. Returns an array of shape
+    (len(alphas),) + x.shape.
+    """
+    n_rows, n_columns = x.shape
+    n_alphas = len(alphas)
+    tables = [ewm_tables(alpha) for alpha in alphas]
+    block = tables[0][0]
+    scale, inverse, forward = (np.stack([table[i] for table in tables]) for i in (1, 2, 3))
+    n_blocks = -(-n_rows // block)
+    n_full = n_rows // block
+
+    # Within a block, row j enters as alpha * decay ** -j * x, except the
+    # first value of a series, which enters as decay ** -j * x
+    terms = np.empty((n_alphas, n_blocks * block, n_columns))
+    terms[:, n_rows:] = 0.0
+    blocks = terms.reshape(n_alphas, n_blocks, block, n_columns)
+    np.multiply(x[:n_full * block].reshape(1, n_full, block, n_columns), scale[:, None, :, None],
+                out=blocks[:, :n_full])
+    if n_full < n_blocks:
+        partial = n_rows - n_full * block
+        np.multiply(x[n_full * block:], scale[:, :partial, None], out=blocks[:, -1, :partial])
+    columns = np.arange(n_columns)
+    terms[:, first, columns] = x[first, columns] * inverse[:, first % block]
+    np.cumsum(blocks, axis=2, out=blocks)
+
+    # Carry the value at the end of each block into the next one:
+    # y[j] = decay ** j * (running sum[j] + decay * y at the previous block end)
+    decays = np.array([1.0 - alpha for alpha in alphas])[:, None]
+    end_scales = forward[:, -1:]
+    carried = np.empty((n_alphas, n_blocks, 1, n_columns))
+    if n_alphas * n_columns < SCALAR_CARRY_LIMIT:
+        # Few series: plain floats avoid NumPy call overhead per block
+        block_ends = blocks[:, :, -1].tolist()
+        for a in range(n_alphas):
+            decay, end_scale = float(decays[a, 0]), float(end_scales[a, 0])
+            for column in range(n_columns):
+                series_carried = carried[a, :, 0, column]
+                end = 0.0
+                for k, local_ends in enumerate(block_ends[a]):
+                    series_carried[k] = decay * end
+                    end = (local_ends[column] + decay * end) * end_scale
+    else:
+        end = np.zeros((n_alphas, n_columns))
+        for k in range(n_blocks):
+            np.multiply(decays, end, out=carried[:, k, 0])
+            end = (blocks[:, k, -1] + carried[:, k, 0]) * end_scales
+    np.add(blocks, carried, out=blocks)
+    np.multiply(blocks, forward[:, None, :, None], out=blocks)
+    return terms[:, :n_rows]
+
+
+def _ewm_mean_gaps(x: np.ndarray, alphas: List[float], min_periods: Sequence[int]) -> np.ndarray:
+    """
+    Row-by-row pandas recursion for series with gaps
+
+    While values are missing, the weight of the running mean keeps decaying,
+    so the first value after a gap gets more weight, as in pandas.
+    """
+    n_rows, n_columns = x.shape
+    alphas = np.asarray(alphas)[:, None]
+    keep = 1.0 - alphas
+    periods = np.asarray(min_periods)[:, None]
+    output = np.empty((len(alphas), n_rows, n_columns))
+    weighted = np.full((len(alphas), n_columns), np.nan)
+    old_weight = np.ones_like(weighted)
+    observations = np.zeros(n_columns, dtype=np.int64)
+    for row in range(n_rows):
+        value = x[row]
+        is_observation = ~np.isnan(value)
+        observations += is_observation
+        started = ~np.isnan(weighted)
+        old_weight = np.where(started, old_weight * keep, old_weight)
+        updated = (old_weight * weighted + alphas * value) / (old_weight + alphas)
+        carry = started & is_observation
+        weighted = np.where(carry & (weighted != value), updated, np.where(started, weighted, value))
+        old_weight = np.where(carry, 1.0, old_weight)
+        output[:, row] = np.where(observations >= periods, weighted, np.nan)
+    return output
+
+
+def sma(values: np.ndarray, windows: Iterable[int]) -> np.ndarray:
+    """
+    Simple moving averages for several windows in one pass
+
+    Args:
+        values: Array of shape (rows,) or (rows, series)
+        windows: Window lengths
+
+    Returns:
+        Array of shape (len(windows),) + values.shape
+    """
+    windows = list(windows)
+    means = rolling_window_stats(values, {'mean': windows})
+    return np.stack([means[('mean', window)] for window in windows])
+
+
+def ema(values: np.ndarray, windows: Iterable[int]) -> np.ndarray:
+    """
+    Exponential moving averages for several spans in one pass
+
+    Matches ``EMAIndicator(close, window).ema_indicator()``: the span sets
+    the smoothing factor and the minimum number of observations.
+
+    Args:
+        values: Array of shape (rows,) or (rows, series)
+        windows: EMA spans
+
+    Returns:
+        Array of shape (len(windows),) + values.shape
+    """
+    windows = list(windows)
+    return ewm_mean(values, [ema_alpha(window) for window in windows], windows)
+
+
+def rsi(values: np.ndarray, windows: Iterable[int]) -> np.ndarray:
+    """
+    Wilder Relative Strength Index for several windows in one pass
+
+    Matches ``RSIIndicator(close, window).rsi()``.
+
+    Args:
+        values: Array of shape (rows,) or (rows, series)
+        windows: RSI windows
+
+    Returns:
+        Array of shape (len(windows),) + values.shape
+    """
+    windows = list(windows)
+    x = np.asarray(values, dtype=np.float64)
+    diff = np.full(x.shape, np.nan)
+    np.subtract(x[1:], x[:-1], out=diff[1:])
+    # fmax turns the undefined first change (and changes next to gaps) into 0
+    gains = np.fmax(diff, 0.0)
+    np.negative(diff, out=diff)
+    losses = np.fmax(diff, 0.0, out=diff)
+    alphas = [wilder_alpha(window) for window in windows]
+    avg_gain = ewm_mean(gains, alphas, windows)
+    avg_loss = ewm_mean(losses, alphas, windows)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.divide(avg_gain, avg_loss)
+    result += 1
+    np.divide(100, result, out=result)
+    np.subtract(100, result, out=result)
+    result[avg_loss == 0] = 100.0
+    return result
+
+
+def bollinger_bands(values: np.ndarray, windows: Iterable[int], num_std: float = 2) -> Dict[str, np.ndarray]:
+    """
+    Bollinger Bands for several windows in one pass
+
+    Args:
+        values: Array of shape (rows,) or (rows, series)
+        windows: Window lengths
+        num_std: Number of standard deviations from the mean
+
+    Returns:
+        Dictionary with 'upper' and 'lower' arrays of shape (len(windows),) + values.shape
+    """
+    windows = list(windows)
+    stats = rolling_window_stats(values, {'mean': windows, 'std': windows})
+    mean = np.stack([stats[('mean', window)] for window in windows])
+    std = np.stack([stats[('std', window)] for window in windows])
+    return {'upper': mean + (std * num_std), 'lower': mean - (std * num_std)}
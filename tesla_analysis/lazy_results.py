@@ -0,0 +1,65 @@
+import threading
+from collections.abc import Mapping
+from typing import Dict, Any, Callable, Iterator
+
+
+class LazyResults(Mapping):
+    """
+    Read-only mapping of analysis results computed on first access
+
+    Each key is backed by a loader that is called the first time the key is
+    read; the value is memoized for later reads. Values may themselves be
+    ``LazyResults``, so nested results are only computed down to the
+    indicators a caller actually touches. A loader that raises is retried on
+    the next access. The mapping is safe to share between threads: each
+    result is computed once, while other keys load concurrently.
+    """
+
+    def __init__(self, loaders: Dict[str, Callable[[], Any]]):
+        """
+        Initialize the lazy results
+
+        Args:
+            loaders: Callables computing each result, keyed by result name
+        """
+        self._loaders = loaders
+        self._values = {}
+        self._locks = {key: threading.Lock() for key in loaders}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._values:
+            if key not in self._loaders:
+                raise KeyError(key)
+            with self._locks[key]:
+                if key not in self._values:
+                    self._values[key] = self._loaders[key]()
+        return self._values[key]
+
+    def __contains__(self, key: object) -> bool:
+        # Membership is known from the loaders, without computing the value
+        return key in self._loaders
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._loaders)
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+    def __repr__(self) -> str:
+        return f"LazyResults(keys={list(self._loaders)}, computed={list(self._values)})"
+
+    def is_computed(self, key: str) -> bool:
+        """Check whether a result has already been computed"""
+        return key in self._values
+
+    def materialize(self) -> Dict[str, Any]:
+        """
+        Compute every result
+
+        Returns:
+            Nested dictionary with all lazy values resolved
+        """
+        return {
+            key: value.materialize() if isinstance(value, LazyResults) else value
+            for key, value in self.items()
+        }
@@ -7,102 +7,497 @@ from .analyzers import (
     SeasonalAnalyzer,
     CorrelationAnalyzer
 )
-import pickle
-from typing import Dict, Any
+from .result_store import ResultStore
+from .rolling import RollingStatistics
+from .features import FeatureCache
+from .result_cache import ResultCache
+from .incremental import IncrementalState, GLOBAL_ANALYSES, file_prefix_digest
+from .lazy_results import LazyResults
+from .scheduler import TaskScheduler
+from .metrics import PipelineMetrics, REPORT_FILE
+from .resampling import TIMEFRAMES
+from .quality import MODES
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from functools import partial
+import os
+import pandas as pd
+
+# Analysis types in the order they are run
+ANALYZERS = [
+    ('price_trend', PriceAnalyzer),
+    ('volume_analysis', VolumeAnalyzer),
+    ('technical_analysis', TechnicalAnalyzer),
+    ('sentiment_analysis', SentimentAnalyzer),
+    ('seasonal_analysis', SeasonalAnalyzer),
+    ('correlation_analysis', CorrelationAnalyzer)
+]
+
+# Analysis types whose analyzers share the rolling statistics engine
+ROLLING_ANALYSES = {'price_trend', 'volume_analysis', 'technical_analysis', 'sentiment_analysis',
+                    'correlation_analysis'}
+
+# Directory per-analyzer results are cached in between runs
+DEFAULT_CACHE_DIR = 'analysis_cache'
 
 class TeslaStockAnalysis:
     """Main class that coordinates all components analysis"""
     
-    def __init__(self, data_path: str):
+    def __init__(self, data_path: str, results_path: str = 'tesla_analysis_results',
+                 incremental: bool = False, compact: bool = False,
+                 chunksize: Optional[int] = None,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 max_workers: Optional[int] = None,
+                 track_memory: bool = False, profile: bool = False,
+                 timeframe: Optional[str] = None, quality: str = 'raise',
+                 seasonal_method: Optional[str] = None):
         """
         Initialize the analysis system
         
         Args:
             data_path: Path to the stock data CSV file
+            results_path: Directory the analysis results are saved to
+            incremental: Only process rows appended since the previous run
+            compact: Load prices as float32 with typed, low-memory parsing
+            chunksize: Stream the input file in chunks of this many rows
+            cache_dir: Directory results are cached in, keyed by input
+                content and analyzer parameters (None disables the cache)
+            max_workers: Threads running independent analyzers concurrently
+                (1 runs them one by one)
+            track_memory: Record the peak memory of every stage
+            profile: Profile every stage with cProfile, keeping the slowest
+            timeframe: Aggregate the input bars into this timeframe (such as
+                'weekly') before analysis; None analyzes the bars as loaded
+            quality: How input rows failing validation are handled: 'raise',
+                'quarantine' or 'repair' (see ``StockDataLoader``)
+            seasonal_method: Seasonal decomposition method, 'classical' or
+                'multi_period' (defaults to ``SeasonalAnalyzer.PARAMETERS``)
         """
         self.data_path = data_path
-        self.data_loader = StockDataLoader(data_path)
+        self.results_path = results_path
+        self.incremental = incremental
+        self.compact = compact
+        self.timeframe = timeframe
+        self.quality = quality
+        self.seasonal_method = seasonal_method or SeasonalAnalyzer.PARAMETERS['method']
+        if self.seasonal_method not in SeasonalAnalyzer.METHODS:
+            raise ValueError(f"Unknown decomposition method: {self.seasonal_method}. "
+                             f"Expected one of {list(SeasonalAnalyzer.METHODS)}")
+        self.result_cache = ResultCache(cache_dir) if cache_dir else None
+        # Memory and call attribution need stages to run one at a time
+        self.max_workers = 1 if track_memory or profile else max_workers
+        self.metrics = PipelineMetrics(track_memory=track_memory, profile=profile)
+        self.data_loader = StockDataLoader(data_path, compact=compact, chunksize=chunksize,
+                                           metrics=self.metrics, cache_dir=cache_dir,
+                                           quality=quality)
         self.data = None
         self.analysis_results = {}
+        self.feature_cache = None
+        self.feature_cache_stats = {}
+        self.node_timings = {}
         
     def run_analysis(self) -> Dict[str, Any]:
         """
         Run complete analysis pipeline
         
+        In incremental mode, rows appended to the input since the previous
+        run are fed through the saved rolling state instead of recomputing
+        every indicator from scratch.
+        
+        Wall time, CPU time and rows of every stage are recorded in
+        ``metrics`` and saved as ``metrics.json`` next to the results.
+        
         Returns:
             Dictionary containing all analysis results
         """
+        with self.metrics.session():
+            try:
+                # Load and preprocess data
+                with self.metrics.stage('load') as stage:
+                    self.data = self._load_data()
+                    stage['rows'] = len(self.data)
+                
+                if self.incremental:
+                    results = self.metrics.measure('incremental.extend', self._extend_analysis)
+                    if results is not None:
+                        self.analysis_results = results
+                        self._save_metrics()
+                        return self.analysis_results
+                
+                self.analysis_results = self._run_analyzers()
+                
+                # Save results
+                self.metrics.measure('save', self._save_results, len(self.data))
+                self.metrics.measure('save_incremental_state', self._save_incremental_state, len(self.data))
+                self._save_metrics()
+                return self.analysis_results
+                
+            except Exception as e:
+                raise Exception(f"Error running analysis: {str(e)}")
+    
+    def lazy_results(self, analysis_types: Optional[List[str]] = None) -> LazyResults:
+        """
+        Build analysis results that are computed on first access
+        
+        Loads the data if needed, but runs no analyzer until one of its
+        indicators is read, so callers only pay for the indicators they use.
+        Groups already in the result cache are served from it. Lazy results
+        are not saved to the result store.
+        
+        Args:
+            analysis_types: Analysis types to expose (defaults to all)
+        
+        Returns:
+            Mapping of analysis types to their lazily computed results
+        """
+        if self.data is None:
+            self.data = self._load_data()
+        return self._lazy_analyzers(analysis_types)
+    
+    def _run_analyzers(self, analysis_types: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Run the analyzers over the loaded data
+        
+        Analyzers and the shared inputs they declare as dependencies form a
+        task graph; independent tasks run concurrently and the wall time of
+        every task is recorded in ``node_timings``.
+        
+        Args:
+            analysis_types: Analysis types to run (defaults to all)
+        
+        Returns:
+            Dictionary containing the analysis results
+        """
+        features, rolling = self._shared_engines()
+        input_digest = self._input_digest()
+        results = {}
+        analyzers = {}
+        cache_keys = {}
+        for analysis_type, analyzer_class in self._selected_analyzers(analysis_types):
+            cache_key = None
+            if input_digest is not None:
+                cache_key = self._cache_key(analysis_type, analyzer_class, input_digest)
+            cached = self._cached_group(cache_key)
+            if cached is not None:
+                results[analysis_type] = cached
+                continue
+            cache_keys[analysis_type] = cache_key
+            # Windowed analyzers register their rolling windows as they are
+            # created, so the engine computes them in one fused pass
+            try:
+                analyzers[analysis_type] = self._create_analyzer(analysis_type, analyzer_class, rolling)
+            except Exception as e:
+                results[analysis_type] = {
+                    'error': f"Error in {analysis_type}: {str(e)}"
+                }
+        
+        scheduler = TaskScheduler(max_workers=self.max_workers)
+        rows = len(self.data)
+        for name, (func, dependencies) in self._shared_tasks(features, rolling).items():
+            scheduler.add(name, partial(self.metrics.measure, name, func, rows), dependencies)
+        for analysis_type, analyzer in analyzers.items():
+            scheduler.add(analysis_type, partial(self._compute_group, analysis_type, analyzer),
+                          analyzer.DEPENDENCIES)
+        computed = scheduler.run(targets=list(analyzers))
+        self.node_timings = scheduler.timings
+        
+        # Collect results with error handling for each analyzer
+        for analysis_type in analyzers:
+            if analysis_type in scheduler.errors:
+                results[analysis_type] = {
+                    'error': f"Error in {analysis_type}: {str(scheduler.errors[analysis_type])}"
+                }
+                continue
+            results[analysis_type] = computed[analysis_type]
+            if cache_keys[analysis_type] is not None:
+                self.result_cache.put(cache_keys[analysis_type], results[analysis_type], self.data.index)
+        self.feature_cache_stats = features.stats()
+        return {
+            analysis_type: results[analysis_type]
+            for analysis_type, _ in ANALYZERS if analysis_type in results
+        }
+    
+    def _lazy_analyzers(self, analysis_types: Optional[List[str]] = None) -> LazyResults:
+        """
+        Set up lazily computed results for the loaded data
+        
+        Args:
+            analysis_types: Analysis types to include (defaults to all)
+        
+        Returns:
+            Mapping of analysis types to their lazily computed results
+        """
+        _, rolling = self._shared_engines()
+        input_digest = self._input_digest()
+        loaders = {}
+        for analysis_type, analyzer_class in self._selected_analyzers(analysis_types):
+            cache_key = None
+            if input_digest is not None:
+                cache_key = self._cache_key(analysis_type, analyzer_class, input_digest)
+            loaders[analysis_type] = partial(self._load_group, analysis_type, analyzer_class, rolling, cache_key)
+        return LazyResults(loaders)
+    
+    def _load_group(self, analysis_type: str, analyzer_class: type, rolling: RollingStatistics,
+                    cache_key: Optional[str]) -> Any:
+        """
+        Load one analysis group from the result cache, or set up its analyzer
+        
+        Args:
+            analysis_type: Analysis type to load
+            analyzer_class: Analyzer class computing the group
+            rolling: Rolling statistics engine shared by windowed analyzers
+            cache_key: Result cache key of the group (None without a cache)
+        
+        Returns:
+            Cached results, or results computed on first access
+        """
+        cached = self._cached_group(cache_key)
+        if cached is not None:
+            return cached
+        return self._group_results(self._create_analyzer(analysis_type, analyzer_class, rolling))
+    
+    def _load_data(self) -> pd.DataFrame:
+        """Private method to load the input, aggregated to the selected timeframe"""
+        if self.timeframe is None:
+            return self.data_loader.load_data()
+        return self.data_loader.resample(self.timeframe)
+    
+    def _selected_analyzers(self, analysis_types: Optional[List[str]]) -> List[Tuple[str, type]]:
+        """Private method to list the (analysis type, analyzer class) pairs to run"""
+        return [
+            (analysis_type, analyzer_class) for analysis_type, analyzer_class in ANALYZERS
+            if analysis_types is None or analysis_type in analysis_types
+        ]
+    
+    def _shared_engines(self) -> Tuple[FeatureCache, RollingStatistics]:
+        """Private method to create the derived-series cache and rolling engine of a run"""
+        # Derived series such as returns are built once and shared, and
+        # windowed analyzers share one rolling statistics engine
+        self.feature_cache = FeatureCache(self.data)
+        return self.feature_cache, RollingStatistics(self.data, features=self.feature_cache)
+    
+    def _shared_tasks(self, features: FeatureCache, rolling: RollingStatistics) -> Dict[str, Tuple[Callable[[], Any], List[str]]]:
+        """Private method to define the shared inputs analyzers can depend on"""
+        return {
+            'returns': (partial(features.pct_change, 'Close'), []),
+            'volume_change': (partial(features.pct_change, 'Volume'), []),
+            'close_rolling': (partial(rolling.compute, ['Close']), []),
+            'volume_rolling': (partial(rolling.compute, ['Volume']), []),
+            'returns_rolling': (partial(rolling.compute, ['returns']), ['returns'])
+        }
+    
+    def _create_analyzer(self, analysis_type: str, analyzer_class: type,
+                         rolling: RollingStatistics) -> Any:
+        """Private method to create an analyzer, sharing the rolling engine where used"""
+        if analysis_type in ROLLING_ANALYSES:
+            return analyzer_class(self.data, rolling=rolling)
+        if analysis_type == 'seasonal_analysis':
+            return analyzer_class(self.data, method=self.seasonal_method)
+        return analyzer_class(self.data)
+    
+    def _group_results(self, analyzer: Any) -> Any:
+        """Private method to map an analyzer's declared outputs to lazily computed results"""
+        if isinstance(analyzer.OUTPUTS, str):
+            return getattr(analyzer, analyzer.OUTPUTS)()
+        return LazyResults({name: getattr(analyzer, method) for name, method in analyzer.OUTPUTS.items()})
+    
+    def _compute_group(self, analysis_type: str, analyzer: Any) -> Any:
+        """Private method to compute every declared output of an analyzer, one stage per method"""
+        rows = len(self.data)
+        if isinstance(analyzer.OUTPUTS, str):
+            method = getattr(analyzer, analyzer.OUTPUTS)
+            return self.metrics.measure(f'{analysis_type}.{analyzer.OUTPUTS}', method, rows)
+        results = {}
+        for name, method_name in analyzer.OUTPUTS.items():
+            method = getattr(analyzer, method_name)
+            results[name] = self.metrics.measure(
+                f'{analysis_type}.{method_name}', partial(self._materialize, method), rows
+            )
+        return results
+    
+    @staticmethod
+    def _materialize(method: Callable[[], Any]) -> Any:
+        """Private helper calling an analyzer method and resolving lazy results"""
+        result = method()
+        return result.materialize() if isinstance(result, LazyResults) else result
+    
+    def _input_digest(self) -> Optional[str]:
+        """Private method to fingerprint the input file for the result cache"""
+        if self.result_cache is None:
+            return None
+        return file_prefix_digest(self.data_path, os.path.getsize(self.data_path))
+    
+    def _cached_group(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Private method to look up one analysis group in the result cache"""
+        if cache_key is None:
+            return None
+        return self.result_cache.get(cache_key)
+    
+    def _cache_key(self, analysis_type: str, analyzer_class: type, input_digest: str) -> str:
+        """
+        Build the result cache key of one analyzer
+        
+        Args:
+            analysis_type: Analysis type the results are stored under
+            analyzer_class: Analyzer class whose parameters shape the results
+            input_digest: SHA-256 digest of the input file
+        
+        Returns:
+            Cache key for the analyzer's results
+        """
+        parameters = analyzer_class.PARAMETERS
+        if analysis_type == 'seasonal_analysis':
+            parameters = {**parameters, 'method': self.seasonal_method}
+        return ResultCache.make_key(
+            analysis_type=analysis_type,
+            parameters=parameters,
+            input_digest=input_digest,
+            compact=self.compact,
+            timeframe=self.timeframe,
+            quality=self.quality,
+            pandas_version=pd.__version__
+        )
+    
+    def _extend_analysis(self) -> Optional[Dict[str, Any]]:
+        """
+        Extend stored results with rows appended since the previous run
+        
+        Returns:
+            Updated results, or None when a full recompute is required
+        """
+        # New rows revise the last aggregated bar, so resampled runs are
+        # always recomputed in full
+        if self.timeframe is not None:
+            return None
+        store = ResultStore(self.results_path)
+        state = IncrementalState.load(self.results_path, self.quality, self.compact,
+                                      self.seasonal_method)
+        if state is None:
+            return None
         try:
-            # Load and preprocess data
-            self.data = self.data_loader.load_data()
-            
-            # Initialize analyzers
-            analyzers = [
-                ('price_trend', PriceAnalyzer(self.data)),
-                ('volume_analysis', VolumeAnalyzer(self.data)),
-                ('technical_analysis', TechnicalAnalyzer(self.data)),
-                ('sentiment_analysis', SentimentAnalyzer(self.data)),
-                ('seasonal_analysis', SeasonalAnalyzer(self.data)),
-                ('correlation_analysis', CorrelationAnalyzer(self.data))
-            ]
-            
-            # Perform analysis with error handling for each analyzer
-            self.analysis_results = {}
-            for analysis_type, analyzer in analyzers:
-                try:
-                    if analysis_type == 'price_trend':
-                        self.analysis_results[analysis_type] = {
-                            'moving_averages': analyzer.calculate_moving_averages(),
-                            'price_change': analyzer.calculate_price_change()
-                        }
-                    elif analysis_type == 'volume_analysis':
-                        self.analysis_results[analysis_type] = {
-                            'volume_averages': analyzer.calculate_volume_averages(),
-                            'volume_change': analyzer.calculate_volume_change()
-                        }
-                    elif analysis_type == 'technical_analysis':
-                        self.analysis_results[analysis_type] = {
-                            'rsi': analyzer.calculate_rsi(),
-                            'bollinger_bands': analyzer.calculate_bollinger_bands()
-                        }
-                    elif analysis_type == 'sentiment_analysis':
-                        self.analysis_results[analysis_type] = {
-                            'returns': analyzer.calculate_returns(),
-                            'volatility': analyzer.calculate_volatility(),
-                            'volume_sentiment': analyzer.analyze_volume_sentiment()
-                        }
-                    elif analysis_type == 'seasonal_analysis':
-                        self.analysis_results[analysis_type] = analyzer.decompose_time_series()
-                    elif analysis_type == 'correlation_analysis':
-                        self.analysis_results[analysis_type] = {
-                            'correlation_matrix': analyzer.calculate_correlation_matrix(),
-                            'pca_components': analyzer.perform_pca()
-                        }
-                except Exception as e:
-                    self.analysis_results[analysis_type] = {
-                        'error': f"Error in {analysis_type}: {str(e)}"
-                    }
-            
-            # Save results
-            self._save_results()
-            return self.analysis_results
-            
-        except Exception as e:
-            raise Exception(f"Error running analysis: {str(e)}")
+            stored_index = store.index
+        except FileNotFoundError:
+            return None
+        issues = self.data_loader.quality.issues
+        if not state.is_appended(self.data_path, self.data, stored_index, issues):
+            return None
+        
+        new_rows = self.data.iloc[state.rows:]
+        if len(new_rows):
+            updated = {}
+            global_analyses = GLOBAL_ANALYSES
+            if state.decomposer is not None:
+                # Fold the new rows into the fitted decomposer instead of refitting
+                trend = store.load_series('seasonal_analysis/trend').to_numpy()
+                analyzer = SeasonalAnalyzer(self.data, method=self.seasonal_method)
+                updated['seasonal_analysis'] = self.metrics.measure(
+                    'seasonal_analysis.extend_multi_period',
+                    partial(analyzer.extend_multi_period, state.decomposer, trend), len(new_rows)
+                )
+                global_analyses = [name for name in GLOBAL_ANALYSES if name != 'seasonal_analysis']
+            store.append(new_rows.index, state.extend(new_rows))
+            updated.update(self._run_analyzers(global_analyses))
+            store.update_groups(updated)
+            state.record_input(self.data_path, len(issues))
+            state.save(self.results_path)
+        return store.load()
     
     def _save_results(self):
-        """Save analysis results to file"""
-        with open('tesla_analysis_results.pkl', 'wb') as f:
-            pickle.dump(self.analysis_results, f)
+        """Save analysis results to the columnar result store"""
+        ResultStore(self.results_path).save(self.analysis_results, self.data.index)
+    
+    def _save_metrics(self):
+        """Save the stage metrics of the run next to the results"""
+        self.metrics.save_report(os.path.join(self.results_path, REPORT_FILE))
+    
+    def _save_incremental_state(self):
+        """Save rolling state for later incremental runs, or drop stale state"""
+        IncrementalState.clear(self.results_path)
+        if not self.incremental or self.timeframe is not None:
+            return
+        state = IncrementalState(self.quality, self.compact, self.seasonal_method)
+        tail = state.seed(self.data)
+        # Only keep the state if the last rows fed through it reproduce the full run exactly
+        if not state.verify(state.extend(tail), self.analysis_results):
+            return
+        seasonal = self.analysis_results.get('seasonal_analysis', {})
+        if self.seasonal_method == 'multi_period' and 'error' not in seasonal:
+            analyzer = SeasonalAnalyzer(self.data, method=self.seasonal_method)
+            state.decomposer = analyzer.decomposer()
+            state.decomposer.fit(self.data['Close'].to_numpy(dtype=float))
+        state.record_input(self.data_path, len(self.data_loader.quality.issues))
+        state.save(self.results_path)
 
 # Example usage when run as a script
 if __name__ == "__main__":
+    import argparse
     from pathlib import Path
     
     # Get the absolute path to the data file
     data_path = str(Path(__file__).parent.parent / 'input_folder' / 'Tesla_stock_data.csv')
     
+    parser = argparse.ArgumentParser(description='Run the Tesla stock analysis')
+    parser.add_argument('--data-path', default=data_path, help='Path to the stock data CSV file')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only process rows appended since the previous run')
+    parser.add_argument('--compact', action='store_true',
+                        help='Load prices as float32 with typed, low-memory parsing')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Stream the input file in chunks of this many rows')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help='Directory analyzer results are cached in')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Recompute every analyzer without the result cache')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Threads running independent analyzers concurrently')
+    parser.add_argument('--timeframe', choices=TIMEFRAMES, default=None,
+                        help='Aggregate the input bars into this timeframe before analysis')
+    parser.add_argument('--on-invalid', choices=MODES, default='raise',
+                        help='Reject the input on missing values or non-positive volumes, quarantine '
+                             'invalid rows, or repair what can be repaired')
+    parser.add_argument('--seasonal-method', choices=SeasonalAnalyzer.METHODS, default=None,
+                        help='Seasonal decomposition method (multi_period runs are extended '
+                             'incrementally instead of refitted)')
+    parser.add_argument('--metrics-file', default=None,
+                        help='Write stage metrics to this Prometheus text file')
+    parser.add_argument('--track-memory', action='store_true',
+                        help='Record the peak memory of every stage (runs stages one at a time)')
+    parser.add_argument('--profile', default=None, metavar='PATH',
+                        help='Profile every stage and save the slowest one\'s cProfile stats here')
+    args = parser.parse_args()
+    
     # Run analysis
-    analyzer = TeslaStockAnalysis(data_path)
+    analyzer = TeslaStockAnalysis(args.data_path, incremental=args.incremental,
+                                  compact=args.compact, chunksize=args.chunksize,
+                                  cache_dir=None if args.no_cache else args.cache_dir,
+                                  max_workers=args.workers, track_memory=args.track_memory,
+                                  profile=args.profile is not None, timeframe=args.timeframe,
+                                  quality=args.on_invalid, seasonal_method=args.seasonal_method)
     results = analyzer.run_analysis()
-    print("Analysis complete. Results saved to tesla_analysis_results.pkl")
+    stats = analyzer.data_loader.ingest_stats
+    print(f"Loaded {stats['rows']} rows at {stats['rows_per_sec']:,.0f} rows/sec")
+    quality = analyzer.data_loader.quality.report()
+    if quality['issues']:
+        issues = ', '.join(f"{count} {name}" for name, count in quality['issues'].items())
+        print(f"Data quality: {issues}; {quality['repaired']} rows repaired, "
+              f"{quality['quarantined']} quarantined")
+    if analyzer.feature_cache_stats.get('misses'):
+        cache = analyzer.feature_cache_stats
+        print(f"Derived series cache: {cache['misses']} built, {cache['hits']} reused")
+    if analyzer.result_cache is not None:
+        cache = analyzer.result_cache.stats()
+        print(f"Result cache: {cache['hits']} analyzers reused, {cache['misses']} computed")
+    report = analyzer.metrics.report().sort_values('wall_seconds', ascending=False)
+    print(f"  {'stage':<50} {'wall ms':>9} {'cpu ms':>9} {'rows':>10} {'peak MB':>8}")
+    for row in report.itertuples(index=False):
+        rows = '' if pd.isna(row.rows) else f"{int(row.rows)}"
+        peak = '' if pd.isna(row.peak_mb) else f"{row.peak_mb:.1f}"
+        print(f"  {row.stage:<50} {row.wall_seconds * 1000:9.1f} {row.cpu_seconds * 1000:9.1f} "
+              f"{rows:>10} {peak:>8}")
+    if args.metrics_file:
+        analyzer.metrics.write_prometheus(args.metrics_file, labels={'input': args.data_path})
+        print(f"Metrics written to {args.metrics_file}")
+    if args.profile:
+        stage = analyzer.metrics.dump_slowest_profile(args.profile)
+        if stage is not None:
+            print(f"Profile of the slowest stage ({stage}) saved to {args.profile}")
+    print("Analysis complete. Results saved to tesla_analysis_results/")
@@ -0,0 +1,269 @@
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+# File the stage report is saved to next to the analysis results
+REPORT_FILE = 'metrics.json'
+
+# Prefix of the exported Prometheus metric names
+METRIC_PREFIX = 'tesla_analysis'
+
+# Prometheus metrics exported per stage: (report column, metric suffix, help text)
+PROMETHEUS_METRICS = [
+    ('wall_seconds', 'stage_wall_seconds', 'Wall time spent in a pipeline stage'),
+    ('cpu_seconds', 'stage_cpu_seconds', 'CPU time of the thread running a pipeline stage'),
+    ('rows', 'stage_rows', 'Rows processed by a pipeline stage'),
+    ('peak_mb', 'stage_peak_megabytes', 'Peak Python memory allocated during a pipeline stage'),
+    ('calls', 'stage_calls', 'Number of times a pipeline stage ran'),
+    ('failed', 'stage_failures', 'Number of times a pipeline stage failed')
+]
+
+
+class PipelineMetrics:
+    """
+    Class that records wall time, CPU time, rows and peak memory per stage
+
+    Stages are timed with ``stage()`` or ``measure()`` and may nest (for
+    example validation inside loading). CPU time is the time of the thread
+    running the stage, so stages running concurrently on the analyzer
+    thread pool are measured separately.
+
+    Peak memory (via ``tracemalloc``) and ``cProfile`` profiles are opt-in
+    because they slow every stage down; both attribute allocations and calls
+    to one stage only when stages run one at a time. With profiling on, each
+    outermost stage is profiled and the profile of the slowest one is kept.
+    """
+
+    def __init__(self, track_memory: bool = False, profile: bool = False):
+        """
+        Initialize the metrics
+
+        Args:
+            track_memory: Record the peak memory of every stage
+            profile: Profile every outermost stage with cProfile
+        """
+        self.track_memory = track_memory
+        self.profile = profile
+        self.records = []
+        self.started = None
+        self.slowest_profile = None
+        self.slowest_stage = None
+        self._slowest_seconds = -1.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._session_start = time.perf_counter()
+
+    @contextmanager
+    def session(self) -> Iterator['PipelineMetrics']:
+        """
+        Record the stages of one run, starting memory tracing if enabled
+
+        Yields:
+            The metrics themselves
+        """
+        self.records = []
+        self.slowest_profile = None
+        self.slowest_stage = None
+        self._slowest_seconds = -1.0
+        self.started = datetime.now(timezone.utc)
+        self._session_start = time.perf_counter()
+        tracing = self.track_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        try:
+            yield self
+        finally:
+            if tracing:
+                tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Time one stage
+
+        Args:
+            name: Stage name; repeated stages are aggregated in the report
+            rows: Rows processed by the stage, if known up front
+
+        Yields:
+            The stage record; set its 'rows' entry once the count is known
+        """
+        stack = self._stack()
+        record = {'stage': name, 'rows': rows, 'failed': False,
+                  'start_seconds': time.perf_counter() - self._session_start}
+        frame = {'record': record}
+        if self.track_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            for outer in stack:
+                outer['max_peak'] = max(outer['max_peak'], peak)
+            tracemalloc.reset_peak()
+            frame.update(start_memory=current, max_peak=current)
+        profiler = cProfile.Profile() if self.profile and not stack else None
+        stack.append(frame)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        except BaseException:
+            record['failed'] = True
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['cpu_seconds'] = time.thread_time() - cpu_start
+            stack.pop()
+            record['peak_mb'] = float('nan')
+            if 'start_memory' in frame:
+                frame['max_peak'] = max(frame['max_peak'], tracemalloc.get_traced_memory()[1])
+                record['peak_mb'] = (frame['max_peak'] - frame['start_memory']) / 2**20
+                if stack:
+                    stack[-1]['max_peak'] = max(stack[-1]['max_peak'], frame['max_peak'])
+            with self._lock:
+                self.records.append(record)
+                if profiler is not None and record['wall_seconds'] > self._slowest_seconds:
+                    self._slowest_seconds = record['wall_seconds']
+                    self.slowest_profile = profiler
+                    self.slowest_stage = name
+
+    def measure(self, name: str, func: Callable[[], Any], rows: Optional[int] = None) -> Any:
+        """
+        Run a function as one stage
+
+        Args:
+            name: Stage name
+            func: Function to run
+            rows: Rows processed by the stage
+
+        Returns:
+            The function's return value
+        """
+        with self.stage(name, rows):
+            return func()
+
+    def report(self) -> pd.DataFrame:
+        """
+        Summarize the recorded stages
+
+        Returns:
+            DataFrame with one row per stage, in the order the stages first
+            started: calls, failures, wall and CPU seconds and rows summed
+            over calls, rows per second and the largest peak memory in MB
+        """
+        columns = ['stage', 'calls', 'failed', 'wall_seconds', 'cpu_seconds', 'rows',
+                   'rows_per_second', 'peak_mb']
+        if not self.records:
+            return pd.DataFrame(columns=columns)
+        records = pd.DataFrame(self.records).sort_values('start_seconds', kind='stable')
+        report = records.groupby('stage', sort=False).agg(
+            calls=('stage', 'size'),
+            failed=('failed', 'sum'),
+            wall_seconds=('wall_seconds', 'sum'),
+            cpu_seconds=('cpu_seconds', 'sum'),
+            rows=('rows', lambda rows: rows.sum(min_count=1)),
+            peak_mb=('peak_mb', 'max')
+        ).reset_index()
+        report['rows_per_second'] = report['rows'] / report['wall_seconds']
+        return report[columns]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Build the structured report
+
+        Returns:
+            JSON-serializable dictionary with the run start time, the stage
+            summary and the slowest profiled stage
+        """
+        stages = json.loads(self.report().to_json(orient='records'))
+        return {
+            'started': self.started.isoformat() if self.started else None,
+            'track_memory': self.track_memory,
+            'slowest_profiled_stage': self.slowest_stage,
+            'stages': stages
+        }
+
+    def save_report(self, path: str):
+        """
+        Save the structured report as JSON
+
+        Args:
+            path: JSON file path
+        """
+        _atomic_write(path, json.dumps(self.to_dict(), indent=1))
+
+    def write_prometheus(self, path: str, labels: Optional[Dict[str, str]] = None):
+        """
+        Write the stage metrics in the Prometheus text exposition format
+
+        The file is replaced atomically, so it can be picked up by the node
+        exporter's textfile collector while runs are writing it.
+
+        Args:
+            path: Output file path (conventionally ending in .prom)
+            labels: Extra labels added to every sample, such as the input file
+        """
+        report = self.report()
+        base = ''.join(f',{key}="{_escape(value)}"' for key, value in (labels or {}).items())
+        lines = []
+        for column, suffix, help_text in PROMETHEUS_METRICS:
+            metric = f'{METRIC_PREFIX}_{suffix}'
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} gauge')
+            for row in report.itertuples(index=False):
+                value = getattr(row, column)
+                if pd.isna(value):
+                    continue
+                lines.append(f'{metric}{{stage="{_escape(row.stage)}"{base}}} {float(value):.9g}')
+        if self.started is not None:
+            metric = f'{METRIC_PREFIX}_last_run_timestamp_seconds'
+            lines.append(f'# HELP {metric} Start time of the last run')
+            lines.append(f'# TYPE {metric} gauge')
+            lines.append(f'{metric}{{{base[1:]}}} {self.started.timestamp():.3f}')
+        _atomic_write(path, '\n'.join(lines) + '\n')
+
+    def dump_slowest_profile(self, path: str) -> Optional[str]:
+        """
+        Save the cProfile stats of the slowest profiled stage
+
+        The file can be read with ``pstats`` or viewers such as snakeviz.
+
+        Args:
+            path: Output file path
+
+        Returns:
+            Name of the profiled stage, or None if nothing was profiled
+        """
+        if self.slowest_profile is None:
+            return None
+        self.slowest_profile.dump_stats(path)
+        return self.slowest_stage
+
+    def _stack(self) -> List[Dict[str, Any]]:
+        """Private method returning the open stages of the current thread"""
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+
+def _escape(value: Any) -> str:
+    """Private helper escaping a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _atomic_write(path: str, text: str):
+    """Private helper replacing a text file in one step"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
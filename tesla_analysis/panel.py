@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Union
+
+from .rolling import rolling_window_stats
+from .decomposition import SeasonalDecomposer, DEFAULT_PERIODS
+from .covariance import rolling_correlation
+from . import indicators
+
+# Working memory a panel computation may use besides its output grid
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Temporary float64 arrays per input value held by the fused rolling kernel
+KERNEL_TEMPORARIES = 10
+
+
+class IndicatorPanel:
+    """
+    Indicator grids over a panel of instruments
+
+    Prices are held as one (time x ticker) array, and every indicator is
+    computed for a whole grid of windows at once: rolling statistics with
+    the fused multi-window kernel, EMAs and RSIs with the blocked EWM scan
+    of ``indicators``, applied to every window and ticker together. Results
+    are grids shaped (window, time, ticker) whose slices match the
+    single-instrument analyzers' series for the same window.
+
+    Tickers are processed in column chunks sized so that the working memory
+    stays below ``max_bytes``; only the output grid grows with the panel.
+    Pass ``out`` (for example a ``numpy.lib.format.open_memmap`` array) to
+    write a grid larger than memory straight to disk.
+    """
+
+    def __init__(self, prices: Union[pd.DataFrame, np.ndarray], max_bytes: int = DEFAULT_MAX_BYTES,
+                 dtype: Union[str, np.dtype] = np.float64):
+        """
+        Initialize the panel
+
+        Args:
+            prices: Prices indexed by date with one column per ticker, or a
+                (time x ticker) array; missing values are NaN
+            max_bytes: Working memory budget besides the output grids
+            dtype: Data type of the output grids (float32 halves their size)
+        """
+        if isinstance(prices, pd.DataFrame):
+            self.index = prices.index
+            self.columns = prices.columns
+            values = prices.to_numpy(dtype=np.float64)
+        else:
+            values = np.asarray(prices, dtype=np.float64)
+            if values.ndim != 2:
+                raise ValueError(f"Panel prices must be 2-D (time x ticker), got shape {values.shape}")
+            self.index = pd.RangeIndex(values.shape[0])
+            self.columns = pd.RangeIndex(values.shape[1])
+        self.values = values
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], column: str = 'Close',
+                    **kwargs) -> 'IndicatorPanel':
+        """
+        Build a panel from per-ticker data
+
+        Args:
+            frames: Preprocessed stock data keyed by ticker
+            column: Data column to use as the panel values
+            **kwargs: Passed on to the constructor
+
+        Returns:
+            Panel over the union of the dates, NaN where a ticker has no row
+        """
+        prices = pd.DataFrame({ticker: data[column] for ticker, data in frames.items()}).sort_index()
+        return cls(prices, **kwargs)
+
+    @property
+    def shape(self):
+        """Number of rows and tickers"""
+        return self.values.shape
+
+    def sma(self, windows: Iterable[int], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Simple moving averages for a grid of windows
+
+        Args:
+            windows: Window lengths
+            out: Optional (window, time, ticker) array to write into
+
+        Returns:
+            Grid of rolling means
+        """
+        return self._rolling_grid('mean', list(windows), out)
+
+    def std(self, windows: Iterable[int], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Rolling sample standard deviations for a grid of windows
+
+        Args:
+            windows: Window lengths
+            out: Optional (window, time, ticker) array to write into
+
+        Returns:
+            Grid of rolling standard deviations
+        """
+        return self._rolling_grid('std', list(windows), out)
+
+    def bollinger_bands(self, windows: Iterable[int], num_std: float = 2) -> Dict[str, np.ndarray]:
+        """
+        Bollinger Bands for a grid of windows
+
+        Args:
+            windows: Window lengths
+            num_std: Number of standard deviations from the mean
+
+        Returns:
+            Dictionary with the 'upper' and 'lower' band grids
+        """
+        windows = list(windows)
+        mean = self._rolling_grid('mean', windows, None, np.float64)
+        std = self._rolling_grid('std', windows, None, np.float64)
+        std *= num_std
+        return {
+            'upper': np.add(mean, std).astype(self.dtype, copy=False),
+            'lower': np.subtract(mean, std).astype(self.dtype, copy=False)
+        }
+
+    def ema(self, windows: Iterable[int], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Exponential moving averages for a grid of spans
+
+        Agrees with ``EMAIndicator(close, window).ema_indicator()`` to within
+        rounding for every window and ticker.
+
+        Args:
+            windows: EMA spans, also used as the minimum number of observations
+            out: Optional (window, time, ticker) array to write into
+
+        Returns:
+            Grid of EMAs
+        """
+        windows = list(windows)
+        out = self._output(len(windows), out)
+        for columns in self._column_chunks(2 * len(windows) + 2):
+            out[:, :, columns] = indicators.ema(self.values[:, columns], windows)
+        return out
+
+    def rsi(self, windows: Iterable[int], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Relative Strength Index for a grid of windows
+
+        Agrees with ``RSIIndicator(close, window).rsi()`` to within rounding
+        for every window and ticker.
+
+        Args:
+            windows: RSI windows
+            out: Optional (window, time, ticker) array to write into
+
+        Returns:
+            Grid of RSI values
+        """
+        windows = list(windows)
+        out = self._output(len(windows), out)
+        for columns in self._column_chunks(5 * len(windows) + 4):
+            out[:, :, columns] = indicators.rsi(self.values[:, columns], windows)
+        return out
+
+    def seasonal_decomposition(self, periods: Iterable[int] = DEFAULT_PERIODS,
+                               model: str = 'additive') -> Dict[str, np.ndarray]:
+        """
+        Multi-period seasonal decomposition of every ticker
+
+        Args:
+            periods: Seasonal period lengths in rows
+            model: 'additive' or 'multiplicative'
+
+        Returns:
+            Dictionary of (time, ticker) arrays keyed by component, as
+            returned by ``SeasonalDecomposer.fit``
+        """
+        decomposer = SeasonalDecomposer(periods, model=model)
+        names = decomposer.component_names
+        out = {name: np.empty(self.values.shape, dtype=self.dtype) for name in names}
+        # Phase pair counts are held per ticker besides the row arrays
+        periods = decomposer.periods
+        pair_cells = sum(period * other for i, period in enumerate(periods) for other in periods[i + 1:])
+        arrays_per_value = 2 * len(names) + 6 + -(-pair_cells // max(self.values.shape[0], 1))
+        for columns in self._column_chunks(arrays_per_value):
+            components = decomposer.fit(self.values[:, columns])
+            for name in names:
+                out[name][:, columns] = components[name]
+            del components
+        return out
+
+    def rolling_correlation(self, window: int, returns: bool = True,
+                            min_periods: Optional[int] = None) -> np.ndarray:
+        """
+        Correlation between every pair of tickers over a sliding window
+
+        Args:
+            window: Rows per window
+            returns: Correlate period returns instead of price levels
+            min_periods: Rows with both tickers present needed for a
+                correlation (the window by default)
+
+        Returns:
+            Array of shape (time, ticker, ticker); row ``t`` covers the
+            window ending at row ``t``
+        """
+        values = self.values
+        if returns:
+            values = np.full(self.values.shape, np.nan)
+            np.divide(self.values[1:], self.values[:-1], out=values[1:])
+            values -= 1
+        return rolling_correlation(values, window, min_periods=min_periods, dtype=self.dtype)
+
+    def frame(self, grid: np.ndarray, windows: Iterable[int], window: int) -> pd.DataFrame:
+        """
+        Label one window of a grid with the panel dates and tickers
+
+        Args:
+            grid: Grid returned by one of the indicator methods
+            windows: Windows the grid was computed for
+            window: Window to extract
+
+        Returns:
+            DataFrame indexed by date with one column per ticker
+        """
+        position = list(windows).index(window)
+        return pd.DataFrame(grid[position], index=self.index, columns=self.columns, copy=False)
+
+    def _rolling_grid(self, stat: str, windows: List[int], out: Optional[np.ndarray],
+                      dtype: Optional[np.dtype] = None) -> np.ndarray:
+        """Private method to compute one rolling statistic for a grid of windows"""
+        out = self._output(len(windows), out, dtype)
+        for columns in self._column_chunks(len(windows) + KERNEL_TEMPORARIES):
+            outputs = rolling_window_stats(self.values[:, columns], {stat: windows})
+            for position, window in enumerate(windows):
+                out[position, :, columns] = outputs[(stat, window)]
+            del outputs
+        return out
+
+    def _output(self, n_windows: int, out: Optional[np.ndarray],
+                dtype: Optional[np.dtype] = None) -> np.ndarray:
+        """Private method to allocate or check an output grid"""
+        shape = (n_windows,) + self.values.shape
+        if out is None:
+            return np.empty(shape, dtype=dtype or self.dtype)
+        if out.shape != shape:
+            raise ValueError(f"Output grid must have shape {shape}, got {out.shape}")
+        return out
+
+    def _column_chunks(self, arrays_per_value: int) -> Iterable[slice]:
+        """Private method to split the tickers into chunks fitting the memory budget"""
+        n_rows, n_columns = self.values.shape
+        per_column = max(n_rows, 1) * 8 * arrays_per_value
+        size = max(1, min(n_columns, self.max_bytes // per_column))
+        for start in range(0, n_columns, size):
+            yield slice(start, min(start + size, n_columns))
@@ -0,0 +1,313 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .resampling import OHLCV_COLUMNS, TRADING_DAYS_PER_BAR, infer_timeframe
+
+# Issue flags of the per-row bitmask; a row's mask is the bitwise OR of its issues
+MISSING_VALUE = 1 << 0          # missing or non-numeric OHLCV value, or missing date
+NON_POSITIVE_VOLUME = 1 << 1    # zero or negative volume
+NON_POSITIVE_PRICE = 1 << 2     # zero or negative open, high, low or close
+HIGH_BELOW_LOW = 1 << 3         # high below low
+OUTSIDE_RANGE = 1 << 4          # open or close outside the high-low range
+DUPLICATE_DATE = 1 << 5         # same date as the latest earlier row
+UNSORTED_DATE = 1 << 6          # earlier than a previous row
+CALENDAR_GAP = 1 << 7           # more than MAX_MISSING_SESSIONS sessions skipped before the row
+SPLIT = 1 << 8                  # gap from the previous close matching a split ratio
+
+# Issue names used in reports and error messages, in bit order
+ISSUES = {
+    'missing_value': MISSING_VALUE,
+    'non_positive_volume': NON_POSITIVE_VOLUME,
+    'non_positive_price': NON_POSITIVE_PRICE,
+    'high_below_low': HIGH_BELOW_LOW,
+    'outside_range': OUTSIDE_RANGE,
+    'duplicate_date': DUPLICATE_DATE,
+    'unsorted_date': UNSORTED_DATE,
+    'calendar_gap': CALENDAR_GAP,
+    'split': SPLIT
+}
+
+# Issues making a row unusable: the rows are quarantined in 'quarantine' and
+# 'repair' modes. Calendar gaps and splits are only reported
+INVALID = (MISSING_VALUE | NON_POSITIVE_VOLUME | NON_POSITIVE_PRICE | HIGH_BELOW_LOW
+           | OUTSIDE_RANGE | DUPLICATE_DATE | UNSORTED_DATE)
+
+# Issues rejecting the data in 'raise' mode, the checks files always had to
+# pass; the other invalid issues are only reported in that mode
+FATAL = MISSING_VALUE | NON_POSITIVE_VOLUME
+
+# How invalid rows are handled: 'raise' rejects data with fatal issues and
+# keeps the rest as loaded, 'quarantine' sets the rows aside, 'repair' fixes
+# inconsistent ranges and unsorted dates first
+MODES = ('raise', 'quarantine', 'repair')
+
+# Weekday sessions that may be skipped between bars without flagging a gap
+# (exchange holidays; two adjacent closures happen, longer ones are rare)
+MAX_MISSING_SESSIONS = 2
+
+# Split and reverse split ratios recognized in overnight gaps, and how close
+# the gap has to be to one of them
+SPLIT_RATIOS = (1.5, 2.0, 3.0, 4.0, 5.0, 7.0, 8.0, 10.0, 15.0, 20.0)
+SPLIT_TOLERANCE = 0.03
+
+
+def check_rows(data: pd.DataFrame, previous: Optional[Tuple[np.datetime64, float]] = None,
+               timeframe: Optional[str] = None,
+               max_missing_sessions: int = MAX_MISSING_SESSIONS) -> np.ndarray:
+    """
+    Flag the quality issues of every row in one vectorized pass
+
+    The OHLCV columns are read into one float block (non-numeric values
+    become missing) and every check is an array expression over it, so no
+    column is scanned more than once and no check stops at the first bad
+    row. Date checks compare each row with the latest earlier date (a running
+    maximum), and split checks compare its open with the previous close.
+
+    Args:
+        data: Bars indexed by date with the OHLCV columns
+        previous: Date and close of the row before ``data`` (the end of the
+            previous chunk), so checks continue across chunks
+        timeframe: Timeframe of the bars, used for calendar gaps (inferred
+            if not given)
+        max_missing_sessions: Weekday sessions that may be skipped between
+            bars without flagging a gap
+
+    Returns:
+        uint16 array with the ``ISSUES`` bitmask of every row
+    """
+    n = len(data)
+    block = np.empty((len(OHLCV_COLUMNS), n), dtype=np.float64)
+    for i, column in enumerate(OHLCV_COLUMNS):
+        values = data[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors='coerce')
+        block[i] = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    close, high, low, open_, volume = block
+    dates = data.index.values.astype('datetime64[ns]')
+
+    issues = np.zeros(n, dtype=np.uint16)
+
+    def flag(mask: np.ndarray, issue: int):
+        np.bitwise_or(issues, issue, out=issues, where=mask)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        flag(np.isnan(block).any(axis=0) | np.isnat(dates), MISSING_VALUE)
+        flag(volume <= 0, NON_POSITIVE_VOLUME)
+        flag((block[:4] <= 0).any(axis=0), NON_POSITIVE_PRICE)
+        flag(high < low, HIGH_BELOW_LOW)
+        flag((np.minimum(open_, close) < low) | (np.maximum(open_, close) > high), OUTSIDE_RANGE)
+
+        # Latest date before every row; NaT sorts first as the smallest int64
+        stamps = dates.view(np.int64)
+        unknown = np.iinfo(np.int64).min
+        earlier = np.empty(n, dtype=np.int64)
+        if n:
+            earlier[0] = previous[0].astype('datetime64[ns]').view(np.int64) if previous else unknown
+            np.maximum.accumulate(stamps[:-1], out=earlier[1:])
+            np.maximum(earlier[1:], earlier[0], out=earlier[1:])
+        known = (earlier != unknown) & (stamps != unknown)
+        flag(known & (stamps == earlier), DUPLICATE_DATE)
+        flag(known & (stamps < earlier), UNSORTED_DATE)
+
+        # Weekday sessions between the latest earlier bar and this one,
+        # beyond the sessions a bar of this timeframe covers. Weekdays never
+        # outnumber calendar days, so only longer spacings are counted
+        timeframe = timeframe or infer_timeframe(data.index)
+        allowed = max(TRADING_DAYS_PER_BAR[timeframe], 1.0) + max_missing_sessions
+        candidates = np.flatnonzero(known & (stamps - earlier > allowed * 86400 * 10**9))
+        sessions = np.busday_count(earlier[candidates].view('datetime64[ns]').astype('datetime64[D]'),
+                                   dates[candidates].astype('datetime64[D]'))
+        issues[candidates[sessions > allowed]] |= CALENDAR_GAP
+
+        # Overnight gaps from the previous close that are at least the
+        # smallest split ratio, compared with the ratios one by one
+        prior_close = np.empty(n, dtype=np.float64)
+        if n:
+            prior_close[0] = previous[1] if previous else np.nan
+            prior_close[1:] = close[:-1]
+        ratio = prior_close / open_
+        smallest = SPLIT_RATIOS[0] * (1 - SPLIT_TOLERANCE)
+        candidates = np.flatnonzero((ratio >= smallest) | (ratio <= 1 / smallest))
+        ratio = ratio[candidates]
+        ratio = np.where(ratio < 1, 1 / ratio, ratio)
+        nearest = np.abs(ratio[:, None] / np.asarray(SPLIT_RATIOS) - 1).min(axis=1, initial=np.inf)
+        issues[candidates[nearest <= SPLIT_TOLERANCE]] |= SPLIT
+    return issues
+
+
+def describe_issues(issues: np.ndarray) -> Dict[str, int]:
+    """
+    Count the rows with each issue
+
+    Args:
+        issues: Bitmask per row as returned by ``check_rows``
+
+    Returns:
+        Number of rows per issue name, for issues that occur
+    """
+    counts = {name: int(np.count_nonzero(issues & flag)) for name, flag in ISSUES.items()}
+    return {name: count for name, count in counts.items() if count}
+
+
+def issue_names(mask: int) -> List[str]:
+    """
+    Decode one row's bitmask
+
+    Args:
+        mask: Issue bitmask of a row
+
+    Returns:
+        Names of the issues set in the mask
+    """
+    return [name for name, flag in ISSUES.items() if mask & flag]
+
+
+class DataQualityChecker:
+    """
+    Class that validates bars chunk by chunk and separates unusable rows
+
+    Every chunk is checked with ``check_rows`` against the last kept row of
+    the previous chunk, so files can be checked while streaming. Issue masks
+    and counts are kept for the whole input. In 'raise' mode only ``FATAL``
+    issues fail the load; in 'quarantine' and 'repair' modes the rows with
+    ``INVALID`` issues are set aside with their masks instead.
+    """
+
+    def __init__(self, mode: str = 'raise', max_missing_sessions: int = MAX_MISSING_SESSIONS):
+        """
+        Initialize the checker
+
+        Args:
+            mode: How rows with invalid issues are handled, one of ``MODES``
+            max_missing_sessions: Weekday sessions that may be skipped
+                between bars without flagging a calendar gap
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown data quality mode: {mode}. Expected one of {list(MODES)}")
+        self.mode = mode
+        self.max_missing_sessions = max_missing_sessions
+        self.timeframe = None
+        self.previous = None
+        self.masks = []
+        self.quarantined = []
+        self.repaired = 0
+
+    def process(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Check a frame or chunk and return its usable rows
+
+        In 'repair' mode, highs and lows are swapped when reversed and
+        widened to include the open and close, and rows are sorted by date
+        before the remaining invalid rows are quarantined. Rows older than
+        the previous chunk cannot be moved into it and are quarantined.
+
+        Args:
+            data: Bars indexed by date with the OHLCV columns
+
+        Returns:
+            The rows without invalid issues, with numeric OHLCV columns (in
+            'raise' mode, every row once none has a fatal issue)
+        """
+        if self.timeframe is None and len(data) > 1:
+            self.timeframe = infer_timeframe(data.index)
+        issues = self._check(data)
+        self.masks.append(issues)
+        if self.mode == 'raise' and (issues & FATAL).any():
+            raise ValueError(self._error_message(data, issues & FATAL))
+        if self.mode == 'raise' or not (issues & INVALID).any():
+            self._remember(data)
+            return data
+
+        data = data.assign(**{
+            column: pd.to_numeric(data[column], errors='coerce')
+            for column in OHLCV_COLUMNS if not pd.api.types.is_numeric_dtype(data[column])
+        })
+        if self.mode == 'repair' and (issues & (HIGH_BELOW_LOW | OUTSIDE_RANGE | UNSORTED_DATE)).any():
+            data, issues = self._repair(data, issues)
+        invalid = (issues & INVALID) != 0
+        self.quarantined.append(data[invalid].assign(issues=issues[invalid]))
+        clean = data[~invalid]
+        self._remember(clean)
+        return clean
+
+    @property
+    def issues(self) -> np.ndarray:
+        """Issue bitmask of every row checked so far, in input order"""
+        return np.concatenate(self.masks) if self.masks else np.zeros(0, dtype=np.uint16)
+
+    def quarantine(self) -> pd.DataFrame:
+        """
+        Collect the rows set aside
+
+        Returns:
+            The quarantined rows with an 'issues' column holding their bitmask
+            (after repairs)
+        """
+        if not self.quarantined:
+            return pd.DataFrame(columns=OHLCV_COLUMNS + ['issues'])
+        return pd.concat(self.quarantined)
+
+    def report(self) -> Dict[str, object]:
+        """
+        Summarize the checks
+
+        Returns:
+            Dictionary with the rows checked, the rows quarantined and
+            repaired, and the number of rows with each issue as loaded
+        """
+        return {
+            'rows': int(sum(len(mask) for mask in self.masks)),
+            'quarantined': int(sum(len(frame) for frame in self.quarantined)),
+            'repaired': self.repaired,
+            'issues': describe_issues(self.issues)
+        }
+
+    def _check(self, data: pd.DataFrame) -> np.ndarray:
+        """Private method to flag a chunk's rows, continuing from the previous chunk"""
+        return check_rows(data, self.previous, self.timeframe or 'daily', self.max_missing_sessions)
+
+    def _remember(self, data: pd.DataFrame):
+        """Private method to keep the last kept row the next chunk is checked against"""
+        if len(data):
+            self.previous = (data.index.values[-1], float(data['Close'].iloc[-1]))
+
+    def _repair(self, data: pd.DataFrame, issues: np.ndarray) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Private method to repair inconsistent ranges and unsorted dates
+
+        Args:
+            data: Chunk with numeric OHLCV columns
+            issues: Bitmask of the chunk's rows
+
+        Returns:
+            The repaired chunk and its rows' bitmask after repairs
+        """
+        high = data['High'].to_numpy(dtype=np.float64)
+        low = data['Low'].to_numpy(dtype=np.float64)
+        body = data[['Open', 'Close']].to_numpy(dtype=np.float64)
+        with np.errstate(invalid='ignore'):
+            repaired_high = np.fmax(np.fmax(high, low), body.max(axis=1))
+            repaired_low = np.fmin(np.fmin(high, low), body.min(axis=1))
+        fixed = (issues & (HIGH_BELOW_LOW | OUTSIDE_RANGE)) != 0
+        data = data.assign(
+            High=np.where(fixed, repaired_high, high).astype(data['High'].dtype),
+            Low=np.where(fixed, repaired_low, low).astype(data['Low'].dtype)
+        )
+        if (issues & UNSORTED_DATE).any():
+            order = np.argsort(data.index.values, kind='stable')
+            data = data.iloc[order]
+        repaired = self._check(data)
+        repairable = HIGH_BELOW_LOW | OUTSIDE_RANGE | UNSORTED_DATE
+        self.repaired += int(np.count_nonzero(issues & repairable) - np.count_nonzero(repaired & repairable))
+        return data, repaired
+
+    @staticmethod
+    def _error_message(data: pd.DataFrame, issues: np.ndarray) -> str:
+        """Private method to summarize a chunk's fatal issues for an error"""
+        invalid = np.flatnonzero(issues)
+        first = invalid[0]
+        counts = ', '.join(f"{count} {name}" for name, count in describe_issues(issues).items())
+        return (f"Data contains {len(invalid)} invalid rows ({counts}); first at row {first} "
+                f"({data.index[first]}): {', '.join(issue_names(int(issues[first])))}")
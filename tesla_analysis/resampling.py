@@ -0,0 +1,166 @@
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Bar length of the fixed-length timeframes in seconds; bars start at
+# multiples of the length (midnight for daily bars)
+FIXED_TIMEFRAMES = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '1h': 3600,
+    'daily': 86400
+}
+
+# Calendar timeframes: weekly bars start on Monday, monthly bars on the 1st
+CALENDAR_TIMEFRAMES = ('weekly', 'monthly')
+
+TIMEFRAMES = list(FIXED_TIMEFRAMES) + list(CALENDAR_TIMEFRAMES)
+
+# Nominal bar length in days, used to recognize the timeframe of a series
+NOMINAL_DAYS = {
+    '1m': 60 / 86400,
+    '5m': 300 / 86400,
+    '15m': 900 / 86400,
+    '1h': 3600 / 86400,
+    'daily': 1.0,
+    'weekly': 7.0,
+    'monthly': 365.25 / 12
+}
+
+# Trading days covered by one bar (6.5 hour sessions, 5 days a week, 21
+# trading days a month), used to express day-based periods in bars
+TRADING_DAYS_PER_BAR = {
+    '1m': 1 / 390,
+    '5m': 1 / 78,
+    '15m': 1 / 26,
+    '1h': 1 / 7,
+    'daily': 1.0,
+    'weekly': 5.0,
+    'monthly': 21.0
+}
+
+OHLCV_COLUMNS = ['Close', 'High', 'Low', 'Open', 'Volume']
+
+
+def bar_starts(index: pd.DatetimeIndex, timeframe: str) -> np.ndarray:
+    """
+    Start time of the bar each timestamp falls into
+
+    Timezone-aware timestamps are binned by their local wall-clock time.
+
+    Args:
+        index: Timestamps to bin
+        timeframe: Target timeframe, one of ``TIMEFRAMES``
+
+    Returns:
+        datetime64[ns] array of bar start times, one per timestamp
+    """
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"Unknown timeframe: {timeframe}. Expected one of {TIMEFRAMES}")
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    stamps = index.values.astype('datetime64[ns]')
+    if timeframe in FIXED_TIMEFRAMES:
+        step = FIXED_TIMEFRAMES[timeframe] * 10**9
+        return (stamps.view(np.int64) // step * step).view('datetime64[ns]')
+    if timeframe == 'monthly':
+        return stamps.astype('datetime64[M]').astype('datetime64[ns]')
+    days = stamps.astype('datetime64[D]')
+    # 1970-01-01 was a Thursday, three days after the Monday starting its week
+    weekday = (days.view(np.int64) + 3) % 7
+    return (days - weekday).astype('datetime64[ns]')
+
+
+def infer_timeframe(index: pd.DatetimeIndex) -> str:
+    """
+    Recognize the timeframe of a series from its median bar spacing
+
+    Args:
+        index: Sorted timestamps of the bars
+
+    Returns:
+        Timeframe whose nominal bar length is closest to the median spacing
+        (on a log scale); 'daily' for fewer than two bars
+    """
+    if len(index) < 2:
+        return 'daily'
+    spacing = np.median(np.diff(index.values.astype('datetime64[ns]').view(np.int64)))
+    days = max(float(spacing), 1.0) / (86400 * 10**9)
+    return min(TIMEFRAMES, key=lambda name: abs(np.log(days / NOMINAL_DAYS[name])))
+
+
+def available_timeframes(index: pd.DatetimeIndex) -> List[str]:
+    """
+    List the timeframes bars with this index can be aggregated into
+
+    Args:
+        index: Sorted timestamps of the base bars
+
+    Returns:
+        The base timeframe and every coarser one
+    """
+    base = TIMEFRAMES.index(infer_timeframe(index))
+    return TIMEFRAMES[base:]
+
+
+def scale_period(days: float, timeframe: str) -> int:
+    """
+    Express a period given in trading days as a number of bars
+
+    Args:
+        days: Period length in trading days (252 for a year)
+        timeframe: Timeframe of the bars
+
+    Returns:
+        Nearest whole number of bars
+    """
+    return int(round(days / TRADING_DAYS_PER_BAR[timeframe]))
+
+
+def resample_ohlcv(data: pd.DataFrame, timeframe: str, base: Optional[str] = None) -> pd.DataFrame:
+    """
+    Aggregate OHLCV bars into a coarser timeframe
+
+    Every output bar takes the open of its first input bar, the highest high,
+    the lowest low, the close of its last input bar and the summed volume.
+    Rows are grouped by their bar start in a single pass: bar boundaries are
+    where the start changes, and each column is reduced over all bars at
+    once with ``reduceat``. Columns other than OHLCV are dropped.
+
+    Args:
+        data: Bars indexed by timestamp
+        timeframe: Target timeframe, one of ``TIMEFRAMES``
+        base: Timeframe of ``data`` (inferred if not given)
+
+    Returns:
+        DataFrame of the aggregated bars indexed by bar start, with the
+        OHLCV columns in the order and dtypes of ``data``
+    """
+    base = base or infer_timeframe(data.index)
+    if TIMEFRAMES.index(timeframe) < TIMEFRAMES.index(base):
+        raise ValueError(f"Cannot resample {base} bars to the finer {timeframe} timeframe")
+    columns = [column for column in data.columns if column in OHLCV_COLUMNS]
+    if not data.index.is_monotonic_increasing:
+        data = data.sort_index(kind='stable')
+    starts = bar_starts(data.index, timeframe)
+    if not len(starts):
+        return data[columns].iloc[:0]
+
+    first = np.flatnonzero(np.concatenate([[True], starts[1:] != starts[:-1]]))
+    last = np.append(first[1:], len(starts)) - 1
+    reducers = {
+        'Open': lambda values: values[first],
+        'High': lambda values: np.maximum.reduceat(values, first),
+        'Low': lambda values: np.minimum.reduceat(values, first),
+        'Close': lambda values: values[last],
+        'Volume': lambda values: np.add.reduceat(values, first)
+    }
+    labels = pd.DatetimeIndex(starts[first], name=data.index.name)
+    if data.index.tz is not None:
+        labels = labels.tz_localize(data.index.tz, ambiguous=True, nonexistent='shift_forward')
+    return pd.DataFrame(
+        {column: reducers[column](data[column].to_numpy()) for column in columns},
+        index=labels
+    )
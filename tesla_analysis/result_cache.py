@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, Any, Optional
+
+import pandas as pd
+
+from .result_store import ResultStore
+
+# Bump when analyzer code changes in a way that alters results, so entries
+# written by older code are never served
+CACHE_VERSION = 4
+
+DEFAULT_MAX_BYTES = 1 << 30
+DEFAULT_MAX_ENTRIES = 256
+
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of per-analyzer results
+
+    Each entry is a result store holding the results of one analyzer for
+    one input fingerprint and parameter set. Entries are written to a
+    temporary directory and renamed into place, so concurrent runs never
+    read a partial entry. Least recently used entries are evicted once the
+    cache grows past its size or entry limit.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize the result cache
+
+        Args:
+            path: Directory the cache entries are stored in
+            max_bytes: Total size the cache is trimmed to after each write
+            max_entries: Number of entries the cache is trimmed to after each write
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """
+        Build a cache key from everything that determines a result
+
+        Args:
+            **parts: JSON-serializable key components such as the input
+                digest, analysis type and analyzer parameters
+
+        Returns:
+            Hex SHA-256 digest of the components
+        """
+        payload = json.dumps(dict(parts, cache_version=CACHE_VERSION), sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up cached results
+
+        Args:
+            key: Cache key from ``make_key``
+
+        Returns:
+            Nested results backed by memory maps, or None on a miss
+        """
+        entry_path = os.path.join(self.path, key)
+        try:
+            results = ResultStore(entry_path).load()
+            # The entry's modification time orders entries for eviction
+            os.utime(entry_path)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return results
+
+    def put(self, key: str, results: Dict[str, Any], index: pd.Index):
+        """
+        Store results under a key and evict old entries
+
+        Args:
+            key: Cache key from ``make_key``
+            results: Nested results of one analyzer
+            index: Date index shared by the series aligned with the input data
+        """
+        entry_path = os.path.join(self.path, key)
+        tmp_path = f"{entry_path}.tmp-{os.getpid()}"
+        os.makedirs(self.path, exist_ok=True)
+        try:
+            ResultStore(tmp_path).save(results, index)
+            os.rename(tmp_path, entry_path)
+        except OSError:
+            # Another run stored the same entry first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self._evict()
+
+    def clear(self):
+        """Remove every cache entry"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache usage for this instance
+
+        Returns:
+            Dictionary with hit and miss counts
+        """
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def _evict(self):
+        """Private method to trim the cache to its size and entry limits"""
+        entries = []
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if entry.is_dir() and '.tmp-' not in entry.name:
+                    entries.append((entry.stat().st_mtime, self._entry_size(entry.path), entry.path))
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (total_bytes > self.max_bytes or len(entries) > self.max_entries):
+            _, size, entry_path = entries.pop(0)
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total_bytes -= size
+
+    @staticmethod
+    def _entry_size(entry_path: str) -> int:
+        """Private method to sum the file sizes of one cache entry"""
+        try:
+            with os.scandir(entry_path) as it:
+                return sum(entry.stat().st_size for entry in it if entry.is_file())
+        except FileNotFoundError:
+            return 0
@@ -0,0 +1,488 @@
+import json
+import os
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .resampling import bar_starts
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+INDEX_FILE = 'index.bin'
+KEY_SEPARATOR = '/'
+
+# Rows are partitioned by the calendar month of their date
+PARTITION_TIMEFRAME = 'monthly'
+
+
+class ResultStore:
+    """
+    Columnar on-disk store for analysis results
+
+    Every indicator is written as one raw little-endian array file, series
+    aligned with the input data share a single date index, and a small JSON
+    manifest records dtypes, shapes and labels. Arrays are memory-mapped on
+    load, so callers only page in the indicators they actually read and the
+    files do not depend on pickle or pandas versions.
+
+    Every write that replaces results numbers its array files with a new
+    manifest version, so files are never rewritten under a name a published
+    manifest refers to: readers holding the previous manifest keep reading
+    one consistent version. Files are deleted one write after the manifest
+    stops referring to them.
+
+    When the date index is sorted, the manifest also partitions the rows by
+    month: each partition is the contiguous row range of one month in every
+    array file. ``query`` binary-searches the partition table and then the
+    dates of the overlapping partitions only, so reading a date range costs
+    time proportional to the range rather than to the stored history.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the result store
+
+        Args:
+            path: Directory the results are stored in
+        """
+        self.path = path
+        self._manifest = None
+        self._index = None
+
+    def save(self, results: Dict[str, Any], index: pd.Index):
+        """
+        Save analysis results to the store
+
+        Args:
+            results: Nested dictionary of analysis results
+            index: Date index shared by the series aligned with the input data
+        """
+        os.makedirs(self.path, exist_ok=True)
+        version = self._next_version()
+        dates = np.asarray(index.values)
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'version': version,
+            'index': self._write_array(_versioned(INDEX_FILE, version), dates),
+            'partitions': self._build_partitions(dates),
+            'entries': {}
+        }
+        for key, value in self._flatten(results).items():
+            manifest['entries'][key] = self._write_entry(key, value, index, version)
+        self._write_manifest(manifest)
+
+    def update_groups(self, results: Dict[str, Any]):
+        """
+        Replace the stored results of some analysis groups
+
+        Args:
+            results: Nested results keyed by the analysis types to replace
+        """
+        manifest = self.manifest
+        version = self._next_version()
+        entries = {
+            key: entry for key, entry in manifest['entries'].items()
+            if key.split(KEY_SEPARATOR)[0] not in results
+        }
+        for key, value in self._flatten(results).items():
+            entries[key] = self._write_entry(key, value, self.index, version)
+        manifest = dict(manifest, version=version, entries=entries)
+        self._write_manifest(manifest)
+
+    def append(self, index: pd.Index, series: Dict[str, pd.Series]):
+        """
+        Append new rows to the shared index and to stored series
+
+        Array files are extended in place, so the cost depends only on the
+        number of new rows. Readers of the previous manifest still see the
+        rows it describes, since the existing bytes are left untouched.
+
+        Args:
+            index: Dates of the new rows
+            series: New values keyed by result key; series with their own
+                index append their own dates
+        """
+        manifest = json.loads(json.dumps(self.manifest))
+        manifest['version'] = self._next_version()
+        dates = np.asarray(index.values)
+        manifest['partitions'] = self._extend_partitions(manifest, dates)
+        self._append_array(manifest['index'], dates)
+        for key, values in series.items():
+            entry = manifest['entries'][key]
+            if entry['kind'] != 'series':
+                raise ValueError(f"Cannot append to non-series result: {key}")
+            if entry['index'] is not None:
+                self._append_array(entry['index'], np.asarray(values.index.values))
+            self._append_array(entry, values.to_numpy())
+        self._write_manifest(manifest)
+
+    def keys(self) -> List[str]:
+        """
+        List the stored result keys
+
+        Returns:
+            List of keys such as 'price_trend/moving_averages/sma_20'
+        """
+        return list(self.manifest['entries'])
+
+    def load_series(self, key: str) -> Any:
+        """
+        Load a single stored result
+
+        Args:
+            key: Result key such as 'technical_analysis/rsi'
+
+        Returns:
+            Series, DataFrame, array or text stored under the key
+        """
+        try:
+            entry = self.manifest['entries'][key]
+        except KeyError:
+            raise KeyError(f"No stored result for: {key}")
+        return self._read_entry(entry)
+
+    def load(self, groups: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Load stored results as a nested dictionary
+
+        Args:
+            groups: Top-level analysis types to load (defaults to all)
+
+        Returns:
+            Nested dictionary of analysis results backed by memory maps
+        """
+        results = {}
+        for key, entry in self.manifest['entries'].items():
+            parts = key.split(KEY_SEPARATOR)
+            if groups is not None and parts[0] not in groups:
+                continue
+            node = results
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            node[parts[-1]] = self._read_entry(entry)
+        return results
+
+    def query(self, key: str, start: Optional[Any] = None, end: Optional[Any] = None) -> pd.Series:
+        """
+        Load one stored series for a date range
+
+        Args:
+            key: Result key of a date-indexed series, such as 'technical_analysis/rsi'
+            start: First date to include (defaults to the first stored date)
+            end: Last date to include (defaults to the last stored date)
+
+        Returns:
+            Series of the rows dated from ``start`` to ``end``, both included
+        """
+        try:
+            entry = self.manifest['entries'][key]
+        except KeyError:
+            raise KeyError(f"No stored result for: {key}")
+        if entry['kind'] != 'series':
+            raise ValueError(f"Only date-indexed series can be queried by date: {key}")
+        partitions = self._partition_table()
+        if entry['index'] is None:
+            dates = self._read_array(self.manifest['index'])
+        else:
+            dates = self._read_array(entry['index'])
+        if partitions is None:
+            # Unsorted dates cannot be searched
+            rows = self._in_range(dates, start, end)
+        elif entry['index'] is None:
+            rows = slice(*self._partition_search(dates, partitions, start, end))
+        else:
+            # Series with their own dates (subsets of the sorted index) are searched directly
+            rows = slice(*self._search(dates, start, end, 0, len(dates)))
+        index = pd.DatetimeIndex(dates[rows], name='Date')
+        return pd.Series(self._read_array(entry)[rows], index=index, name=entry['name'], copy=False)
+
+    def load_range(self, start: Optional[Any] = None, end: Optional[Any] = None,
+                   groups: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Load stored results for a date range as a nested dictionary
+
+        Date-indexed series are cut to the range; other results (matrices,
+        arrays and text) are returned whole.
+
+        Args:
+            start: First date to include (defaults to the first stored date)
+            end: Last date to include (defaults to the last stored date)
+            groups: Top-level analysis types to load (defaults to all)
+
+        Returns:
+            Nested dictionary of analysis results backed by memory maps
+        """
+        results = {}
+        for key, entry in self.manifest['entries'].items():
+            parts = key.split(KEY_SEPARATOR)
+            if groups is not None and parts[0] not in groups:
+                continue
+            node = results
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            if entry['kind'] == 'series':
+                node[parts[-1]] = self.query(key, start, end)
+            else:
+                node[parts[-1]] = self._read_entry(entry)
+        return results
+
+    def partitions(self) -> pd.DataFrame:
+        """
+        List the monthly partitions of the stored rows
+
+        Returns:
+            DataFrame indexed by month start with the first row and row count
+            of each partition (empty if the dates are not sorted)
+        """
+        partitions = self._partition_table()
+        if partitions is None:
+            return pd.DataFrame({'first_row': [], 'rows': []}, dtype=np.int64)
+        rows = np.asarray(partitions['rows'] + [self.manifest['index']['shape'][0]], dtype=np.int64)
+        index = pd.DatetimeIndex(np.asarray(partitions['starts'], dtype='datetime64[ns]'), name='Date')
+        return pd.DataFrame({'first_row': rows[:-1], 'rows': np.diff(rows)}, index=index)
+
+    def date_range(self) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """
+        First and last date of the shared index, read without loading it
+
+        Returns:
+            Tuple of the first and last stored dates (None when empty)
+        """
+        dates = self._read_array(self.manifest['index'])
+        if not len(dates):
+            return None, None
+        return pd.Timestamp(dates[0]), pd.Timestamp(dates[-1])
+
+    def _partition_table(self) -> Optional[Dict[str, Any]]:
+        """Private method to get the partition table (None if the dates are unsorted)"""
+        if 'partitions' in self.manifest:
+            return self.manifest['partitions']
+        # Stores written before partitioning are partitioned on the fly
+        return self._build_partitions(self._read_array(self.manifest['index']))
+
+    @staticmethod
+    def _build_partitions(dates: np.ndarray, first_row: int = 0) -> Optional[Dict[str, Any]]:
+        """Private method to partition sorted dates by month (None if unsorted)"""
+        if len(dates) > 1 and (dates[1:] < dates[:-1]).any():
+            return None
+        starts = bar_starts(pd.DatetimeIndex(dates), PARTITION_TIMEFRAME)
+        first = np.flatnonzero(np.concatenate([[True], starts[1:] != starts[:-1]]))[:len(starts)]
+        return {
+            'timeframe': PARTITION_TIMEFRAME,
+            'starts': [int(value) for value in starts[first].view(np.int64)],
+            'rows': [int(row) + first_row for row in first]
+        }
+
+    def _extend_partitions(self, manifest: Dict[str, Any], dates: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Private method to add appended rows to the partition table"""
+        stored = self._read_array(manifest['index'])
+        if 'partitions' in manifest:
+            partitions = manifest['partitions']
+        else:
+            partitions = self._build_partitions(stored)
+        if partitions is None or not len(dates):
+            return partitions
+        if len(stored) and dates[0] < stored[-1]:
+            return None
+        tail = self._build_partitions(dates, first_row=len(stored))
+        if tail is None:
+            return None
+        starts, rows = tail['starts'], tail['rows']
+        if partitions['starts'] and starts[0] == partitions['starts'][-1]:
+            # The first new rows continue the last stored month
+            starts, rows = starts[1:], rows[1:]
+        return dict(partitions, starts=partitions['starts'] + starts, rows=partitions['rows'] + rows)
+
+    def _partition_search(self, dates: np.ndarray, partitions: Dict[str, Any],
+                          start: Optional[Any], end: Optional[Any]) -> Tuple[int, int]:
+        """Private method to find the rows in a date range, searching only the overlapping partitions"""
+        first_dates = np.asarray(partitions['starts'], dtype='datetime64[ns]')
+        rows = partitions['rows'] + [len(dates)]
+        first, last = 0, len(first_dates)
+        if start is not None:
+            first = max(int(np.searchsorted(first_dates, _to_datetime64(start), side='right')) - 1, 0)
+        if end is not None:
+            last = int(np.searchsorted(first_dates, _to_datetime64(end), side='right'))
+        if last <= first:
+            return 0, 0
+        return self._search(dates, start, end, rows[first], rows[last])
+
+    @staticmethod
+    def _search(dates: np.ndarray, start: Optional[Any], end: Optional[Any],
+                lower: int, upper: int) -> Tuple[int, int]:
+        """Private method to binary-search a date range within rows lower:upper of sorted dates"""
+        window = dates[lower:upper]
+        first = 0 if start is None else int(np.searchsorted(window, _to_datetime64(start), side='left'))
+        last = len(window) if end is None else int(np.searchsorted(window, _to_datetime64(end), side='right'))
+        return lower + first, lower + max(last, first)
+
+    @staticmethod
+    def _in_range(dates: np.ndarray, start: Optional[Any], end: Optional[Any]) -> np.ndarray:
+        """Private method to mark the dates within a range"""
+        mask = np.ones(len(dates), dtype=bool)
+        if start is not None:
+            mask &= dates >= _to_datetime64(start)
+        if end is not None:
+            mask &= dates <= _to_datetime64(end)
+        return mask
+
+    def _next_version(self) -> int:
+        """Private method to number the next manifest (1 for a new store)"""
+        try:
+            return self.manifest.get('version', 0) + 1
+        except (FileNotFoundError, ValueError):
+            return 1
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        """Private method to publish a manifest atomically"""
+        previous = self._manifest
+        retired = []
+        if previous is not None:
+            # Files only the previous manifest used stay for its readers until
+            # the next write; the ones it had retired itself are deleted now
+            retired = sorted(_array_files(previous) - _array_files(manifest))
+        manifest = dict(manifest, retired=retired)
+        # The manifest is replaced last so readers never see a partial store
+        tmp_path = os.path.join(self.path, MANIFEST_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST_FILE))
+        self._manifest = manifest
+        self._index = None
+        if previous is not None:
+            in_use = _array_files(manifest)
+            for file_name in previous.get('retired', []):
+                if file_name not in in_use:
+                    try:
+                        os.remove(os.path.join(self.path, file_name))
+                    except FileNotFoundError:
+                        pass
+
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        """Manifest describing the stored results"""
+        if self._manifest is None:
+            manifest_path = os.path.join(self.path, MANIFEST_FILE)
+            if not os.path.exists(manifest_path):
+                raise FileNotFoundError(f"Results not found at: {self.path}")
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('format_version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported results format: {manifest.get('format_version')}")
+            self._manifest = manifest
+        return self._manifest
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """Date index shared by the aligned series"""
+        if self._index is None:
+            self._index = pd.DatetimeIndex(self._read_array(self.manifest['index']), name='Date')
+        return self._index
+
+    def _flatten(self, results: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+        """Private method to flatten nested results into separator-joined keys"""
+        flat = {}
+        for name, value in results.items():
+            key = prefix + str(name)
+            if isinstance(value, dict):
+                flat.update(self._flatten(value, key + KEY_SEPARATOR))
+            else:
+                flat[key] = value
+        return flat
+
+    def _write_entry(self, key: str, value: Any, index: pd.Index, version: int) -> Dict[str, Any]:
+        """Private method to write one result and describe it for the manifest"""
+        file_name = _versioned(key.replace(KEY_SEPARATOR, '.') + '.bin', version)
+        if isinstance(value, pd.Series):
+            entry = {'kind': 'series', 'name': value.name, 'index': None}
+            if not value.index.equals(index):
+                entry['index'] = self._write_array(
+                    file_name[:-len('.bin')] + '.index.bin', np.asarray(value.index.values)
+                )
+            entry.update(self._write_array(file_name, value.to_numpy()))
+        elif isinstance(value, pd.DataFrame):
+            entry = {
+                'kind': 'frame',
+                'rows': [str(label) for label in value.index],
+                'columns': [str(label) for label in value.columns]
+            }
+            entry.update(self._write_array(file_name, value.to_numpy()))
+        elif isinstance(value, np.ndarray):
+            entry = {'kind': 'array'}
+            entry.update(self._write_array(file_name, value))
+        elif isinstance(value, str):
+            entry = {'kind': 'text', 'value': value}
+        else:
+            raise ValueError(f"Unsupported result type for {key}: {type(value).__name__}")
+        return entry
+
+    def _write_array(self, file_name: str, values: np.ndarray) -> Dict[str, Any]:
+        """Private method to write a raw array file and describe its layout"""
+        if values.dtype == object:
+            raise ValueError(f"Cannot store object arrays: {file_name}")
+        values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+        tmp_path = os.path.join(self.path, file_name + '.tmp')
+        values.tofile(tmp_path)
+        # Replacing rather than overwriting keeps existing memory maps valid
+        os.replace(tmp_path, os.path.join(self.path, file_name))
+        return {'file': file_name, 'dtype': values.dtype.str, 'shape': list(values.shape)}
+
+    def _append_array(self, entry: Dict[str, Any], values: np.ndarray):
+        """Private method to append rows to a raw array file and update its layout"""
+        dtype = np.dtype(entry['dtype'])
+        stored_bytes = int(np.prod(entry['shape'])) * dtype.itemsize
+        path = os.path.join(self.path, entry['file'])
+        with open(path, 'ab') as f:
+            # Drop bytes left behind by an interrupted append before extending
+            f.truncate(stored_bytes)
+            np.ascontiguousarray(values, dtype=dtype).tofile(f)
+        entry['shape'] = [entry['shape'][0] + len(values)] + entry['shape'][1:]
+
+    def _read_array(self, entry: Dict[str, Any]) -> np.ndarray:
+        """Private method to memory-map a stored array"""
+        shape = tuple(entry['shape'])
+        dtype = np.dtype(entry['dtype'])
+        if int(np.prod(shape)) == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, entry['file']), dtype=dtype, mode='r', shape=shape)
+
+    def _read_entry(self, entry: Dict[str, Any]) -> Any:
+        """Private method to rebuild a stored result from its manifest entry"""
+        kind = entry['kind']
+        if kind == 'text':
+            return entry['value']
+        values = self._read_array(entry)
+        if kind == 'series':
+            if entry['index'] is None:
+                index = self.index
+            else:
+                index = pd.DatetimeIndex(self._read_array(entry['index']), name='Date')
+            return pd.Series(values, index=index, name=entry['name'], copy=False)
+        if kind == 'frame':
+            return pd.DataFrame(values, index=entry['rows'], columns=entry['columns'], copy=False)
+        return values
+
+
+def _versioned(file_name: str, version: int) -> str:
+    """Private helper naming an array file after the manifest version writing it"""
+    return f"v{version}-{file_name}"
+
+
+def _array_files(manifest: Dict[str, Any]) -> Set[str]:
+    """Private helper listing the array files a manifest refers to"""
+    files = {manifest['index']['file']}
+    for entry in manifest['entries'].values():
+        if 'file' in entry:
+            files.add(entry['file'])
+        if entry.get('index'):
+            files.add(entry['index']['file'])
+    return files
+
+
+def _to_datetime64(value: Any) -> np.datetime64:
+    """Private helper converting a date bound to the stored datetime64[ns] form"""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tz is not None:
+        timestamp = timestamp.tz_convert(None)
+    return timestamp.to_datetime64().astype('datetime64[ns]')
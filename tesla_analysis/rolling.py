@@ -0,0 +1,378 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Tuple, Callable, Union, Optional
+
+from .features import FeatureCache
+
+# Rows per block of the fused kernel. Each block is centred on its own
+# reference value before the running sums are taken, which keeps sums of
+# squares small enough for accurate variances over long histories. Longer
+# windows use blocks doubled until the window fits (see ``block_size``).
+BLOCK_SIZE = 256
+
+# Statistics the engine can compute
+STATISTICS = ('sum', 'mean', 'std', 'min', 'max')
+
+
+def block_size(window: int) -> int:
+    """
+    Rows per kernel block used for a window
+
+    Args:
+        window: Window length in rows
+
+    Returns:
+        ``BLOCK_SIZE`` doubled until the window fits in one block, so
+        windows up to ``BLOCK_SIZE`` always share the same blocks
+    """
+    block = BLOCK_SIZE
+    while block < window:
+        block *= 2
+    return block
+
+
+def block_groups(requests: Dict[str, Iterable[int]]) -> Dict[int, Dict[str, list]]:
+    """
+    Split window requests by the block size they are computed with
+
+    Args:
+        requests: Windows keyed by statistic name
+
+    Returns:
+        Requests keyed by block size, smallest first
+    """
+    groups = {}
+    for stat, windows in requests.items():
+        for window in sorted(set(windows)):
+            groups.setdefault(block_size(window), {}).setdefault(stat, []).append(window)
+    return dict(sorted(groups.items()))
+
+
+def history_rows(requests: Dict[str, Iterable[int]]) -> int:
+    """
+    Rows of history a tail run of the kernel starts with
+
+    Args:
+        requests: Windows keyed by statistic name
+
+    Returns:
+        The block size of the longest window; tail runs start at a multiple
+        of it, which is also a multiple of every smaller block
+    """
+    return block_size(max((max(windows) for windows in requests.values() if windows), default=1))
+
+
+def rolling_window_stats(values: np.ndarray, requests: Dict[str, Iterable[int]],
+                         start: int = 0) -> Dict[Tuple[str, int], np.ndarray]:
+    """
+    Compute rolling statistics for several windows in one vectorized pass
+
+    Rows are time and columns (for 2-D input) are independent series. Sums,
+    means and standard deviations for every window come from one pair of
+    running sums per block, taken after centring the block on its first
+    finite value; windows reaching into the previous block re-centre that
+    block's partial sums. Windows are computed with ``BLOCK_SIZE`` rows per
+    block, or with larger blocks when they are longer (``block_size``), so
+    a window's values do not depend on the other windows requested. Minima and maxima use a
+    doubling table of running extremes. A window containing NaN yields NaN,
+    like ``rolling(window).<stat>()``.
+
+    A value only depends on its own block, the block before it and its
+    absolute row position, so results can be extended bit for bit by
+    rerunning the kernel on a tail of the data that starts at a block
+    boundary.
+
+    Args:
+        values: Array of shape (rows,) or (rows, series)
+        requests: Windows to compute keyed by statistic name
+        start: Absolute row of ``values[0]``; either 0, or a multiple of
+            ``history_rows(requests)`` in which case that many first rows
+            only serve as history and get NaN outputs
+
+    Returns:
+        Dictionary mapping (statistic, window) to arrays shaped like ``values``
+    """
+    x = np.asarray(values, dtype=np.float64)
+    is_1d = x.ndim == 1
+    # Work series-major so inner loops run along time
+    x = x[None, :] if is_1d else np.ascontiguousarray(x.T)
+    requests = {stat: sorted(set(windows)) for stat, windows in requests.items() if windows}
+    for stat, windows in requests.items():
+        if stat not in STATISTICS:
+            raise ValueError(f"Unsupported rolling statistic: {stat}")
+        if windows[0] < 1:
+            raise ValueError(f"Rolling windows must be at least 1: {windows}")
+    history = history_rows(requests)
+    if start % history:
+        raise ValueError(f"Start row must be a multiple of {history}: {start}")
+
+    outputs = {}
+    moment_requests = {stat: requests[stat] for stat in ('sum', 'mean', 'std') if stat in requests}
+    for block, group in block_groups(moment_requests).items():
+        outputs.update(_block_moments(x, group, list(group), start, block))
+    extreme_stats = [stat for stat in ('min', 'max') if stat in requests]
+    if extreme_stats:
+        outputs.update(_running_extremes(x, requests, extreme_stats))
+    if start:
+        for output in outputs.values():
+            output[:, :history] = np.nan
+    if is_1d:
+        return {key: output[0] for key, output in outputs.items()}
+    return {key: output.T for key, output in outputs.items()}
+
+
+def _block_moments(x: np.ndarray, requests: Dict[str, list], stats: list,
+                   start: int, block: int) -> Dict[Tuple[str, int], np.ndarray]:
+    """Running-sum kernel for window sums, means and standard deviations"""
+    m, n = x.shape
+    # Block 0 of the padded array only provides history for block 1: it is
+    # NaN padding for a full run, or the first block of rows for a tail run
+    front = block if start == 0 else 0
+    n_blocks = -(-(n + front) // block)
+    outputs = {}
+    if n_blocks <= 1:
+        for stat in stats:
+            for window in requests[stat]:
+                outputs[(stat, window)] = np.full(x.shape, np.nan)
+        return outputs
+    padded = np.full((m, n_blocks * block), np.nan)
+    padded[:, front:front + n] = x
+    blocks = padded.reshape(m, n_blocks, block)
+
+    # Each block is centred on its first finite value
+    has_nan = bool(np.isnan(x).any())
+    if has_nan:
+        finite = ~np.isnan(blocks)
+        first = np.where(finite.any(axis=2), finite.argmax(axis=2), 0)
+        reference = np.take_along_axis(blocks, first[:, :, None], axis=2)
+    else:
+        reference = blocks[:, :, :1].copy()
+    reference[np.isnan(reference)] = 0.0
+
+    centred = np.subtract(blocks, reference)
+    if has_nan:
+        centred[~finite] = 0.0
+        # Number of NaNs up to each padded row, for masking windows with gaps
+        nan_prefix = np.zeros((m, n_blocks * block + 1), dtype=np.int64)
+        np.cumsum(~finite.reshape(m, -1), axis=1, out=nan_prefix[:, 1:])
+    sum_1 = np.zeros((m, n_blocks, block + 1))
+    np.cumsum(centred, axis=2, out=sum_1[:, :, 1:])
+    if 'std' in stats:
+        np.multiply(centred, centred, out=centred)
+        sum_2 = np.zeros((m, n_blocks, block + 1))
+        np.cumsum(centred, axis=2, out=sum_2[:, :, 1:])
+    del centred
+    # Shift from each block's reference to the next one's
+    shift = reference[:, :-1] - reference[:, 1:]
+    own_reference = reference[:, 1:]
+
+    s1 = np.empty((m, n_blocks - 1, block))
+    for window in sorted(set(w for stat in stats for w in requests[stat])):
+        _window_sums(sum_1, window, s1)
+        crossing = np.arange(window - 1, 0, -1, dtype=np.float64)
+        # Rows near the start of a block reach back into the previous block,
+        # whose partial sums are re-centred on this block's reference
+        tail_1 = sum_1[:, :-1, block:] - sum_1[:, :-1, block - window + 1:block]
+        s1[:, :, :window - 1] += tail_1 + crossing * shift
+        invalid = None
+        if has_nan:
+            rows = np.arange(block + 1, n_blocks * block + 1)
+            gaps = nan_prefix[:, rows] - nan_prefix[:, rows - window]
+            invalid = (gaps > 0).reshape(m, n_blocks - 1, block)
+
+        if 'sum' in stats and window in requests['sum']:
+            output, output_blocks = _output_buffer(m, n_blocks, block)
+            np.multiply(own_reference, window, out=output_blocks)
+            np.add(output_blocks, s1, out=output_blocks)
+            outputs[('sum', window)] = _finish(output, output_blocks, invalid, window, front, n, block)
+        if 'mean' in stats and window in requests['mean']:
+            output, output_blocks = _output_buffer(m, n_blocks, block)
+            np.divide(s1, window, out=output_blocks)
+            np.add(output_blocks, own_reference, out=output_blocks)
+            outputs[('mean', window)] = _finish(output, output_blocks, invalid, window, front, n, block)
+        if 'std' in stats and window in requests['std']:
+            output, output_blocks = _output_buffer(m, n_blocks, block)
+            if window == 1:
+                output_blocks[...] = np.nan
+            else:
+                s2 = _window_sums(sum_2, window)
+                tail_2 = sum_2[:, :-1, block:] - sum_2[:, :-1, block - window + 1:block]
+                s2[:, :, :window - 1] += (tail_2 + 2 * shift * tail_1
+                                          + crossing * shift * shift)
+                # variance = (s2 - s1 ** 2 / window) / (window - 1), floored at zero
+                np.multiply(s1, s1, out=output_blocks)
+                np.divide(output_blocks, window, out=output_blocks)
+                np.subtract(s2, output_blocks, out=output_blocks)
+                np.divide(output_blocks, window - 1, out=output_blocks)
+                np.maximum(output_blocks, 0.0, out=output_blocks)
+                np.sqrt(output_blocks, out=output_blocks)
+            outputs[('std', window)] = _finish(output, output_blocks, invalid, window, front, n, block)
+    return outputs
+
+
+def _window_sums(running: np.ndarray, window: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Window sums within each block from per-block running sums"""
+    m, n_blocks, width = running.shape
+    if out is None:
+        out = np.empty((m, n_blocks - 1, width - 1))
+    # Entries before window - 1 only hold the in-block part of the window
+    np.subtract(running[:, 1:, window:], running[:, 1:, :width - window], out=out[:, :, window - 1:])
+    out[:, :, :window - 1] = running[:, 1:, 1:window]
+    return out
+
+
+def _output_buffer(m: int, n_blocks: int, block: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Allocate an output laid out like the padded input and its block view"""
+    output = np.empty((m, n_blocks * block))
+    return output, output.reshape(m, n_blocks, block)[:, 1:]
+
+
+def _finish(output: np.ndarray, output_blocks: np.ndarray, invalid: Optional[np.ndarray],
+            window: int, front: int, n: int, block: int) -> np.ndarray:
+    """Mask windows with gaps and map an output buffer back onto the input rows"""
+    if invalid is not None:
+        output_blocks[invalid] = np.nan
+    # Without front padding the first block of input rows is history only
+    output[:, :block] = np.nan
+    if front:
+        output[:, front:front + window - 1] = np.nan
+    return output[:, front:front + n]
+
+
+def _running_extremes(x: np.ndarray, requests: Dict[str, list],
+                      stats: list) -> Dict[Tuple[str, int], np.ndarray]:
+    """Doubling-table kernel for window minima and maxima"""
+    n = x.shape[1]
+    outputs = {}
+    for stat in stats:
+        reduce = np.minimum if stat == 'min' else np.maximum
+        windows = requests[stat]
+        # table[k][:, i] holds the extreme of rows i .. i + 2**k - 1
+        table = [x]
+        while 2 ** len(table) <= windows[-1]:
+            previous = table[-1]
+            span = 2 ** (len(table) - 1)
+            length = max(previous.shape[1] - span, 0)
+            table.append(reduce(previous[:, :length], previous[:, span:span + length]))
+        for window in windows:
+            level = window.bit_length() - 1
+            span = 2 ** level
+            output = np.full(x.shape, np.nan)
+            if window <= n:
+                level_table = table[level]
+                output[:, window - 1:] = reduce(
+                    level_table[:, :n - window + 1], level_table[:, window - span:n - span + 1]
+                )
+            outputs[(stat, window)] = output
+    return outputs
+
+
+class RollingStatistics:
+    """
+    Shared rolling-window statistics for one dataset
+
+    Analyzers register the windows they need when they are constructed and
+    read their series back later. The first read computes every pending
+    request for a series in one fused pass, so a rolling mean used by several
+    analyzers is only computed once per run. The engine is safe to share
+    between threads.
+    """
+
+    def __init__(self, data: pd.DataFrame, features: Optional[FeatureCache] = None):
+        """
+        Initialize the rolling statistics engine
+
+        Args:
+            data: DataFrame containing stock data
+            features: Shared derived-series cache (created if not given)
+        """
+        self.data = data
+        self.features = features if features is not None else FeatureCache(data)
+        self._sources = {}
+        self._pending = {}
+        self._results = {}
+        self._lock = threading.RLock()
+
+    def add_series(self, name: str, source: Union[pd.Series, Callable[[], pd.Series]]):
+        """
+        Register a derived series the engine can compute statistics over
+
+        Args:
+            name: Name used in requests
+            source: Series aligned with the data, or a callable building it
+        """
+        self._sources[name] = source
+
+    def request(self, name: str, windows: Iterable[int], stats: Iterable[str]):
+        """
+        Register statistics to compute in the next fused pass
+
+        Args:
+            name: Data column or registered series name
+            windows: Window lengths
+            stats: Statistic names such as 'mean' or 'std'
+        """
+        with self._lock:
+            pending = self._pending.setdefault(name, {})
+            for stat in stats:
+                pending.setdefault(stat, set()).update(
+                    window for window in windows if (name, stat, window) not in self._results
+                )
+
+    def compute(self, names: Optional[Iterable[str]] = None):
+        """
+        Compute pending requests, one fused pass per series
+
+        Args:
+            names: Series to compute (defaults to every series with pending requests)
+        """
+        with self._lock:
+            names = list(self._pending if names is None else names)
+            pending = {name: self._pending.pop(name, {}) for name in names}
+        # Series are computed outside the lock so different series can be
+        # computed concurrently
+        for name, requests in pending.items():
+            outputs = rolling_window_stats(self._values(name), requests)
+            with self._lock:
+                for (stat, window), values in outputs.items():
+                    self._results[(name, stat, window)] = values
+
+    def get(self, name: str, stat: str, window: int) -> pd.Series:
+        """
+        Get a rolling statistic, computing pending requests if needed
+
+        Args:
+            name: Data column or registered series name
+            stat: Statistic name
+            window: Window length
+
+        Returns:
+            Series aligned with the data
+        """
+        key = (name, stat, window)
+        with self._lock:
+            if key not in self._results:
+                self.request(name, [window], [stat])
+                self.compute([name])
+        return pd.Series(self._results[key], index=self.data.index, name=name, copy=False)
+
+    def mean(self, name: str, window: int) -> pd.Series:
+        """Rolling mean of a series"""
+        return self.get(name, 'mean', window)
+
+    def std(self, name: str, window: int) -> pd.Series:
+        """Rolling sample standard deviation of a series"""
+        return self.get(name, 'std', window)
+
+    def _values(self, name: str) -> np.ndarray:
+        """Private method to resolve a series name to its values"""
+        if name in self._sources:
+            source = self._sources[name]
+            if callable(source):
+                source = self._sources[name] = source()
+            return source.to_numpy(dtype=np.float64)
+        if name in self.data.columns:
+            return self.data[name].to_numpy(dtype=np.float64)
+        raise KeyError(f"Unknown series for rolling statistics: {name}")
@@ -0,0 +1,121 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Callable, Iterable, List, Optional
+
+
+class TaskScheduler:
+    """
+    Runs a graph of named tasks, each as soon as its dependencies are done
+
+    Independent tasks run concurrently on a thread pool, which lets NumPy,
+    pandas and statsmodels work overlap wherever they release the GIL. A
+    task that raises does not stop the run: its exception is recorded and
+    every task depending on it fails without running.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize the scheduler
+
+        Args:
+            max_workers: Number of worker threads (1 runs tasks one by one
+                in dependency order)
+        """
+        self.max_workers = max_workers
+        self.timings = {}
+        self.errors = {}
+        self._tasks = {}
+
+    def add(self, name: str, func: Callable[[], Any], dependencies: Iterable[str] = ()):
+        """
+        Register a task
+
+        Args:
+            name: Unique task name
+            func: Callable computing the task result
+            dependencies: Names of tasks that must finish first
+        """
+        if name in self._tasks:
+            raise ValueError(f"Duplicate task: {name}")
+        self._tasks[name] = (func, list(dependencies))
+
+    def run(self, targets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Run tasks in dependency order
+
+        Args:
+            targets: Tasks to run together with their dependencies
+                (defaults to every task)
+
+        Returns:
+            Results of the tasks that succeeded, keyed by task name; failures
+            are recorded in ``errors`` and wall times in ``timings``
+        """
+        order = self._topological_order(self._tasks if targets is None else targets)
+        results = {}
+        if self.max_workers == 1:
+            for name in order:
+                self._run_task(name, results)
+            return results
+
+        dependents = {name: [] for name in order}
+        waiting = {}
+        for name in order:
+            dependencies = self._tasks[name][1]
+            waiting[name] = len(dependencies)
+            for dependency in dependencies:
+                dependents[dependency].append(name)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {
+                executor.submit(self._run_task, name, results): name
+                for name in order if waiting[name] == 0
+            }
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for dependent in dependents[running.pop(future)]:
+                        waiting[dependent] -= 1
+                        if waiting[dependent] == 0:
+                            running[executor.submit(self._run_task, dependent, results)] = dependent
+        return results
+
+    def _run_task(self, name: str, results: Dict[str, Any]):
+        """Private method to run one task and record its outcome"""
+        func, dependencies = self._tasks[name]
+        failed = [dependency for dependency in dependencies if dependency in self.errors]
+        if failed:
+            self.errors[name] = RuntimeError(f"Dependency {failed[0]} failed: {self.errors[failed[0]]}")
+            return
+        start = time.perf_counter()
+        try:
+            results[name] = func()
+        except Exception as e:
+            self.errors[name] = e
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def _topological_order(self, targets: Iterable[str]) -> List[str]:
+        """Private method to order the targets and their dependencies"""
+        order = []
+        state = {}
+        for target in targets:
+            stack = [(target, False)]
+            while stack:
+                name, expanded = stack.pop()
+                if expanded:
+                    state[name] = 'done'
+                    order.append(name)
+                    continue
+                if state.get(name) == 'done':
+                    continue
+                if state.get(name) == 'visiting':
+                    raise ValueError(f"Dependency cycle at task: {name}")
+                if name not in self._tasks:
+                    raise KeyError(f"Unknown task: {name}")
+                state[name] = 'visiting'
+                stack.append((name, True))
+                for dependency in self._tasks[name][1]:
+                    if state.get(dependency) != 'done':
+                        stack.append((dependency, False))
+        return order
@@ -0,0 +1,543 @@
+import argparse
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .result_store import ResultStore, MANIFEST_FILE
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Hot responses kept in memory, trimmed to both limits
+DEFAULT_CACHE_BYTES = 64 << 20
+DEFAULT_CACHE_ENTRIES = 1024
+
+# Seconds between checks for results written by a new analysis run
+DEFAULT_POLL_SECONDS = 1.0
+
+# Largest request line plus headers accepted from a client
+MAX_HEADER_BYTES = 16384
+
+JSON_TYPE = 'application/json'
+BINARY_TYPE = 'application/octet-stream'
+
+# Response formats: compact JSON, or raw little-endian arrays
+FORMATS = ('json', 'binary')
+
+# Query parameters of the results endpoint
+QUERY_PARAMETERS = ('start', 'end', 'last', 'format')
+
+REASONS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error'
+}
+
+
+class Response:
+    """HTTP response of the query service"""
+
+    def __init__(self, status: int, body: bytes = b'', content_type: str = JSON_TYPE,
+                 headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize the response
+
+        Args:
+            status: HTTP status code
+            body: Encoded response body
+            content_type: MIME type of the body
+            headers: Extra response headers
+        """
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers or {}
+
+    @classmethod
+    def json(cls, payload: Any, status: int = 200) -> 'Response':
+        """Build a compact JSON response"""
+        return cls(status, json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def error(cls, status: int, message: str) -> 'Response':
+        """Build a JSON error response"""
+        return cls.json({'error': message}, status)
+
+    def encode(self, keep_alive: bool, head: bool = False) -> bytes:
+        """
+        Serialize the response for the wire
+
+        Args:
+            keep_alive: Keep the connection open for further requests
+            head: Leave out the body (answer to a HEAD request)
+
+        Returns:
+            Status line, headers and body
+        """
+        headers = {
+            'Content-Type': self.content_type,
+            'Content-Length': str(len(self.body)),
+            'Connection': 'keep-alive' if keep_alive else 'close'
+        }
+        headers.update(self.headers)
+        lines = [f"HTTP/1.1 {self.status} {REASONS.get(self.status, '')}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        payload = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+        return payload if head or self.status == 304 else payload + self.body
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache of encoded responses
+
+    Keys start with the ticker and the version of its results, so responses
+    built from an older analysis run are never served after a reload.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        """
+        Initialize the response cache
+
+        Args:
+            max_bytes: Total body size the cache is trimmed to
+            max_entries: Number of responses the cache is trimmed to
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Response]:
+        """
+        Look up a response and mark it as recently used
+
+        Args:
+            key: Cache key, starting with the ticker and results version
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        response = self.entries.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def put(self, key: Tuple, response: Response):
+        """
+        Store a response and evict the least recently used ones
+
+        Args:
+            key: Cache key, starting with the ticker and results version
+            response: Response to keep
+        """
+        if len(response.body) > self.max_bytes:
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= len(previous.body)
+        self.entries[key] = response
+        self.bytes += len(response.body)
+        while self.bytes > self.max_bytes or len(self.entries) > self.max_entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= len(evicted.body)
+
+    def invalidate(self, ticker: str):
+        """
+        Drop every cached response of one ticker
+
+        Args:
+            ticker: Ticker whose results changed
+        """
+        for key in [key for key in self.entries if key[0] == ticker]:
+            self.bytes -= len(self.entries.pop(key).body)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache usage
+
+        Returns:
+            Dictionary with hit and miss counts, entries and cached bytes
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries), 'bytes': self.bytes}
+
+
+class ResultSource:
+    """Stored results of one ticker, reopened when a new analysis run lands"""
+
+    def __init__(self, ticker: str, path: str):
+        """
+        Initialize the source
+
+        Args:
+            ticker: Name the results are served under
+            path: Results directory written by ``TeslaStockAnalysis``
+        """
+        self.ticker = ticker
+        self.path = path
+        self.store = None
+        self.stamp = None
+        self.version = None
+
+    def refresh(self) -> bool:
+        """
+        Reopen the results if their manifest changed
+
+        The manifest is replaced last when results are saved, so a new
+        manifest means a complete new run, and it names array files that are
+        never rewritten, so the store keeps reading the run it was opened on.
+        The version combines the manifest's own version with its file stamp,
+        so it always describes the manifest actually loaded. Results that
+        cannot be read keep the previous version in service.
+
+        Returns:
+            True if a new version was loaded
+        """
+        try:
+            stat = os.stat(os.path.join(self.path, MANIFEST_FILE))
+        except FileNotFoundError:
+            return False
+        stamp = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        if stamp == self.stamp:
+            return False
+        store = ResultStore(self.path)
+        try:
+            manifest = store.manifest
+        except (FileNotFoundError, ValueError):
+            return False
+        self.store, self.stamp = store, stamp
+        self.version = f"{manifest.get('version', 0):x}-{stamp}"
+        return True
+
+    def describe(self) -> Dict[str, Any]:
+        """Summarize the served results: version, date range and row count"""
+        first, last = self.store.date_range()
+        return {
+            'version': self.version,
+            'first': None if first is None else first.isoformat(),
+            'last': None if last is None else last.isoformat(),
+            'rows': self.store.manifest['index']['shape'][0]
+        }
+
+
+class ResultService:
+    """
+    Asyncio HTTP service answering indicator queries from stored results
+
+    Serves the result stores written by ``TeslaStockAnalysis`` (or by the
+    batch runner, one per symbol) to any number of concurrent clients over
+    HTTP/1.1 keep-alive connections:
+
+    - ``GET /tickers``: served tickers with their date range and version
+    - ``GET /tickers/<ticker>``: the same for one ticker, plus its result keys
+    - ``GET /tickers/<ticker>/results/<key>``: one result, such as
+      ``technical_analysis/rsi``. Series accept ``start`` and ``end`` dates
+      (inclusive) or ``last`` (a duration such as ``90D`` before the last
+      date), and ``format=binary`` for raw arrays instead of JSON
+    - ``GET /health``: liveness and cache statistics
+
+    Date ranges are read through the store's partitioned range queries.
+    Encoded responses are kept in an LRU cache, and concurrent requests for
+    the same uncached response share one build. Result directories are
+    polled, so a new analysis run is picked up without a restart; a request
+    finding the array files of its version retired reloads them and is
+    answered once more. Every response carries the results version as its ETag.
+    """
+
+    def __init__(self, results: Optional[Dict[str, str]] = None, batch_dir: Optional[str] = None,
+                 cache_bytes: int = DEFAULT_CACHE_BYTES, cache_entries: int = DEFAULT_CACHE_ENTRIES,
+                 poll_seconds: float = DEFAULT_POLL_SECONDS):
+        """
+        Initialize the service
+
+        Args:
+            results: Results directories keyed by ticker
+            batch_dir: Batch output directory; every subdirectory holding
+                results is served under its name, including ones added later
+            cache_bytes: Total body size of the response cache
+            cache_entries: Number of responses in the response cache
+            poll_seconds: Seconds between checks for new results
+        """
+        self.results = dict(results or {})
+        self.batch_dir = batch_dir
+        self.poll_seconds = poll_seconds
+        self.cache = ResponseCache(cache_bytes, cache_entries)
+        self.sources = {}
+        self.address = None
+        self._pending = {}
+
+    def refresh(self) -> List[str]:
+        """
+        Pick up new tickers and results written since the last check
+
+        Returns:
+            Tickers whose results were (re)loaded
+        """
+        paths = dict(self.results)
+        if self.batch_dir and os.path.isdir(self.batch_dir):
+            with os.scandir(self.batch_dir) as it:
+                for entry in it:
+                    if entry.is_dir() and os.path.exists(os.path.join(entry.path, MANIFEST_FILE)):
+                        paths.setdefault(entry.name, entry.path)
+        changed = []
+        for ticker, path in paths.items():
+            source = self.sources.get(ticker)
+            if source is None or source.path != path:
+                source = ResultSource(ticker, path)
+            if source.refresh():
+                self.sources[ticker] = source
+                self.cache.invalidate(ticker)
+                changed.append(ticker)
+        return changed
+
+    async def handle(self, method: str, target: str, headers: Optional[Dict[str, str]] = None) -> Response:
+        """
+        Answer one request
+
+        Args:
+            method: HTTP method
+            target: Request target (path and query string)
+            headers: Request headers with lower-case names
+
+        Returns:
+            The response to send
+        """
+        if method not in ('GET', 'HEAD'):
+            return Response.error(405, f"Method not allowed: {method}")
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+        try:
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            try:
+                return await self._route(url.path, parts, params, headers or {})
+            except FileNotFoundError:
+                # Array files are retired one save after the manifest naming
+                # them is replaced, so a store that fell two runs behind can
+                # no longer read them; reload the manifests and answer once more
+                self.refresh()
+                return await self._route(url.path, parts, params, headers or {})
+        except KeyError as e:
+            return Response.error(404, str(e.args[0]) if e.args else 'Not found')
+        except ValueError as e:
+            return Response.error(400, str(e))
+        except Exception as e:
+            return Response.error(500, f"Error answering query: {str(e)}")
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """
+        Serve requests until cancelled, polling for new results
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+        """
+        self.refresh()
+        server = await asyncio.start_server(self._client, host, port, limit=MAX_HEADER_BYTES)
+        self.address = server.sockets[0].getsockname()
+        poller = asyncio.create_task(self._poll())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            poller.cancel()
+
+    async def _route(self, path: str, parts: List[str], params: Dict[str, str],
+                     headers: Dict[str, str]) -> Response:
+        """Private method to answer a request by its path segments"""
+        if parts == ['health']:
+            return Response.json({'status': 'ok', 'tickers': len(self.sources), 'cache': self.cache.stats()})
+        if parts == ['tickers']:
+            return Response.json({ticker: source.describe() for ticker, source in sorted(self.sources.items())})
+        if len(parts) < 2 or parts[0] != 'tickers':
+            return Response.error(404, f"Unknown path: {path}")
+        source = self.sources.get(parts[1])
+        if source is None:
+            return Response.error(404, f"Unknown ticker: {parts[1]}")
+        # Responses only change with the results version
+        etag = f'"{source.version}"'
+        if headers.get('if-none-match') == etag:
+            return Response(304, headers={'ETag': etag})
+        if len(parts) == 2:
+            response = Response.json(dict(source.describe(), ticker=source.ticker, keys=source.store.keys()))
+            response.headers['ETag'] = etag
+            return response
+        if parts[2] == 'results' and len(parts) > 3:
+            return await self._result(source, '/'.join(parts[3:]), params)
+        return Response.error(404, f"Unknown path: {path}")
+
+    async def _result(self, source: ResultSource, key: str, params: Dict[str, str]) -> Response:
+        """Private method to answer a results query from the cache or by building it once"""
+        unknown = sorted(set(params) - set(QUERY_PARAMETERS))
+        if unknown:
+            raise ValueError(f"Unknown query parameters: {unknown}")
+        if params.get('format', 'json') not in FORMATS:
+            raise ValueError(f"Unknown format: {params['format']}. Expected one of {list(FORMATS)}")
+        cache_key = (source.ticker, source.version, key) + tuple(params.get(name) for name in QUERY_PARAMETERS)
+        response = self.cache.get(cache_key)
+        if response is not None:
+            return response
+        # Concurrent requests for the same response share one build, which
+        # outlives any single client disconnecting
+        pending = self._pending.get(cache_key)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            pending = loop.run_in_executor(None, self._build, source.store, source.version, key, params)
+            self._pending[cache_key] = pending
+            pending.add_done_callback(partial(self._finish_build, cache_key))
+        return await asyncio.shield(pending)
+
+    def _finish_build(self, cache_key: Tuple, pending: asyncio.Future):
+        """Private method to cache a finished build and release its waiters"""
+        del self._pending[cache_key]
+        if not pending.cancelled() and pending.exception() is None:
+            self.cache.put(cache_key, pending.result())
+
+    @staticmethod
+    def _build(store: ResultStore, version: str, key: str, params: Dict[str, str]) -> Response:
+        """Private method to read one result and encode it (runs on a worker thread)"""
+        entry = store.manifest['entries'].get(key)
+        if entry is None:
+            raise KeyError(f"No stored result for: {key}")
+        binary = params.get('format') == 'binary'
+        headers = {'ETag': f'"{version}"'}
+        if entry['kind'] != 'series':
+            if any(name in params for name in ('start', 'end', 'last')):
+                raise ValueError(f"Only date-indexed series can be queried by date: {key}")
+            return _encode_value(store.load_series(key), binary, headers)
+
+        start, end = params.get('start'), params.get('end')
+        if 'last' in params:
+            if start is not None:
+                raise ValueError("Use either 'start' or 'last'")
+            last = store.date_range()[1]
+            start = None if last is None else last - pd.Timedelta(params['last'])
+        for bound in (start, end):
+            if bound is not None:
+                pd.Timestamp(bound)
+        series = store.query(key, start, end)
+        if binary:
+            dates = np.ascontiguousarray(series.index.values.astype('datetime64[ns]').view('<i8'))
+            values = np.ascontiguousarray(series.to_numpy(), dtype=series.dtype.newbyteorder('<'))
+            headers.update({'X-Rows': str(len(series)), 'X-Index-Dtype': '<i8', 'X-Dtype': values.dtype.str})
+            return Response(200, dates.tobytes() + values.tobytes(), BINARY_TYPE, headers)
+        body = series.to_json(orient='split', date_format='epoch', date_unit='ms', double_precision=15)
+        return Response(200, body.encode('utf-8'), JSON_TYPE, headers)
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Private method to serve the requests of one connection"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(Response.error(431, 'Request headers too large').encode(False))
+                    break
+                request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+                try:
+                    method, target, protocol = request_line.split(' ')
+                except ValueError:
+                    writer.write(Response.error(400, 'Malformed request line').encode(False))
+                    break
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if protocol == 'HTTP/1.0' else connection != 'close'
+                if headers.get('content-length', '0') != '0' or 'transfer-encoding' in headers:
+                    # Queries carry no body; rather than reading one, close afterwards
+                    keep_alive = False
+                response = await self.handle(method, target, headers)
+                writer.write(response.encode(keep_alive, head=method == 'HEAD'))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _poll(self):
+        """Private method to check for new results until cancelled"""
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            for ticker in self.refresh():
+                print(f"Reloaded results for {ticker} (version {self.sources[ticker].version})")
+
+
+def _encode_value(value: Any, binary: bool, headers: Dict[str, str]) -> Response:
+    """Private helper encoding a matrix, array or text result"""
+    if isinstance(value, str):
+        if binary:
+            raise ValueError("Text results have no binary form")
+        body = json.dumps({'value': value}, separators=(',', ':'))
+        return Response(200, body.encode('utf-8'), JSON_TYPE, headers)
+    if isinstance(value, pd.DataFrame):
+        if binary:
+            raise ValueError("Matrix results have no binary form; request JSON for their labels")
+        body = value.to_json(orient='split', double_precision=15)
+        return Response(200, body.encode('utf-8'), JSON_TYPE, headers)
+    values = np.asarray(value)
+    if binary:
+        values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+        headers = dict(headers, **{'X-Shape': ','.join(map(str, values.shape)), 'X-Dtype': values.dtype.str})
+        return Response(200, values.tobytes(), BINARY_TYPE, headers)
+    data = pd.Series(values.ravel()).to_json(orient='values', double_precision=15)
+    shape = json.dumps(list(values.shape), separators=(',', ':'))
+    body = f'{{"shape":{shape},"dtype":"{values.dtype.name}","data":{data}}}'
+    return Response(200, body.encode('utf-8'), JSON_TYPE, headers)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point for the query service"""
+    parser = argparse.ArgumentParser(description='Serve stored analysis results over HTTP')
+    parser.add_argument('--results', action='append', default=[], metavar='TICKER=PATH',
+                        help='Serve a results directory under a ticker (repeatable; '
+                             'defaults to TSLA=tesla_analysis_results)')
+    parser.add_argument('--batch-dir', default=None,
+                        help='Serve every symbol in a batch output directory')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    parser.add_argument('--cache-mb', type=float, default=DEFAULT_CACHE_BYTES / 2**20,
+                        help='Memory for cached responses in MB')
+    parser.add_argument('--poll-seconds', type=float, default=DEFAULT_POLL_SECONDS,
+                        help='Seconds between checks for new results')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for item in args.results:
+        ticker, separator, path = item.partition('=')
+        if not separator or not ticker or not path:
+            parser.error(f"Expected TICKER=PATH: {item}")
+        results[ticker] = path
+    if not results and not args.batch_dir:
+        results['TSLA'] = 'tesla_analysis_results'
+
+    service = ResultService(results, args.batch_dir, cache_bytes=int(args.cache_mb * 2**20),
+                            poll_seconds=args.poll_seconds)
+    print(f"Serving analysis results on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
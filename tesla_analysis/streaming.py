@@ -0,0 +1,404 @@
+import argparse
+import csv
+import io
+import json
+import math
+import socket
+import sys
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analyzers import PriceAnalyzer, VolumeAnalyzer, TechnicalAnalyzer, SentimentAnalyzer
+from .data_loader import StockDataLoader
+from .incremental import StreamingWindowState, EwmMeanState, PctChangeState, RsiState
+from .indicators import ema_alpha
+
+# Columns of a bar, in the order of the input CSV files
+BAR_COLUMNS = ['Date', 'Close', 'High', 'Low', 'Open', 'Volume']
+
+# Seconds between checks for new lines when following a file
+DEFAULT_POLL_INTERVAL = 0.5
+
+# Bytes read from a socket feed at a time
+SOCKET_BUFFER_SIZE = 1 << 16
+
+# Per-bar latencies kept for the latency report
+LATENCY_SAMPLES = 10_000
+
+
+def parse_lines(lines: List[str], columns: List[str] = BAR_COLUMNS) -> List[Dict[str, Any]]:
+    """
+    Parse bars from CSV or JSON lines
+
+    CSV lines are parsed together with the same pandas reader the data
+    loader uses, so prices are bit-identical to a batch load of the same
+    rows. Lines that cannot be parsed are passed on as ``{'line': ...}`` and
+    rejected by the analysis.
+
+    Args:
+        lines: Lines of comma-separated values in ``columns`` order, or JSON objects
+        columns: Column names of the CSV fields
+
+    Returns:
+        Bars in line order, each a dictionary with the date and numeric fields
+    """
+    bars = []
+    run = []
+    for line in lines:
+        if not line.strip():
+            continue
+        if not line.lstrip().startswith('{'):
+            run.append(line if line.endswith('\n') else line + '\n')
+            continue
+        bars.extend(_parse_csv(run, columns))
+        run = []
+        try:
+            fields = json.loads(line)
+            bars.append({'Date': pd.Timestamp(fields['Date']), **{
+                column: float(fields[column]) for column in columns if column != 'Date' and column in fields
+            }})
+        except (KeyError, TypeError, ValueError):
+            bars.append({'line': line})
+    bars.extend(_parse_csv(run, columns))
+    return bars
+
+
+def _parse_csv(lines: List[str], columns: List[str]) -> List[Dict[str, Any]]:
+    """Private function to parse CSV lines in one reader call, isolating bad lines"""
+    if not lines:
+        return []
+    try:
+        frame = pd.read_csv(io.StringIO(''.join(lines)), header=None, names=columns)
+        frame['Date'] = pd.to_datetime(frame['Date'])
+        parsed = all(pd.api.types.is_numeric_dtype(frame[column]) for column in columns if column != 'Date')
+    except (ValueError, pd.errors.ParserError):
+        parsed = False
+    if parsed:
+        return frame.to_dict('records')
+    if len(lines) == 1:
+        return [{'line': lines[0]}]
+    return [bar for line in lines for bar in _parse_csv([line], columns)]
+
+
+def iter_csv_tail(path: str, follow: bool = True, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                  idle_timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Read bars from a CSV file, following it as rows are appended
+
+    Each poll parses every complete line written since the previous one; a
+    row still being written is picked up on the next poll.
+
+    Args:
+        path: Path to the CSV file
+        follow: Keep waiting for new rows after reaching the end of the file
+        poll_interval: Seconds between checks for new rows
+        idle_timeout: Stop after this many seconds without new rows
+
+    Yields:
+        Bars in file order
+    """
+    with open(path, newline='') as f:
+        columns = next(csv.reader([f.readline()]))
+        pending = ''
+        idle_since = time.monotonic()
+        while True:
+            lines = []
+            for chunk in iter(f.readline, ''):
+                pending += chunk
+                if pending.endswith('\n'):
+                    lines.append(pending)
+                    pending = ''
+            if not follow and pending:
+                lines.append(pending)
+            if lines:
+                idle_since = time.monotonic()
+                yield from parse_lines(lines, columns)
+            if not follow:
+                return
+            if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                return
+            time.sleep(poll_interval)
+
+
+def iter_socket(host: str, port: int, columns: List[str] = BAR_COLUMNS) -> Iterator[Dict[str, Any]]:
+    """
+    Read bars from a local TCP feed sending one CSV or JSON line per bar
+
+    Args:
+        host: Host of the feed
+        port: Port of the feed
+        columns: Column names of CSV lines
+
+    Yields:
+        Bars until the feed closes the connection
+    """
+    with socket.create_connection((host, port)) as connection:
+        pending = b''
+        while True:
+            data = connection.recv(SOCKET_BUFFER_SIZE)
+            if not data:
+                break
+            *lines, pending = (pending + data).split(b'\n')
+            yield from parse_lines([line.decode() for line in lines], columns)
+        if pending:
+            yield from parse_lines([pending.decode()], columns)
+
+
+class StreamingAnalysis:
+    """
+    Live analysis updating the streaming indicators one bar at a time
+
+    Every bar costs O(1) per indicator: EMAs and the RSI carry their
+    smoothed averages, percentage changes the previous value, and rolling
+    windows the running sums of the fused rolling kernel. Values are
+    identical to those of a batch run over the same bars.
+    """
+
+    def __init__(self, subscribers: Optional[List[Callable[[Dict[str, Any]], None]]] = None,
+                 keep_history: bool = False):
+        """
+        Initialize the streaming state with the analyzer parameters
+
+        Args:
+            subscribers: Callables receiving every published update
+            keep_history: Keep all published values for ``to_frame``
+        """
+        self.sma_windows = PriceAnalyzer.PARAMETERS['sma_windows']
+        self.ema_windows = PriceAnalyzer.PARAMETERS['ema_windows']
+        self.volume_windows = VolumeAnalyzer.PARAMETERS['windows']
+        self.bollinger_window = TechnicalAnalyzer.PARAMETERS['bollinger_window']
+        self.bollinger_std = TechnicalAnalyzer.PARAMETERS['bollinger_std']
+        self.volatility_window = SentimentAnalyzer.PARAMETERS['volatility_window']
+
+        close_means = sorted(set(self.sma_windows) | {self.bollinger_window})
+        self.states = {
+            'close_rolling': StreamingWindowState({'mean': close_means, 'std': [self.bollinger_window]}),
+            'close_ema': {window: EwmMeanState(ema_alpha(window), window) for window in self.ema_windows},
+            'close_pct': PctChangeState(),
+            'close_rsi': RsiState(TechnicalAnalyzer.PARAMETERS['rsi_window']),
+            'returns_rolling': StreamingWindowState({'std': [self.volatility_window]}),
+            'volume_rolling': StreamingWindowState({'mean': self.volume_windows}),
+            'volume_pct': PctChangeState()
+        }
+        self.subscribers = list(subscribers or [])
+        self.bars = 0
+        self.rejected = 0
+        self.last_date = None
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.history = [] if keep_history else None
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]):
+        """
+        Register a callable receiving every published update
+
+        Args:
+            callback: Called with the bar date, indicator values and latency
+        """
+        self.subscribers.append(callback)
+
+    def warm_up(self, data: pd.DataFrame):
+        """
+        Feed historical rows through the state without publishing them
+
+        Args:
+            data: Preprocessed stock data indexed by date
+        """
+        closes = data['Close'].to_numpy(dtype=np.float64).tolist()
+        volumes = data['Volume'].to_numpy(dtype=np.float64).tolist()
+        for date, close, volume in zip(data.index, closes, volumes):
+            self._check_bar(date, close, volume)
+            self._compute(close, volume)
+            self.last_date = date
+            self.bars += 1
+
+    def update(self, bar: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Add one bar and publish the updated indicators
+
+        The bar is validated before any state is advanced, so a rejected bar
+        leaves the indicators untouched.
+
+        Args:
+            bar: Dictionary with at least 'Date', 'Close' and 'Volume'
+
+        Returns:
+            Dictionary mapping result keys to the values for this bar
+        """
+        start = time.perf_counter()
+        date, close, volume = self._parse_bar(bar)
+        return self._publish(date, close, volume, start)
+
+    def run(self, source: Iterable[Dict[str, Any]], limit: Optional[int] = None) -> int:
+        """
+        Consume bars from a source until it is exhausted
+
+        Invalid bars are counted in ``rejected`` and skipped so one bad
+        row does not stop a live feed. Only parsing and validation can
+        reject a bar; exceptions raised by subscribers propagate.
+
+        Args:
+            source: Iterable of bars, e.g. from ``iter_csv_tail`` or ``iter_socket``
+            limit: Stop after this many accepted bars
+
+        Returns:
+            Number of bars accepted
+        """
+        accepted = 0
+        for bar in source:
+            start = time.perf_counter()
+            try:
+                date, close, volume = self._parse_bar(bar)
+            except (KeyError, TypeError, ValueError):
+                self.rejected += 1
+                continue
+            self._publish(date, close, volume, start)
+            accepted += 1
+            if limit is not None and accepted >= limit:
+                break
+        return accepted
+
+    def latency_stats(self) -> Dict[str, float]:
+        """
+        Summarize the per-bar update latency
+
+        Returns:
+            Dictionary with the sample count and mean, median, p99 and
+            maximum latency in seconds
+        """
+        if not self.latencies:
+            return {'count': 0}
+        samples = np.fromiter(self.latencies, dtype=np.float64)
+        return {
+            'count': len(samples),
+            'mean': float(samples.mean()),
+            'p50': float(np.percentile(samples, 50)),
+            'p99': float(np.percentile(samples, 99)),
+            'max': float(samples.max())
+        }
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Collect the published values kept with ``keep_history``
+
+        Returns:
+            DataFrame indexed by bar date with one column per result key
+        """
+        if self.history is None:
+            raise ValueError("History is only kept with keep_history=True")
+        dates = [date for date, _ in self.history]
+        rows = [values for _, values in self.history]
+        return pd.DataFrame(rows, index=pd.DatetimeIndex(dates, name='Date'), dtype=float)
+
+    def _parse_bar(self, bar: Dict[str, Any]) -> Tuple[pd.Timestamp, float, float]:
+        """Private method to read and validate a bar before any state changes"""
+        date = pd.Timestamp(bar['Date'])
+        close = float(bar['Close'])
+        volume = float(bar['Volume'])
+        self._check_bar(date, close, volume)
+        return date, close, volume
+
+    def _publish(self, date: pd.Timestamp, close: float, volume: float, start: float) -> Dict[str, float]:
+        """Private method to advance the state with a validated bar and notify subscribers"""
+        values = self._compute(close, volume)
+        self.last_date = date
+        self.bars += 1
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+
+        if self.history is not None:
+            self.history.append((date, values))
+        update = {'date': date, 'values': values, 'latency_seconds': latency}
+        for callback in self.subscribers:
+            callback(update)
+        return values
+
+    def _check_bar(self, date: pd.Timestamp, close: float, volume: float):
+        """Private method to apply the data loader's validation to one bar"""
+        if math.isnan(close) or math.isnan(volume):
+            raise ValueError(f"Bar at {date} contains missing values")
+        if volume <= 0:
+            raise ValueError(f"Bar at {date} has zero or negative volume")
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"Bar at {date} is not after the previous bar at {self.last_date}")
+
+    def _compute(self, close: float, volume: float) -> Dict[str, float]:
+        """Private method to advance every state by one bar"""
+        states = self.states
+        returns = states['close_pct'].update(close)
+        close_stats = states['close_rolling'].update(close)
+        volume_stats = states['volume_rolling'].update(volume)
+        returns_stats = states['returns_rolling'].update(returns)
+
+        values = {}
+        for window in self.sma_windows:
+            values[f'price_trend/moving_averages/sma_{window}'] = close_stats[('mean', window)]
+        for window, ema in states['close_ema'].items():
+            values[f'price_trend/moving_averages/ema_{window}'] = ema.update(close)
+        values['price_trend/price_change'] = returns
+        for window in self.volume_windows:
+            values[f'volume_analysis/volume_averages/volume_ma_{window}'] = volume_stats[('mean', window)]
+        values['volume_analysis/volume_change'] = states['volume_pct'].update(volume)
+        values['technical_analysis/rsi'] = states['close_rsi'].update(close)
+        mean = close_stats[('mean', self.bollinger_window)]
+        std = close_stats[('std', self.bollinger_window)]
+        values['technical_analysis/bollinger_bands/upper'] = mean + (std * self.bollinger_std)
+        values['technical_analysis/bollinger_bands/lower'] = mean - (std * self.bollinger_std)
+        values['sentiment_analysis/returns'] = returns
+        values['sentiment_analysis/volatility'] = returns_stats[('std', self.volatility_window)]
+        return values
+
+
+def _print_update(update: Dict[str, Any]):
+    """Private function to write one update as a JSON line"""
+    values = {key: (None if math.isnan(value) else value) for key, value in update['values'].items()}
+    record = {'date': update['date'].isoformat(), 'latency_us': update['latency_seconds'] * 1e6, 'values': values}
+    print(json.dumps(record), flush=True)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point for live analysis"""
+    parser = argparse.ArgumentParser(description='Update the stock indicators live, one bar at a time')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--tail', help='CSV file to follow as rows are appended')
+    source.add_argument('--socket', help='host:port of a local feed sending one bar per line')
+    parser.add_argument('--warm-up', help='CSV file with the history preceding the live bars')
+    parser.add_argument('--no-follow', action='store_true',
+                        help='Stop at the end of the tailed file instead of waiting for rows')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help='Seconds between checks for new rows in the tailed file')
+    parser.add_argument('--quiet', action='store_true', help='Only print the latency summary')
+    args = parser.parse_args(argv)
+
+    analysis = StreamingAnalysis()
+    if args.warm_up:
+        analysis.warm_up(StockDataLoader(args.warm_up).load_data())
+    warm_bars = analysis.bars
+    if not args.quiet:
+        analysis.subscribe(_print_update)
+
+    if args.tail:
+        bars = iter_csv_tail(args.tail, follow=not args.no_follow, poll_interval=args.poll_interval)
+    else:
+        host, _, port = args.socket.rpartition(':')
+        bars = iter_socket(host or 'localhost', int(port))
+    try:
+        accepted = analysis.run(bars)
+    except KeyboardInterrupt:
+        accepted = analysis.bars - warm_bars
+
+    stats = analysis.latency_stats()
+    print(f"Processed {accepted:,} bars ({analysis.rejected:,} rejected)", file=sys.stderr)
+    if stats['count']:
+        print(
+            f"Latency per bar: mean {stats['mean'] * 1e6:.1f} us, p50 {stats['p50'] * 1e6:.1f} us, "
+            f"p99 {stats['p99'] * 1e6:.1f} us, max {stats['max'] * 1e6:.1f} us",
+            file=sys.stderr
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Bundled daily bars the tests slice their inputs from
+SAMPLE_CSV = Path(__file__).parent.parent / 'input_folder' / 'Tesla_stock_data.csv'
+
+
+@pytest.fixture
+def sample_lines():
+    """Lines of the bundled CSV, header first"""
+    return SAMPLE_CSV.read_text().splitlines(True)
+
+
+def assert_same_values(expected, actual):
+    """Assert two stored results are identical, treating NaN as equal"""
+    if isinstance(expected, pd.Series):
+        assert expected.index.equals(actual.index)
+        np.testing.assert_array_equal(expected.to_numpy(dtype=float), actual.to_numpy(dtype=float))
+    elif isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(expected, actual)
+    elif isinstance(expected, str):
+        assert expected == actual
+    else:
+        np.testing.assert_array_equal(expected, actual)
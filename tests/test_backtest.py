@@ -0,0 +1,172 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SAMPLE_CSV
+from tesla_analysis import indicators
+from tesla_analysis.backtest import METRICS, Backtester, last_crossing, last_event
+from tesla_analysis.rolling import rolling_window_stats
+
+COST = 0.001
+
+
+def sample_prices():
+    """Two tickers from the bundled closes, the second with a gap of missing prices"""
+    close = pd.read_csv(SAMPLE_CSV, parse_dates=['Date'], index_col='Date')['Close'].astype(float)
+    gapped = close * 1.5
+    gapped.iloc[400:420] = np.nan
+    return pd.DataFrame({'AAA': close, 'BBB': gapped}).iloc[:1500]
+
+
+def loop_metrics(prices, positions, cost, periods_per_year):
+    """Metrics of one ticker's positions, bar by bar"""
+    strategy, valid = [], 0
+    exposed = trades = 0
+    previous = 0.0
+    for t, position in enumerate(positions):
+        change = abs(position - previous)
+        trades += change != 0
+        value = -cost * change
+        if t and not math.isnan(prices[t]) and not math.isnan(prices[t - 1]):
+            valid += 1
+            exposed += previous != 0
+            value += previous * (prices[t] / prices[t - 1] - 1)
+        strategy.append(value)
+        previous = position
+
+    equity, peak, drawdown = 1.0, 1.0, 0.0
+    for value in strategy:
+        equity *= 1 + max(value, -1.0)
+        peak = max(peak, equity)
+        drawdown = min(drawdown, equity / peak - 1)
+    # Moments are taken over the bars with a return; costs on other bars still count
+    mean = sum(strategy) / valid
+    variance = (sum(value * value for value in strategy) - valid * mean ** 2) / (valid - 1)
+    return {
+        'total_return': equity - 1,
+        'annual_return': equity ** (periods_per_year / valid) - 1,
+        'sharpe': mean / math.sqrt(variance) * math.sqrt(periods_per_year),
+        'max_drawdown': drawdown,
+        'trades': trades,
+        'exposure': exposed / valid
+    }
+
+
+def check_sweep(backtester, report, configs, loop_positions):
+    """Compare every (configuration, ticker) row with the loop reference"""
+    prices = backtester.values
+    assert len(report) == len(configs) * prices.shape[1]
+    for row, (config, ticker) in enumerate((config, ticker) for config in configs
+                                           for ticker in range(prices.shape[1])):
+        positions = loop_positions(config, ticker)
+        expected = loop_metrics(prices[:, ticker], positions, backtester.cost, backtester.periods_per_year)
+        actual = report.iloc[row]
+        for name in METRICS:
+            np.testing.assert_allclose(actual[name], expected[name], rtol=1e-9, atol=1e-12,
+                                       err_msg=f'{name} {config} {ticker}')
+
+
+def test_last_event_matches_loop():
+    events = np.random.default_rng(0).random((3, 50, 4)) < 0.1
+    expected = np.full(events.shape, -1)
+    for grid, ticker in np.ndindex(3, 4):
+        last = -1
+        for t in range(50):
+            last = t if events[grid, t, ticker] else last
+            expected[grid, t, ticker] = last
+    actual = last_event(events)
+    assert actual.dtype == np.int32
+    np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize('below', [True, False])
+def test_last_crossing_matches_loop(below):
+    values = np.random.default_rng(1).uniform(0, 100, (2, 60, 3))
+    values[1, 10:15] = np.nan
+    index = np.array([0, 1, 1, 0, 1])
+    thresholds = np.array([20.0, 20.0, 80.0, 20.0, 50.0])
+
+    actual = last_crossing(values, index, thresholds, below)
+    assert actual.shape == (5, 60, 3)
+    for config, ticker in np.ndindex(5, 3):
+        last = -1
+        for t in range(60):
+            value = values[index[config], t, ticker]
+            if value < thresholds[config] if below else value > thresholds[config]:
+                last = t
+            assert actual[config, t, ticker] == last
+
+
+@pytest.mark.parametrize('allow_short', [False, True])
+def test_crossover_matches_loop(allow_short):
+    prices = sample_prices()
+    backtester = Backtester(prices, cost=COST, allow_short=allow_short, periods_per_year=252)
+    configs = [(5, 20), (5, 50), (10, 20), (10, 50), (20, 50)]
+    report = backtester.moving_average_crossover([5, 10, 20], [20, 50])
+    averages = {window: indicators.sma(backtester.values, [window])[0] for window in (5, 10, 20, 50)}
+
+    def positions(config, ticker):
+        fast, slow = averages[config[0]][:, ticker], averages[config[1]][:, ticker]
+        signal = []
+        for fast_value, slow_value in zip(fast, slow):
+            if fast_value > slow_value:
+                signal.append(1.0)
+            else:
+                signal.append(-1.0 if allow_short and fast_value < slow_value else 0.0)
+        return signal
+
+    check_sweep(backtester, report, configs, positions)
+
+
+@pytest.mark.parametrize('allow_short', [False, True])
+def test_rsi_threshold_matches_loop(allow_short):
+    prices = sample_prices()
+    backtester = Backtester(prices, cost=COST, allow_short=allow_short, periods_per_year=252)
+    configs = [(window, low, high) for window in (7, 14) for low in (30, 40) for high in (60, 70)]
+    report = backtester.rsi_threshold([7, 14], [30, 40], [60, 70])
+    rsi = {window: indicators.rsi(backtester.values, [window])[0] for window in (7, 14)}
+
+    def positions(config, ticker):
+        window, low, high = config
+        state, signal = 0.0, []
+        for value in rsi[window][:, ticker]:
+            if value < low:
+                state = 1.0
+            elif value > high:
+                state = -1.0 if allow_short else 0.0
+            signal.append(state)
+        return signal
+
+    check_sweep(backtester, report, configs, positions)
+
+
+@pytest.mark.parametrize('allow_short', [False, True])
+def test_bollinger_reversion_matches_loop(allow_short):
+    prices = sample_prices()
+    backtester = Backtester(prices, cost=COST, allow_short=allow_short, periods_per_year=252)
+    configs = [(window, num_std) for window in (10, 20) for num_std in (1.0, 2.0)]
+    report = backtester.bollinger_reversion([10, 20], [1.0, 2.0])
+    stats = rolling_window_stats(backtester.values, {'mean': [10, 20], 'std': [10, 20]})
+
+    def positions(config, ticker):
+        window, num_std = config
+        mean, std = stats[('mean', window)][:, ticker], stats[('std', window)][:, ticker]
+        state, previous_side, signal = 0.0, None, []
+        for close, middle, deviation in zip(backtester.values[:, ticker], mean, std):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                score = (close - middle) / deviation
+            side = np.sign(score)
+            # Crossing the middle band (or a bar without a band) exits
+            if previous_side is not None and not side == previous_side:
+                state = 0.0
+            previous_side = side
+            if score < -num_std:
+                state = 1.0
+            elif allow_short and score > num_std:
+                state = -1.0
+            signal.append(state)
+        return signal
+
+    check_sweep(backtester, report, configs, positions)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from conftest import SAMPLE_CSV
+from tesla_analysis.batch import BatchAnalysis
+
+
+def write_symbols(directory, lines):
+    """Write two overlapping slices of the sample as two symbols"""
+    directory.mkdir(exist_ok=True)
+    (directory / 'AAA.csv').write_text(''.join(lines[:1] + lines[1:900]))
+    (directory / 'BBB.csv').write_text(''.join(lines[:1] + lines[300:1200]))
+
+
+def expected_correlation():
+    data = pd.read_csv(SAMPLE_CSV, parse_dates=['Date'], index_col='Date')['Close']
+    returns = pd.concat({'AAA': data.iloc[:899].pct_change(), 'BBB': data.iloc[299:1199].pct_change()},
+                        axis=1)
+    return returns.corr()
+
+
+def test_malformed_file_is_left_out_of_correlation(tmp_path, sample_lines):
+    write_symbols(tmp_path / 'input', sample_lines)
+    (tmp_path / 'input' / 'BAD.csv').write_text('Date,Close\n2020-01-02,1.0\n')
+    batch = BatchAnalysis(str(tmp_path / 'input'), str(tmp_path / 'output'))
+
+    correlation = batch.cross_asset_correlation(chunksize=100)
+    assert list(correlation.columns) == ['AAA', 'BBB']
+    np.testing.assert_allclose(correlation.to_numpy(), expected_correlation().to_numpy(), rtol=1e-10)
+    assert 'Missing required columns' in batch.correlation_errors['BAD']
+
+
+def test_unsorted_and_duplicate_dates_align(tmp_path, sample_lines):
+    write_symbols(tmp_path / 'input', sample_lines)
+    lines = sample_lines[300:1200]
+    # Swap two rows inside a chunk and repeat one row
+    lines[10], lines[11] = lines[11], lines[10]
+    lines.insert(50, lines[50])
+    (tmp_path / 'input' / 'BBB.csv').write_text(''.join(sample_lines[:1] + lines))
+    batch = BatchAnalysis(str(tmp_path / 'input'), str(tmp_path / 'output'))
+
+    correlation = batch.cross_asset_correlation(chunksize=100)
+    np.testing.assert_allclose(correlation.to_numpy(), expected_correlation().to_numpy(), rtol=1e-10)
+
+
+def test_same_file_names_in_different_directories_stay_apart(tmp_path, sample_lines):
+    write_symbols(tmp_path / 'us', sample_lines)
+    write_symbols(tmp_path / 'eu', sample_lines)
+    batch = BatchAnalysis(str(tmp_path / '*' / '*.csv'), str(tmp_path / 'output'), max_workers=1)
+
+    symbols = batch.discover_symbols()
+    assert sorted(symbols) == ['eu_AAA', 'eu_BBB', 'us_AAA', 'us_BBB']
+    assert symbols['us_AAA'] == str(tmp_path / 'us' / 'AAA.csv')
+    assert sorted(batch.cross_asset_correlation().columns) == sorted(symbols)
@@ -0,0 +1,128 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SAMPLE_CSV, assert_same_values
+from tesla_analysis.analyzers import PriceAnalyzer, TechnicalAnalyzer
+from tesla_analysis.incremental import SEASONAL_FILE, STATE_FILE, IncrementalState
+from tesla_analysis.main import TeslaStockAnalysis
+from tesla_analysis.result_store import ResultStore
+
+
+def run(data_path, results_path, incremental=True, quality='raise', seasonal_method=None):
+    """Run the pipeline without the result cache"""
+    analysis = TeslaStockAnalysis(str(data_path), results_path=str(results_path),
+                                  incremental=incremental, cache_dir=None, quality=quality,
+                                  seasonal_method=seasonal_method)
+    analysis.run_analysis()
+    return analysis
+
+
+def check_appends_match_full_run(tmp_path, lines):
+    """Append rows in batches and compare the extended results with a full run"""
+    growing = tmp_path / 'growing.csv'
+    growing.write_text(''.join(lines[:1001]))
+    run(growing, tmp_path / 'incremental')
+    assert (tmp_path / 'incremental' / STATE_FILE).exists()
+    for start, stop in [(1001, 1002), (1002, 1300), (1300, 1500)]:
+        with open(growing, 'a') as f:
+            f.writelines(lines[start:stop])
+        run(growing, tmp_path / 'incremental')
+
+    full = tmp_path / 'full.csv'
+    full.write_text(''.join(lines[:1500]))
+    run(full, tmp_path / 'full', incremental=False)
+
+    expected = ResultStore(str(tmp_path / 'full'))
+    actual = ResultStore(str(tmp_path / 'incremental'))
+    assert sorted(expected.keys()) == sorted(actual.keys())
+    for key in expected.keys():
+        assert_same_values(expected.load_series(key), actual.load_series(key))
+
+
+def test_appended_rows_match_full_run(tmp_path, sample_lines):
+    check_appends_match_full_run(tmp_path, sample_lines)
+
+
+def test_non_default_parameters_stay_incremental(tmp_path, sample_lines, monkeypatch):
+    monkeypatch.setattr(PriceAnalyzer, 'PARAMETERS', {'sma_windows': [10, 30], 'ema_windows': [12]})
+    monkeypatch.setattr(TechnicalAnalyzer, 'PARAMETERS',
+                        {'rsi_window': 9, 'bollinger_window': 15, 'bollinger_std': 2.5})
+    check_appends_match_full_run(tmp_path, sample_lines)
+
+
+def test_state_for_other_parameters_is_not_reused(tmp_path, sample_lines, monkeypatch):
+    data = tmp_path / 'data.csv'
+    data.write_text(''.join(sample_lines[:600]))
+    run(data, tmp_path / 'results')
+    monkeypatch.setattr(TechnicalAnalyzer, 'PARAMETERS',
+                        {'rsi_window': 10, 'bollinger_window': 20, 'bollinger_std': 2})
+    assert IncrementalState.load(str(tmp_path / 'results')) is None
+
+
+
+def test_repaired_rows_before_the_stored_ones_recompute(tmp_path, sample_lines):
+    data = tmp_path / 'data.csv'
+    data.write_text(''.join(sample_lines[:801]))
+    run(data, tmp_path / 'incremental', quality='repair')
+    # One new row, and one dated inside the stored history that repair sorts into it
+    with open(data, 'a') as f:
+        f.write(sample_lines[801] + '2012-06-23' + sample_lines[500][len('2012-06-20'):])
+    run(data, tmp_path / 'incremental', quality='repair')
+    run(data, tmp_path / 'full', incremental=False, quality='repair')
+
+    expected = ResultStore(str(tmp_path / 'full'))
+    actual = ResultStore(str(tmp_path / 'incremental'))
+    for key in expected.keys():
+        assert_same_values(expected.load_series(key), actual.load_series(key))
+
+
+def test_state_for_other_loader_settings_is_not_reused(tmp_path, sample_lines):
+    data = tmp_path / 'data.csv'
+    data.write_text(''.join(sample_lines[:600]))
+    run(data, tmp_path / 'results', quality='quarantine')
+    assert IncrementalState.load(str(tmp_path / 'results')) is None
+    assert IncrementalState.load(str(tmp_path / 'results'), quality='quarantine') is not None
+
+
+def test_multi_period_decomposition_is_extended(tmp_path, sample_lines):
+    data = tmp_path / 'data.csv'
+    data.write_text(''.join(sample_lines[:1001]))
+    run(data, tmp_path / 'incremental', seasonal_method='multi_period')
+    assert (tmp_path / 'incremental' / SEASONAL_FILE).exists()
+    for start, stop in [(1001, 1002), (1002, 1300)]:
+        with open(data, 'a') as f:
+            f.writelines(sample_lines[start:stop])
+        analysis = run(data, tmp_path / 'incremental', seasonal_method='multi_period')
+        stages = [record['stage'] for record in analysis.metrics.records]
+        assert 'seasonal_analysis.extend_multi_period' in stages
+        assert 'seasonal_analysis.decompose_time_series' not in stages
+    run(data, tmp_path / 'full', incremental=False, seasonal_method='multi_period')
+
+    expected = ResultStore(str(tmp_path / 'full'))
+    actual = ResultStore(str(tmp_path / 'incremental'))
+    assert sorted(expected.keys()) == sorted(actual.keys())
+    for key in expected.keys():
+        if not key.startswith('seasonal_analysis/'):
+            continue
+        # The updated statistics are summed in a different order than a refit
+        np.testing.assert_allclose(actual.load_series(key).to_numpy(dtype=float),
+                                   expected.load_series(key).to_numpy(dtype=float), rtol=1e-10)
+    # State saved for multi-period runs is not reused for classical ones
+    assert IncrementalState.load(str(tmp_path / 'incremental')) is None
+
+
+@pytest.mark.parametrize('rows', [100, 512, 700, 1283])
+def test_seeded_state_matches_replayed_state(rows):
+    data = pd.read_csv(SAMPLE_CSV, parse_dates=['Date'], index_col='Date').iloc[:rows]
+    replayed = IncrementalState()
+    replayed.extend(data)
+    seeded = IncrementalState()
+    seeded.extend(seeded.seed(data))
+
+    assert seeded.rows == replayed.rows == rows
+    for name, state in replayed.states.items():
+        # Compared as saved, so NaN in window buffers compares equal
+        assert json.dumps(seeded.states[name].to_dict()) == json.dumps(state.to_dict()), name
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SAMPLE_CSV
+from tesla_analysis import indicators
+from tesla_analysis.benchmark import INDICATOR_TOLERANCE, INDICATOR_WINDOWS, relative_error
+
+ta_trend = pytest.importorskip('ta.trend')
+ta_momentum = pytest.importorskip('ta.momentum')
+
+
+def sample_close():
+    return pd.read_csv(SAMPLE_CSV, parse_dates=['Date'], index_col='Date')['Close'].astype(float)
+
+
+def with_gaps(close):
+    """Copy of the closes with leading NaNs and gaps of one and several rows"""
+    close = close.copy()
+    close.iloc[:30] = np.nan
+    close.iloc[500:505] = np.nan
+    close.iloc[1000] = np.nan
+    return close
+
+
+def reference(name, close, window):
+    if name == 'ema':
+        return ta_trend.EMAIndicator(close=close, window=window).ema_indicator().to_numpy()
+    return ta_momentum.RSIIndicator(close=close, window=window).rsi().to_numpy()
+
+
+@pytest.mark.parametrize('name', ['ema', 'rsi'])
+@pytest.mark.parametrize('prepare', [lambda close: close, with_gaps], ids=['complete', 'gaps'])
+def test_native_kernels_match_ta(name, prepare):
+    close = prepare(sample_close())
+    values = getattr(indicators, name)(close.to_numpy(), INDICATOR_WINDOWS)
+
+    for window, computed in zip(INDICATOR_WINDOWS, values):
+        # relative_error is infinite when the NaN rows differ
+        assert relative_error(computed, reference(name, close, window)) <= INDICATOR_TOLERANCE, window
+
+
+@pytest.mark.parametrize('name', ['ema', 'rsi'])
+def test_columns_match_single_series(name):
+    close = sample_close()
+    columns = np.column_stack([close.to_numpy(), with_gaps(close).to_numpy()])
+    kernel = getattr(indicators, name)
+
+    values = kernel(columns, INDICATOR_WINDOWS)
+    for column in range(columns.shape[1]):
+        np.testing.assert_array_equal(values[:, :, column], kernel(columns[:, column], INDICATOR_WINDOWS))
@@ -0,0 +1,31 @@
+import threading
+import time
+
+from tesla_analysis.lazy_results import LazyResults
+
+
+def test_membership_does_not_compute():
+    calls = []
+    results = LazyResults({'group': lambda: calls.append('group') or 1})
+
+    assert 'group' in results
+    assert 'other' not in results
+    assert calls == []
+
+
+def test_concurrent_reads_compute_once():
+    calls = []
+
+    def load():
+        calls.append('group')
+        time.sleep(0.05)
+        return 1
+
+    results = LazyResults({'group': load})
+    threads = [threading.Thread(target=lambda: results['group']) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ['group']
+    assert results['group'] == 1
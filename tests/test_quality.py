@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tesla_analysis.data_loader import StockDataLoader
+from tesla_analysis.quality import (DUPLICATE_DATE, HIGH_BELOW_LOW, MISSING_VALUE,
+                                    NON_POSITIVE_VOLUME, OUTSIDE_RANGE, UNSORTED_DATE)
+
+# One clean bar followed by an inverted range, a non-numeric close, an empty
+# volume, an unsorted date, a duplicate date and a zero volume
+CRAFTED_CSV = """Date,Close,High,Low,Open,Volume
+2024-01-02,10.0,10.5,9.5,10.0,100
+2024-01-03,10.1,9.5,10.5,10.0,100
+2024-01-04,abc,10.5,9.5,10.0,100
+2024-01-05,10.2,10.5,9.5,10.0,
+2024-01-09,10.3,10.5,9.5,10.0,100
+2024-01-08,10.2,10.5,9.5,10.0,100
+2024-01-10,10.4,10.5,9.5,10.0,100
+2024-01-10,10.4,10.5,9.5,10.0,100
+2024-01-11,10.3,10.5,9.5,10.0,0
+"""
+
+# Loader settings every mode is checked with: the plain read, compact dtypes
+# and streamed chunks that split the issues across chunk boundaries
+LOADER_OPTIONS = [{}, {'compact': True}, {'chunksize': 2}, {'compact': True, 'chunksize': 2}]
+
+
+def write_csv(tmp_path, lines):
+    path = tmp_path / 'crafted.csv'
+    path.write_text(''.join(lines))
+    return str(path)
+
+
+def check_dtypes(data, options):
+    """Assert the kept rows are numeric, in the compact dtypes if requested"""
+    if options.get('compact'):
+        assert all(data[column].dtype == np.float32 for column in ['Close', 'High', 'Low', 'Open'])
+        assert data['Volume'].dtype == np.int64
+    else:
+        assert all(pd.api.types.is_numeric_dtype(data[column]) for column in data.columns)
+
+
+@pytest.mark.parametrize('options', LOADER_OPTIONS)
+def test_raise_rejects_missing_values(tmp_path, options):
+    loader = StockDataLoader(write_csv(tmp_path, [CRAFTED_CSV]), quality='raise', **options)
+    with pytest.raises(Exception, match='missing_value'):
+        loader.load_data()
+
+
+@pytest.mark.parametrize('options', LOADER_OPTIONS)
+def test_raise_only_reports_other_issues(tmp_path, options):
+    lines = CRAFTED_CSV.splitlines(True)
+    path = write_csv(tmp_path, lines[:3] + lines[5:9])
+    loader = StockDataLoader(path, quality='raise', **options)
+    data = loader.load_data()
+
+    assert len(data) == 6
+    check_dtypes(data, options)
+    assert loader.quality.report()['issues'] == {
+        'high_below_low': 1, 'outside_range': 1, 'duplicate_date': 1,
+        'unsorted_date': 1, 'calendar_gap': 1
+    }
+    assert len(loader.quality.quarantine()) == 0
+
+
+@pytest.mark.parametrize('options', LOADER_OPTIONS)
+def test_quarantine_sets_invalid_rows_aside(tmp_path, options):
+    loader = StockDataLoader(write_csv(tmp_path, [CRAFTED_CSV]), quality='quarantine', **options)
+    data = loader.load_data()
+
+    assert list(data.index) == list(pd.to_datetime(['2024-01-02', '2024-01-09', '2024-01-10']))
+    check_dtypes(data, options)
+    quarantined = loader.quality.quarantine()
+    assert list(quarantined['issues']) == [
+        HIGH_BELOW_LOW | OUTSIDE_RANGE, MISSING_VALUE, MISSING_VALUE,
+        UNSORTED_DATE, DUPLICATE_DATE, NON_POSITIVE_VOLUME
+    ]
+    report = loader.quality.report()
+    assert (report['rows'], report['quarantined'], report['repaired']) == (9, 6, 0)
+
+
+@pytest.mark.parametrize('options', LOADER_OPTIONS)
+def test_repair_fixes_ranges_and_order(tmp_path, options):
+    loader = StockDataLoader(write_csv(tmp_path, [CRAFTED_CSV]), quality='repair', **options)
+    data = loader.load_data()
+
+    assert list(data.index) == list(pd.to_datetime(
+        ['2024-01-02', '2024-01-03', '2024-01-08', '2024-01-09', '2024-01-10']
+    ))
+    check_dtypes(data, options)
+    assert (data.loc['2024-01-03', ['High', 'Low']].to_numpy(dtype=float) == [10.5, 9.5]).all()
+    quarantined = loader.quality.quarantine()
+    assert list(quarantined['issues']) == [
+        MISSING_VALUE, MISSING_VALUE, DUPLICATE_DATE, NON_POSITIVE_VOLUME
+    ]
+    report = loader.quality.report()
+    assert (report['rows'], report['quarantined'], report['repaired']) == (9, 4, 2)
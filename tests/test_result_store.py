@@ -0,0 +1,27 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from tesla_analysis.result_store import MANIFEST_FILE, ResultStore
+
+
+def results(value, index):
+    return {'group': {'series': pd.Series(np.full(len(index), value), index=index, name='series')}}
+
+
+def test_open_store_keeps_reading_its_version(tmp_path):
+    index = pd.date_range('2024-01-01', periods=5, name='Date')
+    ResultStore(str(tmp_path)).save(results(1.0, index), index)
+    reader = ResultStore(str(tmp_path))
+    reader.manifest
+
+    ResultStore(str(tmp_path)).save(results(2.0, index), index)
+    assert (reader.query('group/series') == 1.0).all()
+    assert (ResultStore(str(tmp_path)).query('group/series') == 2.0).all()
+
+    # The first version's files are removed by the save after the one replacing them
+    ResultStore(str(tmp_path)).save(results(3.0, index), index)
+    files = sorted(os.listdir(tmp_path))
+    assert files == [MANIFEST_FILE, 'v2-group.series.bin', 'v2-index.bin',
+                     'v3-group.series.bin', 'v3-index.bin']
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SAMPLE_CSV
+from tesla_analysis.rolling import BLOCK_SIZE, history_rows, rolling_window_stats
+
+# Windows inside one block, ending exactly at a block, and longer than a block
+WINDOWS = [1, 2, 20, 255, 256, 257, 600]
+
+
+def closes():
+    return pd.read_csv(SAMPLE_CSV, parse_dates=['Date'], index_col='Date')['Close'].to_numpy(dtype=float)
+
+
+def with_nan_runs(values):
+    """Copy of the values with a single NaN, a short run and a run longer than a block"""
+    values = values.copy()
+    values[40] = np.nan
+    values[300:310] = np.nan
+    values[900:1200] = np.nan
+    return values
+
+
+def assert_matches_pandas(values, requests, outputs):
+    frame = pd.DataFrame(values)
+    scale = np.nanmax(np.abs(frame.to_numpy()), axis=0)
+    for stat, windows in requests.items():
+        for window in windows:
+            expected = getattr(frame.rolling(window), stat)().to_numpy()
+            actual = outputs[(stat, window)].reshape(expected.shape)
+            # Both sides are NaN on the same rows
+            np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected), err_msg=f'{stat} {window}')
+            if stat == 'std':
+                # Sums of squares cancel to within rounding of the squared
+                # values, so variances are compared against that scale
+                actual, expected, atol = actual ** 2, expected ** 2, 1e-12 * scale ** 2
+            else:
+                atol = 0.0
+            valid = ~np.isnan(expected)
+            error = np.abs(actual - expected) - 1e-10 * np.abs(expected)
+            assert (error <= atol)[valid].all(), f'{stat} {window}'
+
+
+@pytest.mark.parametrize('prepare', [lambda values: values, with_nan_runs], ids=['complete', 'nan_runs'])
+def test_matches_pandas_rolling(prepare):
+    values = prepare(closes())
+    requests = {'mean': WINDOWS, 'std': WINDOWS}
+    assert_matches_pandas(values, requests, rolling_window_stats(values, requests))
+
+
+def test_series_are_independent_columns():
+    values = closes()
+    # A second series on a very different scale with its own NaN runs
+    columns = np.column_stack([values, with_nan_runs(values) * 1e4 + 5e6])
+    requests = {'mean': [20, 300], 'std': [20, 300], 'sum': [5], 'min': [7], 'max': [7]}
+    assert_matches_pandas(columns, requests, rolling_window_stats(columns, requests))
+
+
+@pytest.mark.parametrize('prepare', [lambda values: values, with_nan_runs], ids=['complete', 'nan_runs'])
+def test_tail_extension_is_exact(prepare):
+    values = prepare(closes())
+    requests = {'mean': WINDOWS, 'std': WINDOWS}
+    full = rolling_window_stats(values, requests)
+    history = history_rows(requests)
+    assert history > BLOCK_SIZE
+
+    for start in range(2 * history, len(values), history):
+        # The first ``history`` rows of the tail only serve as history
+        tail = rolling_window_stats(values[start - history:], requests, start=start - history)
+        for key, output in tail.items():
+            assert np.isnan(output[:history]).all()
+            np.testing.assert_array_equal(output[history:], full[key][start:], err_msg=str(key))
+
+
+def test_unaligned_tail_start_is_rejected():
+    with pytest.raises(ValueError, match='multiple'):
+        rolling_window_stats(closes(), {'mean': [20]}, start=BLOCK_SIZE + 1)
@@ -0,0 +1,33 @@
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tesla_analysis.result_store import ResultStore
+from tesla_analysis.service import ResultService
+
+
+def results(value, index):
+    return {'group': {'series': pd.Series(np.full(len(index), value), index=index, name='series')}}
+
+
+@pytest.mark.parametrize('target', ['/tickers/TSLA/results/group/series?last=2D', '/tickers/TSLA'])
+def test_retired_files_reload_the_manifest(tmp_path, target):
+    index = pd.date_range('2024-01-01', periods=5, name='Date')
+    ResultStore(str(tmp_path)).save(results(1.0, index), index)
+    service = ResultService({'TSLA': str(tmp_path)})
+    service.refresh()
+    old_version = service.sources['TSLA'].version
+
+    # The second save after the loaded one deletes the loaded version's files
+    ResultStore(str(tmp_path)).save(results(2.0, index), index)
+    ResultStore(str(tmp_path)).save(results(3.0, index), index)
+    response = asyncio.run(service.handle('GET', target))
+
+    assert response.status == 200
+    assert service.sources['TSLA'].version != old_version
+    assert response.headers['ETag'] == f'"{service.sources["TSLA"].version}"'
+    if 'results' in target:
+        assert json.loads(response.body)['data'] == [3.0, 3.0, 3.0]
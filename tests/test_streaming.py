@@ -0,0 +1,88 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SAMPLE_CSV
+from tesla_analysis.analyzers import PriceAnalyzer
+from tesla_analysis.data_loader import StockDataLoader
+from tesla_analysis.main import TeslaStockAnalysis
+from tesla_analysis.streaming import StreamingAnalysis
+
+
+def batch_value(results, key):
+    """Look up a nested result by its slash-separated key"""
+    node = results
+    for part in key.split('/'):
+        node = node[part]
+    return node
+
+
+def bars(data):
+    """Rows of a loaded frame as streamed bars"""
+    return [{'Date': date, 'Close': row.Close, 'Volume': row.Volume} for date, row in data.iterrows()]
+
+
+def check_streaming_matches_batch(tmp_path, rows):
+    """Stream the first rows of the sample and compare with a batch run over them"""
+    data_path = tmp_path / 'data.csv'
+    data_path.write_text(''.join(SAMPLE_CSV.read_text().splitlines(True)[:rows + 1]))
+    data = StockDataLoader(str(data_path)).load_data()
+    results = TeslaStockAnalysis(str(data_path), results_path=str(tmp_path / 'results'),
+                                 cache_dir=None).lazy_results()
+
+    streaming = StreamingAnalysis(keep_history=True)
+    assert streaming.run(bars(data)) == len(data)
+    streamed = streaming.to_frame()
+    for key in streamed.columns:
+        expected = batch_value(results, key)
+        np.testing.assert_array_equal(streamed[key].to_numpy(), expected.to_numpy(dtype=float), err_msg=key)
+
+
+def test_streaming_matches_batch(tmp_path):
+    check_streaming_matches_batch(tmp_path, 1200)
+
+
+def test_long_windows_match_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(PriceAnalyzer, 'PARAMETERS', {'sma_windows': [20, 300], 'ema_windows': [20]})
+    check_streaming_matches_batch(tmp_path, 900)
+
+
+def test_warm_up_continues_batch_series(tmp_path):
+    data = StockDataLoader(str(SAMPLE_CSV)).load_data().iloc[:700]
+    full = StreamingAnalysis(keep_history=True)
+    full.run(bars(data))
+    resumed = StreamingAnalysis(keep_history=True)
+    resumed.warm_up(data.iloc[:500])
+    resumed.run(bars(data.iloc[500:]))
+    pd.testing.assert_frame_equal(resumed.to_frame(), full.to_frame().iloc[500:])
+
+
+def test_invalid_bars_are_rejected_without_advancing_state():
+    clean = [{'Date': f'2020-01-{day:02d}', 'Close': 10.0 + day, 'Volume': 100} for day in range(1, 30)]
+    invalid = [
+        {'Date': '2020-03-01', 'Close': 'n/a', 'Volume': 100},
+        {'Date': '2020-03-02', 'Close': math.nan, 'Volume': 100},
+        {'Date': '2020-03-03', 'Close': 12.0, 'Volume': 0},
+        {'Date': '2020-01-05', 'Close': 12.0, 'Volume': 100},
+        {'Close': 12.0, 'Volume': 100}
+    ]
+    reference = StreamingAnalysis(keep_history=True)
+    reference.run(clean)
+    streaming = StreamingAnalysis(keep_history=True)
+    streaming.run(clean[:10] + invalid + clean[10:])
+    assert streaming.rejected == len(invalid)
+    pd.testing.assert_frame_equal(streaming.to_frame(), reference.to_frame())
+
+
+def test_subscriber_errors_propagate():
+    streaming = StreamingAnalysis()
+
+    def failing(update):
+        raise KeyError('subscriber bug')
+
+    streaming.subscribe(failing)
+    with pytest.raises(KeyError, match='subscriber bug'):
+        streaming.run([{'Date': '2020-01-02', 'Close': 10.0, 'Volume': 100}])
+    assert streaming.rejected == 0